@@ -6,18 +6,20 @@ import pandas as pd
 from pathlib import Path
 import numpy as np
 
+from src.factors.rolling_stats import RollingMoments
+
 
 def standardize_ofi(df, window=200):
     """标准化OFI"""
     if 'OFI' not in df.columns:
         return df
 
-    # 使用滚动窗口计算均值和标准差
-    ofi_mean = df['OFI'].rolling(window=window, min_periods=1).mean()
-    ofi_std = df['OFI'].rolling(window=window, min_periods=1).std()
+    # 使用滚动窗口计算均值和标准差（单次遍历）
+    moments = RollingMoments([window], min_periods=1)
+    ofi_mean, ofi_std = moments.update(df['OFI'].to_numpy(dtype=np.float64))[window]
 
     # 标准化
-    df['OFI_z'] = (df['OFI'] - ofi_mean) / ofi_std.replace(0, 1)
+    df['OFI_z'] = (df['OFI'] - ofi_mean) / np.where(ofi_std == 0, 1.0, ofi_std)
 
     return df
 
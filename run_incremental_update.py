@@ -0,0 +1,82 @@
+"""
+增量更新合并后的K线文件
+
+只处理 results/{symbol}_{tf}_merged_bars_with_ofi.csv 最后一根K线之后新增的
+date=YYYY-MM-DD 分区，把新K线追加到文件末尾：
+  - 只读取文件尾部（OFI_z滚动窗口和未来收益跨度需要的行）
+  - OFI_z只为新K线计算
+  - 修补最后H行的fut_ret_H
+
+用法: python run_incremental_update.py [SYMBOL ...]
+例如: python run_incremental_update.py BTCUSD ETHUSD
+不指定品种时更新配置中的全部品种
+"""
+
+import sys
+from pathlib import Path
+import time
+from datetime import datetime
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from src.config_loader import get_config, get_project_root
+from src.data.incremental_bars import append_new_partitions
+
+
+def main():
+    config = get_config()
+    project_root = get_project_root()
+
+    symbols = [s.upper() for s in sys.argv[1:]] or config['symbols']
+    bar_sizes = config['bar_settings']['bar_sizes']
+    ticks_dir = project_root / config['data_paths']['ticks_dir']
+    results_dir = project_root / config['results_paths']['bars_with_ofi_dir']
+    zscore_window = config.get('ofi', {}).get('zscore_window', 200)
+    horizons = config.get('analysis', {}).get('horizons', [2, 5, 10])
+
+    print("="*80)
+    print("增量更新合并K线文件")
+    print("="*80)
+    print(f"\n配置信息:")
+    print(f"  品种: {', '.join(symbols)}")
+    print(f"  时间周期: {', '.join(bar_sizes)}")
+    print(f"  数据目录: {ticks_dir}")
+    print(f"  结果目录: {results_dir}")
+
+    start_time = time.time()
+    total_bars = 0
+
+    for symbol in symbols:
+        print(f"\n{'-'*60}")
+        print(f"品种: {symbol}")
+        print(f"{'-'*60}")
+        try:
+            appended = append_new_partitions(
+                symbol=symbol,
+                ticks_dir=ticks_dir,
+                results_dir=results_dir,
+                bar_sizes=bar_sizes,
+                zscore_window=zscore_window,
+                horizons=horizons
+            )
+            n_bars = sum(appended.values())
+            total_bars += n_bars
+            print(f"  ✓ 追加 {n_bars} 根K线")
+        except Exception as e:
+            print(f"  ✗ 错误: {e}")
+            import traceback
+            traceback.print_exc()
+            continue
+
+    elapsed = time.time() - start_time
+    print(f"\n{'='*80}")
+    print(f"✅ 增量更新完成！共追加 {total_bars} 根K线")
+    print(f"总耗时: {elapsed:.1f} 秒")
+    print(f"完成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*80}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@
 import sys
 from pathlib import Path
 import pandas as pd
-import time
 from datetime import datetime
 
 # Add project root to path
@@ -14,116 +13,16 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from src.config_loader import get_config, get_project_root
-from src.data.parquet_tick_loader import load_partitioned_parquet_ticks
-from src.factors.ofi import add_mid_price, label_tick_directions, compute_ofi_bars, standardize_ofi
-from src.research.ofi_single_factor import add_future_returns
-
-
-def run_single_batch(symbol, start_date, end_date, bar_sizes, ticks_dir, results_dir, batch_name):
-    """运行单个批次的分析"""
-    print(f"\n{'='*80}")
-    print(f"批次: {batch_name}")
-    print(f"品种: {symbol}")
-    print(f"日期范围: {start_date} 到 {end_date}")
-    print(f"{'='*80}\n")
-    
-    batch_results = []
-    
-    for bar_size in bar_sizes:
-        print(f"\n处理时间周期: {bar_size}")
-        print("-" * 60)
-        
-        try:
-            # [1/4] 加载tick数据
-            print(f"  [1/4] 加载tick数据...")
-            start_time = time.time()
-            ticks = load_partitioned_parquet_ticks(
-                symbol=symbol,
-                ticks_dir=ticks_dir,
-                start_date=start_date,
-                end_date=end_date
-            )
-            load_time = time.time() - start_time
-            print(f"    ✓ 加载完成: {len(ticks):,} ticks ({load_time:.1f}秒)")
-            
-            # [2/4] 计算OFI
-            print(f"  [2/4] 计算OFI...")
-            ticks = add_mid_price(ticks)
-            ticks = label_tick_directions(ticks)
-            ofi_bars = compute_ofi_bars(ticks, bar_size=bar_size)
-            ofi_bars = standardize_ofi(ofi_bars, window=200)
-            print(f"    ✓ 生成 {len(ofi_bars):,} 个K线")
-            
-            # [3/4] 添加未来收益
-            print(f"  [3/4] 计算未来收益...")
-            ofi_bars = add_future_returns(ofi_bars, horizons=[2, 5, 10])
-            print(f"    ✓ 添加 3 个时间跨度")
-            
-            # [4/4] 保存批次结果
-            print(f"  [4/4] 保存批次结果...")
-            batch_file = results_dir / f"{symbol}_{bar_size}_{batch_name}_bars_with_ofi.csv"
-            ofi_bars.to_csv(batch_file)
-            print(f"    ✓ 保存到: {batch_file.name}")
-            
-            batch_results.append({
-                'symbol': symbol,
-                'batch': batch_name,
-                'bar_size': bar_size,
-                'num_ticks': len(ticks),
-                'num_bars': len(ofi_bars),
-                'file': batch_file.name
-            })
-            
-            # 清理内存
-            del ticks, ofi_bars
-            
-        except Exception as e:
-            print(f"    ✗ 错误: {e}")
-            import traceback
-            traceback.print_exc()
-    
-    return batch_results
-
-
-def merge_batches(symbol, bar_size, batch_files, results_dir):
-    """合并所有批次"""
-    print(f"\n合并 {symbol} {bar_size}...")
-    
-    all_data = []
-    for batch_file in batch_files:
-        file_path = results_dir / batch_file
-        if file_path.exists():
-            df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-            all_data.append(df)
-            print(f"  ✓ 加载: {batch_file} ({len(df):,} 行)")
-    
-    if not all_data:
-        print(f"  ✗ 没有找到批次文件")
-        return
-    
-    # 合并并排序
-    merged = pd.concat(all_data, axis=0)
-    merged = merged.sort_index()
-    print(f"  ✓ 合并完成: {len(merged):,} 行")
-    
-    # 重新计算OFI_z (使用全部数据)
-    merged = standardize_ofi(merged, window=200)
-    print(f"  ✓ 重新计算OFI_z")
-    
-    # 重新计算未来收益
-    merged = add_future_returns(merged, horizons=[2, 5, 10])
-    print(f"  ✓ 重新计算未来收益")
-    
-    # 保存合并结果
-    merged_file = results_dir / f"{symbol}_{bar_size}_merged_bars_with_ofi.csv"
-    merged.to_csv(merged_file)
-    print(f"  ✓ 保存: {merged_file.name}\n")
+from src.data.bar_cache import bar_cache_from_config
+from src.data.batch_boundary import BatchBoundary, batch_boundary_path
+from src.data.batch_runner import merge_batches, run_batches
 
 
 def main():
     # 配置
     config = get_config()
     project_root = get_project_root()
+    cache = bar_cache_from_config(config)
     ticks_dir = project_root / config['data_paths']['ticks_dir']
     results_dir = project_root / 'results'
     results_dir.mkdir(exist_ok=True)
@@ -162,18 +61,12 @@ def main():
     print("处理 USDJPY 剩余批次 (2022-2025)")
     print("="*80)
 
-    usdjpy_results = []
-    for batch_name, start_date, end_date in usdjpy_batches:
-        results = run_single_batch(
-            symbol='USDJPY',
-            start_date=start_date,
-            end_date=end_date,
-            bar_sizes=bar_sizes,
-            ticks_dir=ticks_dir,
-            results_dir=results_dir,
-            batch_name=batch_name
-        )
-        usdjpy_results.extend(results)
+    # 从已完成批次（2019-2021）保存的边界状态继续
+    boundary = BatchBoundary.load(batch_boundary_path(results_dir, 'USDJPY', '2019-2021'))
+    usdjpy_results, _ = run_batches(
+        'USDJPY', usdjpy_batches, bar_sizes, ticks_dir, results_dir,
+        cache=cache, boundary=boundary
+    )
 
     # 合并USDJPY所有批次
     print("\n" + "="*80)
@@ -199,18 +92,12 @@ def main():
     print("处理 XAUUSD 剩余批次 (2016-2025)")
     print("="*80)
 
-    xauusd_results = []
-    for batch_name, start_date, end_date in xauusd_batches:
-        results = run_single_batch(
-            symbol='XAUUSD',
-            start_date=start_date,
-            end_date=end_date,
-            bar_sizes=bar_sizes,
-            ticks_dir=ticks_dir,
-            results_dir=results_dir,
-            batch_name=batch_name
-        )
-        xauusd_results.extend(results)
+    # 从已完成批次（2013-2015）保存的边界状态继续
+    boundary = BatchBoundary.load(batch_boundary_path(results_dir, 'XAUUSD', '2013-2015'))
+    xauusd_results, _ = run_batches(
+        'XAUUSD', xauusd_batches, bar_sizes, ticks_dir, results_dir,
+        cache=cache, boundary=boundary
+    )
 
     # 合并XAUUSD所有批次
     print("\n" + "="*80)
@@ -16,116 +16,8 @@ project_root = Path(__file__).parent.parent if '__file__' in globals() else Path
 sys.path.insert(0, str(project_root))
 
 from src.config_loader import get_config, get_project_root
-from src.data.parquet_tick_loader import load_partitioned_parquet_ticks
-from src.factors.ofi import add_mid_price, label_tick_directions, compute_ofi_bars, standardize_ofi
-from src.research.ofi_single_factor import add_future_returns
-
-
-def run_single_batch(symbol, start_date, end_date, bar_sizes, ticks_dir, results_dir, batch_name):
-    """运行单个批次的分析"""
-    print(f"\n{'='*80}")
-    print(f"批次: {batch_name}")
-    print(f"品种: {symbol}")
-    print(f"日期范围: {start_date} 到 {end_date}")
-    print(f"{'='*80}\n")
-    
-    batch_results = []
-    
-    for bar_size in bar_sizes:
-        print(f"\n处理时间周期: {bar_size}")
-        print("-" * 60)
-        
-        try:
-            # [1/4] 加载tick数据
-            print(f"  [1/4] 加载tick数据...")
-            start_time = time.time()
-            ticks = load_partitioned_parquet_ticks(
-                symbol=symbol,
-                ticks_dir=ticks_dir,
-                start_date=start_date,
-                end_date=end_date
-            )
-            load_time = time.time() - start_time
-            print(f"    ✓ 加载完成: {len(ticks):,} ticks ({load_time:.1f}秒)")
-            
-            if len(ticks) == 0:
-                print(f"    ⚠ 警告: 该时间段无数据，跳过")
-                continue
-            
-            # [2/4] 计算OFI
-            print(f"  [2/4] 计算OFI...")
-            ticks = add_mid_price(ticks)
-            ticks = label_tick_directions(ticks)
-            ofi_bars = compute_ofi_bars(ticks, bar_size=bar_size)
-            ofi_bars = standardize_ofi(ofi_bars, window=200)
-            print(f"    ✓ 生成 {len(ofi_bars):,} 个K线")
-            
-            # [3/4] 添加未来收益
-            print(f"  [3/4] 计算未来收益...")
-            horizons = [2, 5, 10]
-            ofi_bars = add_future_returns(ofi_bars, horizons=horizons)
-            print(f"    ✓ 添加 {len(horizons)} 个时间跨度")
-            
-            # [4/4] 保存批次结果
-            print(f"  [4/4] 保存批次结果...")
-            batch_file = results_dir / f"{symbol}_{bar_size}_{batch_name}_bars_with_ofi.csv"
-            ofi_bars.to_csv(batch_file)
-            print(f"    ✓ 保存到: {batch_file.name}")
-            
-            batch_results.append({
-                'symbol': symbol,
-                'bar_size': bar_size,
-                'batch': batch_name,
-                'start_date': start_date,
-                'end_date': end_date,
-                'n_ticks': len(ticks),
-                'n_bars': len(ofi_bars),
-                'file': batch_file.name
-            })
-            
-        except Exception as e:
-            print(f"    ✗ 错误: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
-    
-    return batch_results
-
-
-def merge_batches(symbol, bar_size, batch_files, results_dir):
-    """合并多个批次的结果"""
-    print(f"\n合并 {symbol} {bar_size} 的所有批次...")
-    
-    all_data = []
-    for batch_file in batch_files:
-        file_path = results_dir / batch_file
-        if file_path.exists():
-            df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-            all_data.append(df)
-            print(f"  ✓ 加载: {batch_file} ({len(df)} bars)")
-    
-    if not all_data:
-        print(f"  ⚠ 没有找到批次文件")
-        return None
-    
-    # 合并并排序
-    merged = pd.concat(all_data, axis=0)
-    merged = merged.sort_index()
-    
-    # 重新计算OFI_z（使用全部数据）
-    print(f"  重新计算OFI_z（使用全部数据）...")
-    merged = standardize_ofi(merged, window=200)
-    
-    # 重新计算未来收益
-    print(f"  重新计算未来收益...")
-    merged = add_future_returns(merged, horizons=[2, 5, 10])
-    
-    # 保存合并结果
-    merged_file = results_dir / f"{symbol}_{bar_size}_merged_bars_with_ofi.csv"
-    merged.to_csv(merged_file)
-    print(f"  ✓ 保存合并结果: {merged_file.name} ({len(merged)} bars)")
-    
-    return merged
+from src.data.bar_cache import bar_cache_from_config
+from src.data.batch_runner import merge_batches, run_batches
 
 
 def main():
@@ -143,6 +35,7 @@ def main():
     # 配置
     config = get_config()
     project_root = get_project_root()
+    cache = bar_cache_from_config(config)
     
     bar_sizes = config['bar_settings']['bar_sizes']
     ticks_dir = project_root / config['data_paths']['ticks_dir']
@@ -180,21 +73,9 @@ def main():
     total_tasks = len(batches) * len(bar_sizes)
     print(f"  总任务数: {total_tasks}")
 
-    # 运行所有批次
+    # 运行所有批次（每批次从上一批次的边界状态继续）
     start_time = time.time()
-    all_batch_results = []
-
-    for batch_name, start_date, end_date in batches:
-        batch_results = run_single_batch(
-            symbol=symbol,
-            start_date=start_date,
-            end_date=end_date,
-            bar_sizes=bar_sizes,
-            ticks_dir=ticks_dir,
-            results_dir=results_dir,
-            batch_name=batch_name
-        )
-        all_batch_results.extend(batch_results)
+    all_batch_results, _ = run_batches(symbol, batches, bar_sizes, ticks_dir, results_dir, cache=cache)
 
     # 保存批次摘要
     if all_batch_results:
@@ -11,14 +11,22 @@ Author: OFI Research Project
 import sys
 from pathlib import Path
 
+import pandas as pd
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.config_loader import get_config, get_project_root, resolve_path
-from src.data.parquet_tick_loader import load_partitioned_parquet_ticks
-from src.data.tick_to_bars import ticks_to_bars
-from src.factors.ofi import add_mid_price, label_tick_directions, compute_ofi_bars, standardize_ofi
+from src.data.parquet_tick_loader import load_partitioned_parquet_ticks, iter_partitioned_parquet_ticks
+from src.data.bar_cache import BarCache, bar_cache_from_config, build_bars_cached
+from src.factors.ofi import (
+    add_mid_price,
+    label_tick_directions,
+    compute_bars_with_ofi,
+    iter_bar_aligned_ticks,
+    standardize_ofi,
+)
 
 
 def build_bars_with_ofi_from_parquet(
@@ -29,6 +37,9 @@ def build_bars_with_ofi_from_parquet(
     zscore_window: int = 200,
     start_date: str = None,
     end_date: str = None,
+    streaming: bool = False,
+    chunk_days: int = 1,
+    cache: BarCache = None,
 ) -> None:
     """Build bars with OFI from partitioned Parquet data.
     
@@ -40,45 +51,68 @@ def build_bars_with_ofi_from_parquet(
         zscore_window: Window for OFI z-score calculation
         start_date: Optional start date (YYYY-MM-DD)
         end_date: Optional end date (YYYY-MM-DD)
+        streaming: Build bars chunk by chunk instead of loading all ticks
+        chunk_days: Date partitions per chunk when streaming
+        cache: Optional BarCache; only days whose partitions changed are rebuilt
     """
     print(f"\n{'-'*58}")
     print(f"Processing {symbol}")
     print(f"{'-'*58}")
     
-    # Load tick data
-    print(f"[{symbol}] Loading tick data from partitioned Parquet...")
-    ticks = load_partitioned_parquet_ticks(
-        symbol=symbol,
-        ticks_dir=ticks_dir,
-        start_date=start_date,
-        end_date=end_date,
-    )
-    
-    # Add mid price
-    print(f"[{symbol}] Adding mid price...")
-    ticks = add_mid_price(ticks)
-    
-    # Label tick directions
-    print(f"[{symbol}] Labeling tick directions...")
-    ticks = label_tick_directions(ticks)
+    if cache is not None:
+        # Reuse cached bars, rebuilding only changed date partitions
+        bars = build_bars_cached(
+            symbol, ticks_dir, [bar_size], cache,
+            zscore_window=zscore_window,
+            start_date=start_date,
+            end_date=end_date,
+        )[bar_size]
+    elif streaming:
+        # Stream ticks and aggregate bar-aligned segments (constant memory)
+        print(f"[{symbol}] Streaming tick data from partitioned Parquet ({chunk_days} day chunks)...")
+        tick_chunks = iter_partitioned_parquet_ticks(
+            symbol=symbol,
+            ticks_dir=ticks_dir,
+            start_date=start_date,
+            end_date=end_date,
+            chunk_days=chunk_days,
+        )
+        bars = pd.concat([
+            compute_bars_with_ofi(segment, bar_size=bar_size)
+            for segment in iter_bar_aligned_ticks(tick_chunks, bar_size=bar_size)
+        ])
+    else:
+        # Load tick data
+        print(f"[{symbol}] Loading tick data from partitioned Parquet...")
+        ticks = load_partitioned_parquet_ticks(
+            symbol=symbol,
+            ticks_dir=ticks_dir,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        
+        # Add mid price
+        print(f"[{symbol}] Adding mid price...")
+        ticks = add_mid_price(ticks)
+        
+        # Label tick directions
+        print(f"[{symbol}] Labeling tick directions...")
+        ticks = label_tick_directions(ticks)
+        
+        # Compute OHLCV + OFI bars (single resample)
+        print(f"[{symbol}] Computing OHLCV + OFI bars...")
+        bars = compute_bars_with_ofi(ticks, bar_size=bar_size)
     
-    # Compute OFI bars
-    print(f"[{symbol}] Computing OFI bars...")
-    ofi_bars = compute_ofi_bars(ticks, bar_size=bar_size)
-    print(f"[{symbol}] Created {len(ofi_bars)} OFI bars")
+    print(f"[{symbol}] Created {len(bars)} OHLCV bars")
     
-    # Standardize OFI
+    # Standardize OFI over bars with volume (as compute_ofi_bars would keep)
     print(f"[{symbol}] Standardizing OFI (window={zscore_window})...")
-    ofi_bars = standardize_ofi(ofi_bars, window=zscore_window)
-    
-    # Build OHLCV bars
-    print(f"[{symbol}] Building OHLCV bars...")
-    bars = ticks_to_bars(ticks, bar_size=bar_size)
-    print(f"[{symbol}] Created {len(bars)} OHLCV bars")
+    has_volume = bars['volume'] > 0
+    ofi_bars = standardize_ofi(bars.loc[has_volume, ['OFI_raw']], window=zscore_window)
     
-    # Merge bars and OFI
-    print(f"[{symbol}] Merging bars and OFI...")
-    bars_with_ofi = bars.join(ofi_bars[['OFI_raw', 'OFI_z']], how='left')
+    bars_with_ofi = bars[['open', 'high', 'low', 'close', 'tick_count', 'volume']].copy()
+    bars_with_ofi['OFI_raw'] = bars['OFI_raw'].where(has_volume)
+    bars_with_ofi['OFI_z'] = ofi_bars['OFI_z']
     
     print(f"[{symbol}] Final dataset: {len(bars_with_ofi)} bars")
     
@@ -110,6 +144,9 @@ def main():
     # Optional date range (can be added to config if needed)
     start_date = config.get('data', {}).get('start_date', None)
     end_date = config.get('data', {}).get('end_date', None)
+    streaming = config.get('data', {}).get('streaming', False)
+    chunk_days = config.get('data', {}).get('chunk_days', 1)
+    cache = bar_cache_from_config(config)
     
     print()
     print("Configuration:")
@@ -122,6 +159,10 @@ def main():
         print(f"  Start date: {start_date}")
     if end_date:
         print(f"  End date: {end_date}")
+    if streaming:
+        print(f"  Streaming: {chunk_days} day chunks")
+    if cache is not None:
+        print(f"  Bar cache: {cache.cache_dir}")
     
     # Process each symbol
     for symbol in symbols:
@@ -134,6 +175,9 @@ def main():
                 zscore_window=zscore_window,
                 start_date=start_date,
                 end_date=end_date,
+                streaming=streaming,
+                chunk_days=chunk_days,
+                cache=cache,
             )
         except Exception as e:
             print(f"\n[{symbol}] ERROR: {e}")
@@ -0,0 +1,263 @@
+"""Persistent tick-to-bar artifact cache for the OFI pipeline.
+
+Bars are cached per (symbol, bar_size, date partition). The key of a day
+combines:
+    - a fingerprint of the partition's Parquet files (name, size, mtime and
+      row-group statistics from the footer)
+    - the tick-rule state carried in from the previous day (last mid/sign),
+      or from the previous batch for the first day
+    - the bar-building code version
+
+A final, standardized result is also cached under (symbol, bar_size,
+zscore_window, all day fingerprints, initial tick state, code version),
+so an unchanged request is answered without touching any tick data, and a
+changed request only rebuilds the days whose key changed.
+
+Entries are pickled into one directory and evicted least-recently-used
+first once the directory exceeds its disk budget.
+
+Author: OFI Research Project
+"""
+
+import hashlib
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+import pandas as pd
+
+from .. import __version__
+from .parquet_tick_loader import _list_date_partitions, _read_files, _prepare_ticks
+from ..factors.ofi import add_mid_price, label_tick_directions, compute_bars_with_ofi, standardize_ofi
+
+# Bump when bar construction changes so stale entries stop matching
+BAR_CACHE_VERSION = 3
+
+
+def code_version() -> str:
+    """Version string mixed into every cache key."""
+    return f"{__version__}-bars{BAR_CACHE_VERSION}"
+
+
+def partition_fingerprint(date_dir: Path) -> str:
+    """Hash a date partition from file metadata and Parquet footers.
+
+    Args:
+        date_dir: A date=YYYY-MM-DD directory
+
+    Returns:
+        Hex digest that changes whenever a file is added, removed, rewritten
+        or its row groups change
+    """
+    import pyarrow.parquet as pq
+
+    h = hashlib.sha1()
+    for pq_file in sorted(date_dir.glob("*.parquet")):
+        stat = pq_file.stat()
+        h.update(f"{pq_file.name}|{stat.st_size}|{stat.st_mtime_ns}".encode())
+        try:
+            metadata = pq.ParquetFile(pq_file).metadata
+        except Exception:
+            h.update(b"|unreadable")
+            continue
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            h.update(f"|{row_group.num_rows}".encode())
+            for j in range(row_group.num_columns):
+                column = row_group.column(j)
+                if column.path_in_schema == 'ts' and column.statistics is not None and column.statistics.has_min_max:
+                    h.update(f"|{column.statistics.min}|{column.statistics.max}".encode())
+    return h.hexdigest()
+
+
+class BarCache:
+    """Directory of pickled cache entries with an LRU disk budget."""
+
+    def __init__(self, cache_dir: Path, max_size_mb: float = 4096.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        """Hash arbitrary key parts into a file-name-safe key."""
+        return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pkl"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached entry or None; a hit refreshes its LRU time."""
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            entry = pd.read_pickle(path)
+        except Exception:
+            return None
+        os.utime(path)
+        return entry
+
+    def put(self, key: str, entry: dict) -> None:
+        """Store an entry atomically."""
+        path = self._path(key)
+        tmp_path = path.with_suffix('.tmp')
+        pd.to_pickle(entry, tmp_path)
+        os.replace(tmp_path, path)
+
+    def evict(self) -> int:
+        """Delete least-recently-used entries until within the disk budget.
+
+        Returns:
+            Number of entries removed
+        """
+        entries = [(p.stat().st_mtime, p.stat().st_size, p) for p in self.cache_dir.glob("*.pkl")]
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def build_bars_cached(
+    symbol: str,
+    ticks_dir: Path,
+    bar_sizes: List[str],
+    cache: BarCache,
+    zscore_window: int = 200,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    tick_state: Tuple[Optional[float], int] = (None, 1),
+    return_state: bool = False,
+):
+    """Build OHLCV + OFI bars through the cache.
+
+    Args:
+        symbol: Trading symbol
+        ticks_dir: Base directory containing partitioned data
+        bar_sizes: Bar sizes to build (each must divide a day evenly)
+        cache: BarCache instance
+        zscore_window: Rolling window for OFI standardization
+        start_date: Optional start date (YYYY-MM-DD)
+        end_date: Optional end date (YYYY-MM-DD)
+        tick_state: (last mid, last sign) of the tick before start_date,
+            e.g. from the previous batch (default: start a fresh tick rule)
+        return_state: Also return the tick state after end_date
+
+    Returns:
+        Dict mapping bar_size to the compute_bars_with_ofi frame (bars with
+        ticks) plus OFI_mean/OFI_std/OFI_z standardized over bars with
+        volume > 0 (NaN on zero-volume bars); with return_state, a tuple of
+        (that dict, (last mid, last sign))
+    """
+    ticks_dir = Path(ticks_dir)
+    date_dirs = _list_date_partitions(symbol, ticks_dir, start_date, end_date)
+    version = code_version()
+    fingerprints = [partition_fingerprint(d) for d in date_dirs]
+
+    results = {}
+    pending = []
+    for bar_size in bar_sizes:
+        result_key = cache.make_key('result', symbol, bar_size, zscore_window, fingerprints, tick_state, version)
+        entry = cache.get(result_key)
+        if entry is not None:
+            results[bar_size] = entry['bars']
+            end_state = entry['end_state']
+        else:
+            pending.append((bar_size, result_key))
+
+    if not pending:
+        print(f"[{symbol}] Bar cache hit for {', '.join(bar_sizes)}")
+        return (results, end_state) if return_state else results
+
+    print(f"[{symbol}] Bar cache miss for {', '.join(b for b, _ in pending)}, checking {len(date_dirs)} days...")
+
+    parts = {bar_size: [] for bar_size, _ in pending}
+    state: Tuple[Optional[float], int] = tuple(tick_state)
+    n_rebuilt = 0
+
+    for date_dir, fingerprint in zip(date_dirs, fingerprints):
+        day_keys = {
+            bar_size: cache.make_key('day', symbol, bar_size, date_dir.name, fingerprint, state, version)
+            for bar_size in parts
+        }
+        entries = {bar_size: cache.get(key) for bar_size, key in day_keys.items()}
+        missing = [bar_size for bar_size, entry in entries.items() if entry is None]
+
+        if missing:
+            n_rebuilt += 1
+            try:
+                ticks = _prepare_ticks(symbol, _read_files(symbol, [date_dir]))
+            except ValueError as e:
+                print(f"[{symbol}] Warning: Skipping {date_dir.name}: {e}")
+                ticks = None
+
+            if ticks is None or len(ticks) == 0:
+                end_state = state
+                day_bars = {bar_size: None for bar_size in missing}
+            else:
+                ticks = label_tick_directions(add_mid_price(ticks), prev_mid=state[0], prev_sign=state[1])
+                end_state = (float(ticks['mid'].iloc[-1]), int(ticks['sign'].iloc[-1]))
+                day_bars = {bar_size: compute_bars_with_ofi(ticks, bar_size=bar_size) for bar_size in missing}
+
+            for bar_size in missing:
+                entries[bar_size] = {'bars': day_bars[bar_size], 'end_state': end_state}
+                cache.put(day_keys[bar_size], entries[bar_size])
+
+        state = next(iter(entries.values()))['end_state']
+        for bar_size, entry in entries.items():
+            if entry['bars'] is not None:
+                parts[bar_size].append(entry['bars'])
+
+    print(f"[{symbol}] Rebuilt {n_rebuilt}/{len(date_dirs)} days from ticks")
+
+    for bar_size, result_key in pending:
+        if not parts[bar_size]:
+            raise ValueError(f"No valid parquet files found for {symbol}")
+        bars = pd.concat(parts[bar_size])
+        has_volume = bars['volume'] > 0
+        standardized = standardize_ofi(bars.loc[has_volume, ['OFI_raw']], window=zscore_window)
+        for col in ['OFI_mean', 'OFI_std', 'OFI_z']:
+            bars[col] = standardized[col]
+        cache.put(result_key, {'bars': bars, 'end_state': state})
+        results[bar_size] = bars
+
+    n_evicted = cache.evict()
+    if n_evicted:
+        print(f"[{symbol}] Evicted {n_evicted} old bar cache entries")
+
+    results = {bar_size: results[bar_size] for bar_size in bar_sizes}
+    return (results, state) if return_state else results
+
+
+def to_ofi_bars(bars: pd.DataFrame) -> pd.DataFrame:
+    """compute_ofi_bars-shaped view of a cached frame.
+
+    Keeps bars with volume > 0 and the columns compute_ofi_bars returns
+    (drops tick_count and the cached z-score columns).
+    """
+    columns = [
+        'open', 'high', 'low', 'close', 'volume',
+        'OFI_buy_vol', 'OFI_sell_vol', 'OFI_tot_vol', 'OFI_raw',
+    ]
+    return bars.loc[bars['volume'] > 0, columns].copy()
+
+
+def bar_cache_from_config(config: dict) -> Optional[BarCache]:
+    """Create the BarCache described by the 'bar_cache' config section.
+
+    Returns:
+        BarCache, or None when the section is missing or disabled
+    """
+    from ..config_loader import resolve_path
+
+    cache_cfg = config.get('bar_cache') or {}
+    if not cache_cfg.get('enabled', False):
+        return None
+    return BarCache(
+        resolve_path(cache_cfg.get('dir', 'data/bar_cache')),
+        max_size_mb=cache_cfg.get('max_size_mb', 4096),
+    )
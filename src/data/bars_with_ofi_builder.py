@@ -4,11 +4,10 @@ from pathlib import Path
 import pandas as pd
 
 from .tick_loader import load_and_clean_ticks
-from .tick_to_bars import ticks_to_bars
 from ..factors.ofi import (
     add_mid_price, 
     label_tick_directions, 
-    compute_ofi_bars, 
+    compute_bars_with_ofi, 
     standardize_ofi
 )
 
@@ -39,11 +38,9 @@ def build_bars_with_ofi(
         1. Load and clean ticks
         2. Add mid price
         3. Label tick directions (tick rule)
-        4. Compute OFI bars (OFI_raw, volumes)
-        5. Standardize OFI (OFI_z)
-        6. Build bar OHLCV via ticks_to_bars
-        7. Align/join bars and OFI on bar index
-        8. Save to bars_out_path and return
+        4. Compute OHLCV + OFI bars in one resample (compute_bars_with_ofi)
+        5. Drop bars without volume and standardize OFI (OFI_z)
+        6. Save to bars_out_path and return
     """
     print(f"[{symbol}] Loading tick data from {ticks_path}...")
     ticks = load_and_clean_ticks(symbol, ticks_path)
@@ -55,20 +52,13 @@ def build_bars_with_ofi(
     print(f"[{symbol}] Labeling tick directions...")
     ticks = label_tick_directions(ticks)
     
-    print(f"[{symbol}] Computing OFI bars...")
-    ofi_bars = compute_ofi_bars(ticks, bar_size=bar_size)
-    print(f"[{symbol}] Created {len(ofi_bars):,} OFI bars")
+    print(f"[{symbol}] Computing OHLCV + OFI bars...")
+    bars = compute_bars_with_ofi(ticks, bar_size=bar_size)
+    result = bars[bars['volume'] > 0]
+    print(f"[{symbol}] Created {len(result):,} bars")
     
     print(f"[{symbol}] Standardizing OFI (window={ofi_window})...")
-    ofi_bars = standardize_ofi(ofi_bars, window=ofi_window)
-    
-    print(f"[{symbol}] Building OHLCV bars...")
-    bars = ticks_to_bars(ticks, bar_size=bar_size)
-    print(f"[{symbol}] Created {len(bars):,} OHLCV bars")
-    
-    print(f"[{symbol}] Merging bars and OFI...")
-    # Join on index (bar timestamp)
-    result = bars.join(ofi_bars, how='inner')
+    result = standardize_ofi(result, window=ofi_window)
     print(f"[{symbol}] Final dataset: {len(result):,} bars")
     
     # Save to CSV
@@ -0,0 +1,179 @@
+"""Boundary state carried between consecutive tick batches.
+
+The batch scripts split a symbol's history into date ranges (e.g. years)
+to bound memory. Processed in isolation, every batch restarts the tick rule
+with sign +1, leaves its first zscore_window - 1 bars without OFI_z and
+cuts a bar that straddles the split. BatchBoundary holds what the next
+batch needs to continue as if the history had been processed in one pass:
+
+    - the tick-rule state (last mid, last sign)
+    - per bar size, the RollingMoments state of OFI_raw (a few KB)
+    - per bar size, the bar still open at the batch end, which is held
+      back and merged into the next batch's first bar
+
+stitch_batch_bars() applies the carried bar state to a batch's bars (see
+batch_runner.run_single_batch). The state is pickled next to the batch
+CSVs, so a later batch can be (re)run without re-running the earlier ones.
+
+Author: OFI Research Project
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import pandas as pd
+
+from ..factors.ofi import standardize_ofi
+from ..factors.rolling_stats import RollingMoments
+
+
+@dataclass
+class BatchBoundary:
+    """State at the end of a batch, consumed by the next batch.
+
+    Attributes:
+        prev_mid: Mid price of the last tick (None = no ticks yet)
+        prev_sign: Tick-rule sign of the last tick
+        moments: bar_size -> RollingMoments.state_bytes() of OFI_raw
+        open_bars: bar_size -> one-row frame of the bar open at the batch end
+    """
+    prev_mid: Optional[float] = None
+    prev_sign: int = 1
+    moments: Dict[str, bytes] = field(default_factory=dict)
+    open_bars: Dict[str, pd.DataFrame] = field(default_factory=dict)
+
+    @property
+    def tick_state(self) -> Tuple[Optional[float], int]:
+        """(prev_mid, prev_sign) for label_tick_directions."""
+        return self.prev_mid, self.prev_sign
+
+    def rolling_moments(self, bar_size: str, window: int) -> RollingMoments:
+        """OFI_raw rolling state of a bar size (fresh if none is carried)."""
+        blob = self.moments.get(bar_size)
+        if blob is None:
+            return RollingMoments([window])
+        return RollingMoments.from_state_bytes(blob)
+
+    def save(self, path: Path) -> None:
+        """Pickle the state to path."""
+        pd.to_pickle(self, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['BatchBoundary']:
+        """State saved with save(), or None if path does not exist."""
+        path = Path(path)
+        if not path.exists():
+            return None
+        return pd.read_pickle(path)
+
+
+def batch_boundary_path(results_dir: Path, symbol: str, batch_name: str) -> Path:
+    """Path of the boundary state written after a batch."""
+    return Path(results_dir) / f"{symbol}_{batch_name}_boundary.pkl"
+
+
+def merge_open_bar(bars: pd.DataFrame, open_bar: Optional[pd.DataFrame], eps: float = 1e-8) -> pd.DataFrame:
+    """Prepend a bar carried over from the previous batch.
+
+    Args:
+        bars: compute_ofi_bars-shaped frame of this batch
+        open_bar: One-row frame held back by the previous batch (or None)
+        eps: Constant used in OFI_raw (as in compute_ofi_bars)
+
+    Returns:
+        bars with open_bar merged into its first bar when both share a
+        timestamp (open/high/low/close combined, volumes summed, OFI_raw
+        recomputed), or prepended otherwise
+    """
+    if open_bar is None or len(open_bar) == 0:
+        return bars
+    if len(bars) == 0 or bars.index[0] != open_bar.index[0]:
+        return pd.concat([open_bar, bars])
+
+    first = bars.iloc[0].copy()
+    carried = open_bar.iloc[0]
+    first['open'] = carried['open']
+    first['high'] = max(first['high'], carried['high'])
+    first['low'] = min(first['low'], carried['low'])
+    for col in ['volume', 'OFI_buy_vol', 'OFI_sell_vol', 'OFI_tot_vol']:
+        first[col] = carried[col] + first[col]
+    first['OFI_raw'] = (first['OFI_buy_vol'] - first['OFI_sell_vol']) / (first['OFI_tot_vol'] + eps)
+
+    bars = bars.copy()
+    bars.iloc[0] = first
+    return bars
+
+
+def hold_open_bar(
+    bars: pd.DataFrame,
+    bar_size: str,
+    end_date: str,
+) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Split off the last bar if it extends past the batch end.
+
+    Args:
+        bars: Bars of a batch, indexed by bar start
+        bar_size: Pandas frequency string of the bars
+        end_date: Last date of the batch (inclusive, YYYY-MM-DD)
+
+    Returns:
+        (complete bars, open bar or None)
+    """
+    if len(bars) == 0:
+        return bars, None
+
+    batch_end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+    tz = getattr(bars.index, 'tz', None)
+    if tz is not None:
+        batch_end = batch_end.tz_localize(tz)
+
+    if bars.index[-1] + pd.Timedelta(bar_size) <= batch_end:
+        return bars, None
+    return bars.iloc[:-1], bars.iloc[-1:].copy()
+
+
+def stitch_batch_bars(
+    bars_by_size: Dict[str, pd.DataFrame],
+    boundary: Optional[BatchBoundary],
+    tick_state: Tuple[Optional[float], int],
+    end_date: Optional[str] = None,
+    window: int = 200,
+) -> Tuple[Dict[str, pd.DataFrame], BatchBoundary]:
+    """Continue OFI bars of a batch from the previous batch's boundary.
+
+    Args:
+        bars_by_size: compute_ofi_bars-shaped frames of this batch per bar size
+        boundary: State returned for the previous batch (None = first batch)
+        tick_state: (last mid, last sign) at the end of this batch's ticks
+        end_date: Last date of the batch; None for the final batch, whose
+            last bar is kept instead of held back
+        window: Rolling window for OFI_z
+
+    Returns:
+        Tuple of (standardized bars per bar size, boundary for the next batch)
+
+    Notes:
+        Bar sizes missing from bars_by_size pass their carried state on
+        unchanged.
+    """
+    boundary = boundary or BatchBoundary()
+    next_boundary = BatchBoundary(prev_mid=tick_state[0], prev_sign=tick_state[1])
+
+    stitched = {}
+    for bar_size, bars in bars_by_size.items():
+        bars = merge_open_bar(bars, boundary.open_bars.get(bar_size))
+        if end_date is not None:
+            bars, open_bar = hold_open_bar(bars, bar_size, end_date)
+            if open_bar is not None:
+                next_boundary.open_bars[bar_size] = open_bar
+
+        moments = boundary.rolling_moments(bar_size, window)
+        stitched[bar_size] = standardize_ofi(bars, window=window, moments=moments)
+        next_boundary.moments[bar_size] = moments.state_bytes()
+
+    for bar_size in set(boundary.moments) - set(bars_by_size):
+        next_boundary.moments[bar_size] = boundary.moments[bar_size]
+        if bar_size in boundary.open_bars:
+            next_boundary.open_bars[bar_size] = boundary.open_bars[bar_size]
+
+    return stitched, next_boundary
@@ -0,0 +1,232 @@
+"""Batch-by-batch build of bars_with_ofi files for the run_* batch scripts.
+
+A symbol's history is split into date ranges (batches) to bound memory.
+run_single_batch() loads and labels one batch's ticks once, builds every
+bar size from them, continues the previous batch through BatchBoundary
+(see batch_boundary) and writes one CSV per bar size.
+merge_batches() concatenates a bar size's batch CSVs and recomputes OFI_z
+and the future returns over the whole series, so the merged file does not
+depend on every batch having been stitched (batches written by older code,
+a missing boundary file or a failed batch all restart OFI_z).
+
+Author: OFI Research Project
+"""
+
+import time
+import traceback
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import pandas as pd
+
+from .bar_cache import BarCache, build_bars_cached, to_ofi_bars
+from .batch_boundary import BatchBoundary, batch_boundary_path, stitch_batch_bars
+from .parquet_tick_loader import load_partitioned_parquet_ticks
+from ..factors.ofi import add_mid_price, label_tick_directions, compute_ofi_bars_multi, standardize_ofi
+from ..research.ofi_single_factor import add_future_returns
+
+
+def batch_file_name(symbol: str, bar_size: str, batch_name: str) -> str:
+    """File name of a batch's bars_with_ofi CSV."""
+    return f"{symbol}_{bar_size}_{batch_name}_bars_with_ofi.csv"
+
+
+def run_single_batch(
+    symbol: str,
+    start_date: str,
+    end_date: str,
+    bar_sizes: List[str],
+    ticks_dir: Path,
+    results_dir: Path,
+    batch_name: str,
+    cache: Optional[BarCache] = None,
+    boundary: Optional[BatchBoundary] = None,
+    final: bool = True,
+    window: int = 200,
+    horizons: Sequence[int] = (2, 5, 10),
+) -> Tuple[List[dict], BatchBoundary]:
+    """Build and save the bars of one batch for every bar size.
+
+    Args:
+        symbol: Trading symbol
+        start_date: First date of the batch (YYYY-MM-DD)
+        end_date: Last date of the batch (inclusive, YYYY-MM-DD)
+        bar_sizes: Bar sizes to build (each must divide a day evenly)
+        ticks_dir: Base directory containing partitioned data
+        results_dir: Directory for the batch CSVs and boundary files
+        batch_name: Batch label used in file names (e.g. '2019-2021')
+        cache: Optional BarCache; unchanged days are read from it
+        boundary: State returned for the previous batch (None = first batch)
+        final: Whether this is the last batch (its last bar is kept instead
+            of held back for the next batch)
+        window: Rolling window for OFI_z
+        horizons: Forward periods of the fut_ret columns
+
+    Returns:
+        Tuple of (one summary dict per saved bar size, boundary for the next
+        batch). A batch without ticks passes the incoming boundary on; a
+        batch that fails to load returns a fresh boundary (and saves it), so
+        the next batch does not continue across the missing data.
+    """
+    print(f"\n{'='*80}")
+    print(f"[{symbol}] Batch {batch_name}: {start_date} to {end_date}")
+    print(f"{'='*80}")
+
+    batch_results = []
+    boundary = boundary or BatchBoundary()
+
+    try:
+        if cache is not None:
+            cached, tick_state = build_bars_cached(
+                symbol, ticks_dir, bar_sizes, cache,
+                start_date=start_date, end_date=end_date,
+                tick_state=boundary.tick_state, return_state=True
+            )
+            bars_by_size = {b: to_ofi_bars(bars) for b, bars in cached.items()}
+            n_ticks = int(cached[bar_sizes[0]]['tick_count'].sum())
+        else:
+            start_time = time.time()
+            ticks = load_partitioned_parquet_ticks(
+                symbol=symbol,
+                ticks_dir=ticks_dir,
+                start_date=start_date,
+                end_date=end_date
+            )
+            print(f"[{symbol}] Loaded {len(ticks):,} ticks ({time.time() - start_time:.1f}s)")
+            if len(ticks) == 0:
+                print(f"[{symbol}] Warning: No ticks in batch {batch_name}, skipping")
+                return batch_results, boundary
+
+            ticks = add_mid_price(ticks)
+            ticks = label_tick_directions(ticks, prev_mid=boundary.prev_mid, prev_sign=boundary.prev_sign)
+            tick_state = (float(ticks['mid'].iloc[-1]), int(ticks['sign'].iloc[-1]))
+            bars_by_size = compute_ofi_bars_multi(ticks, bar_sizes)
+            n_ticks = len(ticks)
+            del ticks
+    except Exception as e:
+        print(f"[{symbol}] Error in batch {batch_name}: {e}")
+        traceback.print_exc()
+        # Do not stitch the next batch onto state from before the missing
+        # data; overwrite any older boundary file so reruns don't load it
+        print(f"[{symbol}] Warning: Continuity broken at batch {batch_name}; "
+              f"tick rule, OFI_z window and open bars restart with the next batch")
+        fresh = BatchBoundary()
+        fresh.save(batch_boundary_path(results_dir, symbol, batch_name))
+        return batch_results, fresh
+
+    bars_by_size, next_boundary = stitch_batch_bars(
+        bars_by_size, boundary, tick_state,
+        end_date=None if final else end_date, window=window
+    )
+    next_boundary.save(batch_boundary_path(results_dir, symbol, batch_name))
+
+    for bar_size in bar_sizes:
+        try:
+            ofi_bars = add_future_returns(bars_by_size.pop(bar_size), horizons=list(horizons))
+            batch_file = Path(results_dir) / batch_file_name(symbol, bar_size, batch_name)
+            ofi_bars.to_csv(batch_file)
+            print(f"[{symbol}] {bar_size}: saved {len(ofi_bars):,} bars to {batch_file.name}")
+
+            batch_results.append({
+                'symbol': symbol,
+                'bar_size': bar_size,
+                'batch': batch_name,
+                'start_date': start_date,
+                'end_date': end_date,
+                'n_ticks': n_ticks,
+                'n_bars': len(ofi_bars),
+                'file': batch_file.name
+            })
+        except Exception as e:
+            print(f"[{symbol}] Error saving {bar_size} of batch {batch_name}: {e}")
+            traceback.print_exc()
+
+    return batch_results, next_boundary
+
+
+def run_batches(
+    symbol: str,
+    batches: Sequence[Tuple[str, str, str]],
+    bar_sizes: List[str],
+    ticks_dir: Path,
+    results_dir: Path,
+    cache: Optional[BarCache] = None,
+    boundary: Optional[BatchBoundary] = None,
+    window: int = 200,
+    horizons: Sequence[int] = (2, 5, 10),
+) -> Tuple[List[dict], BatchBoundary]:
+    """Run consecutive batches, each continuing from the previous one.
+
+    Args:
+        symbol: Trading symbol
+        batches: (batch_name, start_date, end_date) in date order
+        bar_sizes: Bar sizes to build
+        ticks_dir: Base directory containing partitioned data
+        results_dir: Directory for the batch CSVs and boundary files
+        cache: Optional BarCache
+        boundary: State to continue from (e.g. BatchBoundary.load() of an
+            earlier run's last batch; None = start fresh)
+        window: Rolling window for OFI_z
+        horizons: Forward periods of the fut_ret columns
+
+    Returns:
+        Tuple of (summary dicts of all batches, boundary after the last batch)
+    """
+    all_results = []
+    for i, (batch_name, start_date, end_date) in enumerate(batches):
+        results, boundary = run_single_batch(
+            symbol, start_date, end_date, bar_sizes, ticks_dir, results_dir, batch_name,
+            cache=cache, boundary=boundary, final=(i == len(batches) - 1),
+            window=window, horizons=horizons
+        )
+        all_results.extend(results)
+    return all_results, boundary or BatchBoundary()
+
+
+def merge_batches(
+    symbol: str,
+    bar_size: str,
+    batch_files: List[str],
+    results_dir: Path,
+    window: int = 200,
+    horizons: Sequence[int] = (2, 5, 10),
+) -> Optional[pd.DataFrame]:
+    """Merge a bar size's batch CSVs into {symbol}_{bar_size}_merged_bars_with_ofi.csv.
+
+    Args:
+        symbol: Trading symbol
+        bar_size: Bar size of the files
+        batch_files: Batch CSV names in results_dir (missing files are skipped)
+        results_dir: Directory of the batch CSVs and the merged file
+        window: Rolling window for OFI_z
+        horizons: Forward periods of the fut_ret columns
+
+    Returns:
+        The merged frame, or None if none of the files exist
+
+    Notes:
+        OFI_z is recomputed over the merged series: batches written by
+        older code, batches after a missing boundary file and batches after
+        a failed batch all restart the rolling window at their first bar.
+        The future returns need the next batch's closes.
+    """
+    results_dir = Path(results_dir)
+    all_data = []
+    for batch_file in batch_files:
+        file_path = results_dir / batch_file
+        if file_path.exists():
+            df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+            all_data.append(df)
+            print(f"[{symbol}] Loaded {batch_file} ({len(df):,} bars)")
+
+    if not all_data:
+        print(f"[{symbol}] Warning: No batch files found for {bar_size}")
+        return None
+
+    merged = pd.concat(all_data, axis=0).sort_index()
+    merged = standardize_ofi(merged, window=window)
+    merged = add_future_returns(merged, horizons=list(horizons))
+
+    merged_file = results_dir / f"{symbol}_{bar_size}_merged_bars_with_ofi.csv"
+    merged.to_csv(merged_file)
+    print(f"[{symbol}] Saved {merged_file.name} ({len(merged):,} bars)")
+    return merged
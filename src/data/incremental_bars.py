@@ -0,0 +1,237 @@
+"""Incremental daily append for merged bars_with_ofi files.
+
+The yearly batch scripts build results/{symbol}_{tf}_merged_bars_with_ofi.csv
+from the full tick history. When new date=YYYY-MM-DD partitions land, this
+module processes only those partitions and appends their bars:
+
+    - only the tail of each merged CSV is read (the rows the OFI_z window and
+      the future-return horizons reach back to)
+    - the tick-rule state is recovered from the last processed partition
+    - OFI_mean/OFI_std/OFI_z are computed for the new rows only, with the
+      rolling state seeded from the tail's OFI_raw
+    - fut_ret_H is patched for the last H existing rows
+    - the file is truncated where the patched rows start and the rewritten
+      rows plus the new bars are appended, leaving the rest untouched; the
+      rows are rendered and journaled to a sibling file first, so an
+      interrupted update is completed on the next run instead of losing
+      the truncated rows
+
+Author: OFI Research Project
+"""
+
+import io
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .parquet_tick_loader import _list_date_partitions, _read_files, _prepare_ticks
+from ..factors.ofi import add_mid_price, label_tick_directions, compute_ofi_bars_multi, standardize_ofi
+from ..factors.rolling_stats import RollingMoments
+from ..research.ofi_single_factor import add_future_returns
+
+
+def merged_bars_path(results_dir: Path, symbol: str, bar_size: str) -> Path:
+    """Path of the merged bars_with_ofi CSV for a symbol and timeframe."""
+    return Path(results_dir) / f"{symbol}_{bar_size}_merged_bars_with_ofi.csv"
+
+
+def read_csv_tail(path: Path, n_rows: int, block_size: int = 1 << 20) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Parse the last n_rows data rows of a CSV without reading the whole file.
+
+    Args:
+        path: CSV written by DataFrame.to_csv (header line + one row per line)
+        n_rows: Number of trailing rows to parse
+        block_size: Bytes read per backwards seek
+
+    Returns:
+        Tuple of (frame, offsets) where offsets[i] is the byte offset at
+        which row i of the frame starts in the file
+    """
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        end = f.seek(0, os.SEEK_END)
+
+        # Read backwards until the buffer holds n_rows complete lines
+        pos = end
+        buf = b''
+        while pos > data_start and buf.count(b'\n') <= n_rows:
+            step = min(block_size, pos - data_start)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+
+    lines = buf.splitlines(keepends=True)
+    if pos > data_start:
+        # First line in the buffer may be cut in the middle
+        lines = lines[1:]
+    lines = lines[len(lines) - n_rows:] if n_rows < len(lines) else lines
+
+    tail_bytes = b''.join(lines)
+    lengths = np.array([len(line) for line in lines], dtype=np.int64)
+    offsets = end - len(tail_bytes) + np.cumsum(lengths) - lengths
+
+    frame = pd.read_csv(
+        io.BytesIO(header + tail_bytes),
+        index_col=0,
+        parse_dates=True,
+        float_precision='round_trip',
+    )
+    return frame, offsets
+
+
+def _journal_path(path: Path) -> Path:
+    """Sibling file holding a tail rewrite until it is applied."""
+    return path.with_name(path.name + '.pending')
+
+
+def _apply_pending_rewrite(path: Path) -> bool:
+    """Finish a tail rewrite journaled next to path, if there is one.
+
+    The journal holds the byte offset to truncate at (first line) and the
+    rows to write from there. Applying it twice gives the same file.
+
+    Returns:
+        True if a pending rewrite was applied
+    """
+    journal = _journal_path(path)
+    if not journal.exists():
+        return False
+    with open(journal, 'rb') as f:
+        offset = int(f.readline())
+        data = f.read()
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        f.write(data)
+        f.truncate()
+        f.flush()
+        os.fsync(f.fileno())
+    journal.unlink()
+    return True
+
+
+def _rewrite_tail(path: Path, offset: int, rows: pd.DataFrame) -> None:
+    """Replace everything from byte offset on with rows (CSV, no header).
+
+    The rows are rendered and journaled before the file is touched, so an
+    error while formatting leaves the file as it was and an interruption
+    while writing is completed by _apply_pending_rewrite().
+    """
+    data = rows.to_csv(header=False).encode()
+    journal = _journal_path(path)
+    tmp_path = journal.with_name(journal.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(f"{offset}\n".encode() + data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, journal)
+    _apply_pending_rewrite(path)
+
+
+def _recover_tick_state(symbol: str, date_dir: Path) -> Tuple[Optional[float], int]:
+    """Last (mid, sign) of a processed partition, to continue the tick rule."""
+    ticks = _prepare_ticks(symbol, _read_files(symbol, [date_dir]))
+    if len(ticks) == 0:
+        return None, 1
+    ticks = label_tick_directions(add_mid_price(ticks))
+    return float(ticks['mid'].iloc[-1]), int(ticks['sign'].iloc[-1])
+
+
+def append_new_partitions(
+    symbol: str,
+    ticks_dir: Path,
+    results_dir: Path,
+    bar_sizes: List[str],
+    zscore_window: int = 200,
+    horizons: Optional[List[int]] = None,
+) -> Dict[str, int]:
+    """Append bars from tick partitions newer than the merged files.
+
+    Args:
+        symbol: Trading symbol
+        ticks_dir: Base directory containing partitioned data
+        results_dir: Directory holding the merged bars_with_ofi CSVs
+        bar_sizes: Timeframes to update (missing merged files are skipped)
+        zscore_window: Rolling window used for OFI_z
+        horizons: Future-return horizons present in the merged files
+            (None = [2, 5, 10])
+
+    Returns:
+        Dict mapping bar_size to the number of bars appended
+
+    Notes:
+        - Partitions are assumed complete: a date partition newer than the
+          last bar of a file is processed as a whole day.
+        - Existing rows keep their values except fut_ret_H, which is patched
+          for the last H rows now that later closes are known.
+    """
+    ticks_dir = Path(ticks_dir)
+    horizons = [2, 5, 10] if horizons is None else list(horizons)
+    max_h = max(horizons)
+    n_tail = max(zscore_window - 1, max_h)
+
+    tails = {}
+    for bar_size in bar_sizes:
+        path = merged_bars_path(results_dir, symbol, bar_size)
+        if not path.exists():
+            print(f"[{symbol}] {path.name} not found, run the batch build first")
+            continue
+        if _apply_pending_rewrite(path):
+            print(f"[{symbol}] Completed an interrupted update of {path.name}")
+        tail, offsets = read_csv_tail(path, n_tail)
+        if len(tail) == 0:
+            print(f"[{symbol}] {path.name} is empty, run the batch build first")
+            continue
+        tails[bar_size] = (path, tail, offsets)
+
+    if not tails:
+        return {}
+
+    # Resume from the timeframe that is furthest behind
+    last_date = min(tail.index[-1].strftime('%Y-%m-%d') for _, tail, _ in tails.values())
+    date_dirs = _list_date_partitions(symbol, ticks_dir)
+    done_dirs = [d for d in date_dirs if d.name.replace("date=", "") <= last_date]
+    new_dirs = [d for d in date_dirs if d.name.replace("date=", "") > last_date]
+
+    if not new_dirs:
+        print(f"[{symbol}] Up to date (last partition {last_date})")
+        return {bar_size: 0 for bar_size in tails}
+
+    print(f"[{symbol}] Processing {len(new_dirs)} new partitions after {last_date}...")
+    prev_mid, prev_sign = _recover_tick_state(symbol, done_dirs[-1]) if done_dirs else (None, 1)
+
+    ticks = _prepare_ticks(symbol, _read_files(symbol, new_dirs))
+    ticks = add_mid_price(ticks)
+    ticks = label_tick_directions(ticks, prev_mid=prev_mid, prev_sign=prev_sign)
+    bars_by_size = compute_ofi_bars_multi(ticks, list(tails))
+    del ticks
+
+    appended = {}
+    for bar_size, (path, tail, offsets) in tails.items():
+        new_bars = bars_by_size[bar_size]
+        new_bars = new_bars[new_bars.index > tail.index[-1]]
+        if len(new_bars) == 0:
+            appended[bar_size] = 0
+            continue
+
+        # Rolling stats for the new rows, continuing from the tail's OFI_raw
+        moments = RollingMoments.from_history([zscore_window], tail['OFI_raw'])
+        new_bars = standardize_ofi(new_bars, window=zscore_window, moments=moments)
+        combined = add_future_returns(pd.concat([tail[list(new_bars.columns)], new_bars]), horizons=horizons)
+
+        # Existing rows whose future returns now see new closes
+        n_patch = min(max_h, len(tail))
+        patched = tail.iloc[len(tail) - n_patch:].copy()
+        fut_cols = [col for col in patched.columns if col.startswith('fut_ret_') and col in combined.columns]
+        patched[fut_cols] = combined.loc[patched.index, fut_cols]
+
+        rewrite = pd.concat([patched, combined.iloc[len(tail):].reindex(columns=tail.columns)])
+
+        _rewrite_tail(path, int(offsets[len(tail) - n_patch]), rewrite)
+
+        appended[bar_size] = len(new_bars)
+        print(f"[{symbol}] {bar_size}: appended {len(new_bars)} bars (through {new_bars.index[-1]})")
+
+    return appended
@@ -3,39 +3,35 @@
 This module handles loading tick data from a partitioned directory structure:
     data/ticks/symbol=XXX/date=YYYY-MM-DD/*.parquet
 
+Three readers are available:
+    - "files": read every Parquet file with pandas and concatenate (default)
+    - "threads": same per-file reads decoded concurrently by a bounded
+      thread pool (pyarrow releases the GIL while decoding)
+    - "dataset": a single partition-aware pyarrow dataset scan that pushes the
+      date range and column projection down to the reader
+
 Author: OFI Research Project
 """
 
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, List, Optional
+import numpy as np
 import pandas as pd
 
+# Raw columns needed to build the tick frame (everything else is skipped)
+TICK_COLUMNS = ['ts', 'bid', 'ask', 'bid_size', 'ask_size']
 
-def load_partitioned_parquet_ticks(
+
+def _list_date_partitions(
     symbol: str,
     ticks_dir: Path,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-) -> pd.DataFrame:
-    """Load tick data from partitioned Parquet files.
-    
-    Args:
-        symbol: Trading symbol (e.g., 'BTCUSD')
-        ticks_dir: Base directory containing partitioned data
-        start_date: Optional start date filter (YYYY-MM-DD)
-        end_date: Optional end date filter (YYYY-MM-DD)
-    
-    Returns:
-        DataFrame with columns: timestamp, bid, ask, volume
-        - timestamp: datetime64[ns, UTC]
-        - bid: float
-        - ask: float
-        - volume: float (derived from bid_size + ask_size)
-    
-    Raises:
-        FileNotFoundError: If no data found for symbol
-        ValueError: If data format is invalid
-    """
+) -> List[Path]:
+    """Return the sorted date=YYYY-MM-DD directories within the date range."""
     symbol_dir = ticks_dir / f"symbol={symbol}"
     
     if not symbol_dir.exists():
@@ -62,10 +58,11 @@ def load_partitioned_parquet_ticks(
     if not date_dirs:
         raise FileNotFoundError(f"No data found for {symbol} in date range {start_date} to {end_date}")
     
-    print(f"[{symbol}] Found {len(date_dirs)} date partitions")
-    print(f"[{symbol}] Date range: {date_dirs[0].name.replace('date=', '')} to {date_dirs[-1].name.replace('date=', '')}")
-    
-    # Load all parquet files
+    return date_dirs
+
+
+def _read_files(symbol: str, date_dirs: List[Path]) -> pd.DataFrame:
+    """Read every Parquet file in date_dirs with pandas and concatenate."""
     dfs = []
     for date_dir in date_dirs:
         parquet_files = list(date_dir.glob("*.parquet"))
@@ -84,6 +81,107 @@ def load_partitioned_parquet_ticks(
     df = pd.concat(dfs, ignore_index=True)
     print(f"[{symbol}] Loaded {len(df):,} ticks from {len(dfs)} files")
     
+    return df
+
+
+def _read_files_parallel(
+    symbol: str,
+    date_dirs: List[Path],
+    max_workers: Optional[int] = None,
+    max_inflight_mb: float = 1024.0,
+) -> pd.DataFrame:
+    """Read the same files as _read_files with a bounded thread pool.
+    
+    Files are submitted in partition order and collected in that same order,
+    so the concatenated frame matches the sequential reader exactly. A new
+    file is only submitted while the on-disk size of files still being
+    decoded stays under max_inflight_mb (at least one file is always in
+    flight). Broken files are reported and skipped as in _read_files.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_inflight_bytes = max_inflight_mb * 1024 * 1024
+    
+    parquet_files = [pq_file for date_dir in date_dirs for pq_file in date_dir.glob("*.parquet")]
+    
+    dfs = []
+    pending = deque()
+    inflight_bytes = 0
+    
+    def collect_oldest():
+        nonlocal inflight_bytes
+        pq_file, future, size = pending.popleft()
+        inflight_bytes -= size
+        try:
+            dfs.append(future.result())
+        except Exception as e:
+            print(f"[{symbol}] Warning: Failed to load {pq_file}: {e}")
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for pq_file in parquet_files:
+            size = pq_file.stat().st_size
+            while pending and (len(pending) >= max_workers or inflight_bytes + size > max_inflight_bytes):
+                collect_oldest()
+            pending.append((pq_file, executor.submit(pd.read_parquet, pq_file), size))
+            inflight_bytes += size
+        while pending:
+            collect_oldest()
+    
+    if not dfs:
+        raise ValueError(f"No valid parquet files found for {symbol}")
+    
+    # Concatenate all data
+    df = pd.concat(dfs, ignore_index=True)
+    print(f"[{symbol}] Loaded {len(df):,} ticks from {len(dfs)} files ({max_workers} workers)")
+    
+    return df
+
+
+def _read_dataset(
+    symbol: str,
+    symbol_dir: Path,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+) -> pd.DataFrame:
+    """Scan the symbol directory as one hive-partitioned pyarrow dataset.
+    
+    The date range becomes a partition filter and only TICK_COLUMNS are read,
+    so untouched partitions and unused columns are never decoded. The scan
+    produces a single Arrow table that is converted to pandas once.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("reader='dataset' requires pyarrow (pip install pyarrow)") from e
+    
+    partitioning = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+    dataset = ds.dataset(str(symbol_dir), format='parquet', partitioning=partitioning)
+    
+    # Partition pruning on the date= directories
+    date_filter = None
+    if start_date:
+        date_filter = ds.field('date') >= start_date
+    if end_date:
+        end_filter = ds.field('date') <= end_date
+        date_filter = end_filter if date_filter is None else date_filter & end_filter
+    
+    # Column projection (bid_size/ask_size are optional)
+    columns = [col for col in TICK_COLUMNS if col in dataset.schema.names]
+    
+    table = dataset.to_table(columns=columns, filter=date_filter)
+    
+    if table.num_rows == 0:
+        raise ValueError(f"No valid parquet files found for {symbol}")
+    
+    df = table.to_pandas()
+    print(f"[{symbol}] Loaded {len(df):,} ticks via dataset scan")
+    
+    return df
+
+
+def _prepare_ticks(symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+    """Turn raw Parquet columns into the cleaned tick frame."""
     # Validate required columns
     required_cols = ['ts', 'bid', 'ask']
     missing_cols = [col for col in required_cols if col not in df.columns]
@@ -130,12 +228,178 @@ def load_partitioned_parquet_ticks(
     # Set timestamp as index (required for resample operations)
     df = df.set_index('timestamp')
 
+    return df
+
+
+def _infer_tick_size(prices: np.ndarray, sample: int = 1_000_000) -> float:
+    """Smallest positive gap between distinct prices in a sample."""
+    gaps = np.diff(np.unique(prices[:sample]))
+    gaps = gaps[gaps > 0]
+    return float(gaps.min()) if len(gaps) else np.inf
+
+
+def compact_ticks(
+    symbol: str,
+    df: pd.DataFrame,
+    tick_size: Optional[float] = None,
+) -> pd.DataFrame:
+    """Convert a cleaned tick frame to the compact tick schema.
+    
+    - bid/ask become float32 when the float32 round-trip error stays below
+      a quarter of the symbol's tick size (so prices snap back to the tick
+      grid); otherwise they stay float64 with a warning
+    - volume becomes float32 when every value round-trips exactly
+    - the UTC DatetimeIndex becomes an int64 epoch-nanosecond index named
+      'timestamp' (the OFI bar kernels accept both)
+    
+    Args:
+        symbol: Trading symbol (for logging)
+        df: Frame from load_partitioned_parquet_ticks (UTC DatetimeIndex)
+        tick_size: Minimum price increment; inferred from the data if None
+    
+    Returns:
+        Compact tick frame with columns: bid, ask, volume
+    """
+    prices = df[['bid', 'ask']].to_numpy()
+    if tick_size is None:
+        tick_size = _infer_tick_size(prices[:, 0])
+    
+    price_err = np.abs(prices.astype(np.float32).astype(np.float64) - prices).max(initial=0.0)
+    if price_err < tick_size / 4:
+        price_dtype = np.float32
+    else:
+        price_dtype = np.float64
+        print(f"[{symbol}] Warning: float32 error {price_err:.3g} too large for tick size {tick_size:.3g}, keeping float64 prices")
+    
+    volume = df['volume'].to_numpy()
+    volume_dtype = np.float32 if np.array_equal(volume.astype(np.float32), volume) else np.float64
+    
+    timestamps = df.index.tz_convert('UTC').as_unit('ns').asi8
+    
+    return pd.DataFrame({
+        'bid': prices[:, 0].astype(price_dtype),
+        'ask': prices[:, 1].astype(price_dtype),
+        'volume': volume.astype(volume_dtype, copy=False),
+    }, index=pd.Index(timestamps, name='timestamp'))
+
+
+def load_partitioned_parquet_ticks(
+    symbol: str,
+    ticks_dir: Path,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    reader: str = "files",
+    max_workers: Optional[int] = None,
+    max_inflight_mb: float = 1024.0,
+    compact: bool = False,
+    tick_size: Optional[float] = None,
+) -> pd.DataFrame:
+    """Load tick data from partitioned Parquet files.
+    
+    Args:
+        symbol: Trading symbol (e.g., 'BTCUSD')
+        ticks_dir: Base directory containing partitioned data
+        start_date: Optional start date filter (YYYY-MM-DD)
+        end_date: Optional end date filter (YYYY-MM-DD)
+        reader: "files" (pandas per-file reads, all columns), "threads"
+            (the same reads on a bounded thread pool) or "dataset" (pyarrow
+            dataset scan with date filter and column projection pushed down;
+            memory scales with the requested slice)
+        max_workers: Thread count for reader="threads" (default: CPU count)
+        max_inflight_mb: On-disk MB of files decoding at once for
+            reader="threads"
+        compact: Return the compact tick schema (see compact_ticks):
+            float32 prices/volume where precision allows, int64 UTC ns index
+        tick_size: Price increment for the compact precision check
+            (inferred from the data if None)
+    
+    Returns:
+        DataFrame with columns: timestamp, bid, ask, volume
+        - timestamp: datetime64[ns, UTC]
+        - bid: float
+        - ask: float
+        - volume: float (derived from bid_size + ask_size)
+    
+    Raises:
+        FileNotFoundError: If no data found for symbol
+        ValueError: If data format is invalid or reader is unknown
+    """
+    if reader not in ("files", "threads", "dataset"):
+        raise ValueError(f"Unknown reader: {reader}. Must be 'files', 'threads' or 'dataset'.")
+    
+    ticks_dir = Path(ticks_dir)
+    date_dirs = _list_date_partitions(symbol, ticks_dir, start_date, end_date)
+    
+    print(f"[{symbol}] Found {len(date_dirs)} date partitions")
+    print(f"[{symbol}] Date range: {date_dirs[0].name.replace('date=', '')} to {date_dirs[-1].name.replace('date=', '')}")
+    
+    if reader == "dataset":
+        df = _read_dataset(symbol, ticks_dir / f"symbol={symbol}", start_date, end_date)
+    elif reader == "threads":
+        df = _read_files_parallel(symbol, date_dirs, max_workers, max_inflight_mb)
+    else:
+        df = _read_files(symbol, date_dirs)
+    
+    df = _prepare_ticks(symbol, df)
+
     print(f"[{symbol}] Final dataset: {len(df):,} ticks")
     print(f"[{symbol}] Time range: {df.index.min()} to {df.index.max()}")
 
+    if compact:
+        df = compact_ticks(symbol, df, tick_size=tick_size)
+
     return df
 
 
+def iter_partitioned_parquet_ticks(
+    symbol: str,
+    ticks_dir: Path,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    chunk_days: int = 1,
+    compact: bool = False,
+    tick_size: Optional[float] = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield time-ordered tick chunks, chunk_days date partitions at a time.
+    
+    Each chunk is cleaned exactly like load_partitioned_parquet_ticks, so
+    concatenating all chunks reproduces the in-memory loader as long as
+    every tick lives in the partition of its own date. Only one chunk is
+    held in memory at a time.
+    
+    Args:
+        symbol: Trading symbol (e.g., 'BTCUSD')
+        ticks_dir: Base directory containing partitioned data
+        start_date: Optional start date filter (YYYY-MM-DD)
+        end_date: Optional end date filter (YYYY-MM-DD)
+        chunk_days: Number of date partitions per yielded chunk
+        compact: Yield the compact tick schema (see compact_ticks)
+        tick_size: Price increment for the compact precision check
+    
+    Yields:
+        DataFrame indexed by UTC timestamp with columns: bid, ask, volume
+    
+    Raises:
+        FileNotFoundError: If no data found for symbol
+    """
+    ticks_dir = Path(ticks_dir)
+    date_dirs = _list_date_partitions(symbol, ticks_dir, start_date, end_date)
+    
+    print(f"[{symbol}] Streaming {len(date_dirs)} date partitions in chunks of {chunk_days}")
+    
+    for i in range(0, len(date_dirs), chunk_days):
+        chunk_dirs = date_dirs[i:i + chunk_days]
+        try:
+            df = _read_files(symbol, chunk_dirs)
+        except ValueError as e:
+            print(f"[{symbol}] Warning: Skipping {chunk_dirs[0].name}..{chunk_dirs[-1].name}: {e}")
+            continue
+        
+        df = _prepare_ticks(symbol, df)
+        if len(df) > 0:
+            yield compact_ticks(symbol, df, tick_size=tick_size) if compact else df
+
+
 def convert_to_csv_format(df: pd.DataFrame, output_path: Path) -> None:
     """Convert loaded parquet data to CSV format expected by existing code.
     
@@ -0,0 +1,153 @@
+"""Vectorized bar indicators shared by the trading and research modules.
+
+True Range, ATR (rolling mean or EMA), moving averages, the rolling True
+Range std and regime labels. Every indicator is a handful of whole-column
+NumPy/pandas operations (no per-row Python), so tagging multi-year 5min
+bars takes milliseconds.
+
+Regime labels are pandas Categoricals: one small integer code per bar
+instead of a string object, with the label order fixed by the categories.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def true_range(bars: pd.DataFrame, skipna: bool = True) -> pd.Series:
+    """True Range of OHLC bars.
+
+    Args:
+        bars: Bars with 'high', 'low', 'close' columns
+        skipna: If True, missing terms are skipped, so a bar missing only
+            its high or low still gets a TR from the other terms. If False,
+            a bar missing high or low gets NaN. Either way a missing
+            previous close falls back to high - low (as on the first bar)
+
+    Returns:
+        max(high - low, |high - prev close|, |low - prev close|) aligned with
+        bars
+    """
+    high = bars['high'].to_numpy(dtype=np.float64)
+    low = bars['low'].to_numpy(dtype=np.float64)
+    close = bars['close'].to_numpy(dtype=np.float64)
+    prev_close = np.concatenate([[np.nan], close[:-1]])
+
+    high_low = high - low
+    tr = np.fmax(np.fmax(high_low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    if not skipna:
+        tr[np.isnan(high_low)] = np.nan
+    return pd.Series(tr, index=bars.index, name='TR')
+
+
+def average_true_range(
+    bars: pd.DataFrame,
+    period: int = 20,
+    method: str = "rolling_mean",
+    min_periods: Optional[int] = 1,
+    skipna: bool = True,
+) -> pd.Series:
+    """Average True Range.
+
+    Args:
+        bars: Bars with 'high', 'low', 'close' columns
+        period: ATR period
+        method: "rolling_mean" or "ema" (span = period, adjust=False)
+        min_periods: Minimum bars of a rolling mean (None = period);
+            ignored by "ema"
+        skipna: Passed to true_range
+
+    Returns:
+        ATR aligned with bars
+    """
+    tr = true_range(bars, skipna=skipna)
+    if method == "rolling_mean":
+        atr = tr.rolling(window=period, min_periods=min_periods).mean()
+    elif method == "ema":
+        atr = tr.ewm(span=period, adjust=False).mean()
+    else:
+        raise ValueError(f"Unknown ATR method: {method}")
+    return atr.rename('ATR')
+
+
+def moving_average(values: pd.Series, period: int, min_periods: Optional[int] = None) -> pd.Series:
+    """Simple moving average.
+
+    Args:
+        values: Series to average (e.g. close)
+        period: Window length
+        min_periods: Minimum values per window (None = period)
+
+    Returns:
+        Rolling mean aligned with values
+    """
+    return values.rolling(window=period, min_periods=min_periods).mean()
+
+
+def rolling_true_range_std(
+    bars: pd.DataFrame,
+    window: int = 20,
+    min_periods: Optional[int] = None,
+    skipna: bool = True,
+) -> pd.Series:
+    """Rolling standard deviation of the True Range.
+
+    Args:
+        bars: Bars with 'high', 'low', 'close' columns
+        window: Window length
+        min_periods: Minimum values per window (None = window)
+        skipna: Passed to true_range
+
+    Returns:
+        Rolling std (ddof=1) aligned with bars
+    """
+    return true_range(bars, skipna=skipna).rolling(window=window, min_periods=min_periods).std()
+
+
+def ma_regimes(
+    close: pd.Series,
+    ma: pd.Series,
+    labels: Sequence[str] = ('above_ma', 'below_ma'),
+) -> pd.Categorical:
+    """Label bars by close vs a moving average.
+
+    Args:
+        close: Close prices
+        ma: Moving average aligned with close
+        labels: (close above MA, otherwise); bars without an MA get the
+            second label
+
+    Returns:
+        Categorical with categories `labels`
+    """
+    above = close.to_numpy(dtype=np.float64) > ma.to_numpy(dtype=np.float64)
+    return pd.Categorical.from_codes(np.where(above, 0, 1).astype(np.int8), categories=list(labels))
+
+
+def quantile_regimes(
+    values: pd.Series,
+    low_q: float = 0.3,
+    high_q: float = 0.7,
+    labels: Sequence[str] = ('low_vol', 'medium_vol', 'high_vol'),
+) -> pd.Categorical:
+    """Label bars by where a measure sits in its own distribution.
+
+    Args:
+        values: Measure per bar (e.g. ATR)
+        low_q: Values at or below this quantile get the low label
+        high_q: Values at or above this quantile get the high label
+        labels: (low, medium, high); the low label wins if both apply, and
+            missing values get the medium label
+
+    Returns:
+        Categorical with categories `labels`
+    """
+    q_low = values.quantile(low_q)
+    q_high = values.quantile(high_q)
+
+    x = values.to_numpy(dtype=np.float64)
+    codes = np.ones(len(x), dtype=np.int8)
+    codes[x >= q_high] = 2
+    codes[x <= q_low] = 0
+    return pd.Categorical.from_codes(codes, categories=list(labels))
@@ -2,9 +2,30 @@
 
 import pandas as pd
 import numpy as np
-from typing import Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from ..data.tick_loader import detect_tick_mode
+from .rolling_stats import RollingMoments
+
+
+def _as_datetime_index(index: pd.Index) -> pd.DatetimeIndex:
+    """Tick index as a DatetimeIndex.
+    
+    Compact ticks (see load_partitioned_parquet_ticks(compact=True)) are
+    indexed by int64 UTC epoch nanoseconds; these are viewed as a UTC
+    DatetimeIndex without copying the timestamps.
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        return index
+    values = index.to_numpy(dtype=np.int64).view('M8[ns]')
+    return pd.DatetimeIndex(values, name=index.name).tz_localize('UTC')
+
+
+def _mid_values(ticks: pd.DataFrame) -> np.ndarray:
+    """Mid price array from bid/ask, or the price column itself."""
+    if detect_tick_mode(ticks) == "bid_ask":
+        return (ticks['bid'].to_numpy() + ticks['ask'].to_numpy()) / 2.0
+    return ticks['price'].to_numpy()
 
 
 def add_mid_price(ticks: pd.DataFrame) -> pd.DataFrame:
@@ -14,35 +35,75 @@ def add_mid_price(ticks: pd.DataFrame) -> pd.DataFrame:
         ticks: DataFrame with either ['bid', 'ask'] or ['price'] columns
         
     Returns:
-        DataFrame with added 'mid' column
+        DataFrame with added 'mid' column (existing columns are shared with
+        the input, not copied)
         
     Notes:
         - If 'bid' and 'ask' exist: mid = (bid + ask) / 2
         - Else: mid = price
     """
-    ticks = ticks.copy()
+    ticks = ticks.copy(deep=False)
+    ticks['mid'] = _mid_values(ticks)
     
-    mode = detect_tick_mode(ticks)
+    return ticks
+
+
+def _tick_rule_signs(
+    mid: np.ndarray,
+    prev_mid: Optional[float] = None,
+    prev_sign: int = 1,
+) -> np.ndarray:
+    """int8 tick-rule signs for a mid price array.
     
-    if mode == "bid_ask":
-        ticks['mid'] = (ticks['bid'] + ticks['ask']) / 2.0
-    else:
-        ticks['mid'] = ticks['price']
+    Up-ticks get +1 and down-ticks -1; unchanged (or NaN) ticks inherit the
+    last non-zero sign via a running max over change positions, so no float
+    NaN array or ffill round-trip is needed.
+    """
+    n = len(mid)
+    sign = np.zeros(n, dtype=np.int8)
+    if n == 0:
+        return sign
     
-    return ticks
+    changes = sign[1:]
+    changes[mid[1:] > mid[:-1]] = 1
+    changes[mid[1:] < mid[:-1]] = -1
+    
+    if prev_mid is not None:
+        if mid[0] > prev_mid:
+            sign[0] = 1
+        elif mid[0] < prev_mid:
+            sign[0] = -1
+    if sign[0] == 0:
+        sign[0] = prev_sign
+    
+    # Forward fill zeros with the last non-zero sign
+    last_change = np.arange(n, dtype=np.int32 if n < 2**31 else np.int64)
+    last_change[sign == 0] = 0
+    np.maximum.accumulate(last_change, out=last_change)
+    
+    return sign[last_change]
 
 
-def label_tick_directions(ticks: pd.DataFrame) -> pd.DataFrame:
+def label_tick_directions(
+    ticks: pd.DataFrame,
+    prev_mid: Optional[float] = None,
+    prev_sign: int = 1,
+) -> pd.DataFrame:
     """Apply the tick rule to label buyer/seller initiated trades.
     
     Args:
         ticks: DataFrame with at least a 'mid' column (or will be created)
+        prev_mid: Mid price of the tick just before this frame (for
+            continuing a tick stream across chunks); None = no history
+        prev_sign: Sign inherited by leading unchanged ticks
         
     Returns:
         DataFrame with added columns:
             - 'mid': mid price
-            - 'sign': +1 for buyer-initiated, -1 for seller-initiated
-            - 'vol': volume used for OFI (from 'volume' column)
+            - 'sign': +1 for buyer-initiated, -1 for seller-initiated (int8)
+            - 'vol': volume used for OFI (aliases the 'volume' column)
+        
+        The input columns are shared with the returned frame, not copied.
             
     Notes:
         Tick rule:
@@ -50,43 +111,29 @@ def label_tick_directions(ticks: pd.DataFrame) -> pd.DataFrame:
         - if mid[t] < mid[t-1] → sign[t] = -1 (seller-initiated)
         - if mid[t] == mid[t-1] → sign[t] = sign[t-1] (inherit previous)
         
-        The first tick defaults to sign = +1.
+        The first tick defaults to sign = +1 (or is compared against
+        prev_mid / inherits prev_sign when continuing a stream).
     """
-    ticks = ticks.copy()
+    columns = {col: ticks[col] for col in ticks.columns}
     
     # Ensure mid price exists
-    if 'mid' not in ticks.columns:
-        ticks = add_mid_price(ticks)
-    
-    # Compute price changes
-    mid = ticks['mid']
-    mid_prev = mid.shift(1)
-    
-    # Apply tick rule
-    sign = np.where(mid > mid_prev, 1, 
-                    np.where(mid < mid_prev, -1, np.nan))
-    
-    # Convert to Series for forward fill
-    sign = pd.Series(sign, index=ticks.index)
-    
-    # Forward fill to handle unchanged prices (inherit previous sign)
-    sign = sign.fillna(method='ffill')
-    
-    # Fill any remaining NaN (first tick) with +1
-    sign = sign.fillna(1)
-    
-    ticks['sign'] = sign.astype(int)
+    if 'mid' in columns:
+        mid = ticks['mid'].to_numpy()
+    else:
+        mid = _mid_values(ticks)
+        columns['mid'] = mid
     
-    # Copy volume to 'vol' for consistency
-    ticks['vol'] = ticks['volume']
+    columns['sign'] = _tick_rule_signs(mid, prev_mid=prev_mid, prev_sign=prev_sign)
+    columns['vol'] = ticks['volume']
     
-    return ticks
+    return pd.DataFrame(columns, index=ticks.index, copy=False)
 
 
 def compute_ofi_bars(
     ticks: pd.DataFrame,
     bar_size: str = "4H",
     eps: float = 1e-8,
+    engine: str = "pandas",
 ) -> pd.DataFrame:
     """Aggregate tick-level order flow into bar-level OFI with OHLCV.
 
@@ -94,6 +141,9 @@ def compute_ofi_bars(
         ticks: DataFrame with columns ['mid', 'sign', 'vol']
         bar_size: Pandas resample frequency string
         eps: Small constant to avoid division by zero
+        engine: "pandas" (resample) or "numpy" (segmented reductions over
+            contiguous arrays, see _ofi_bars_numpy; same bars and OHLC,
+            volume sums and OFI_raw equal up to rounding)
 
     Returns:
         DataFrame indexed by bar end time with columns:
@@ -115,17 +165,173 @@ def compute_ofi_bars(
     if missing:
         raise ValueError(f"Missing required columns for OFI computation: {missing}")
 
+    if engine == "numpy":
+        ofi_bars = _ofi_bars_numpy(ticks, bar_size, eps)
+        if ofi_bars is not None:
+            return ofi_bars
+    elif engine != "pandas":
+        raise ValueError(f"Unknown engine: {engine}. Must be 'pandas' or 'numpy'.")
+
+    ofi_bars = _aggregate_ofi_bars(ticks, bar_size)
+
+    return _finalize_ofi_bars(ofi_bars, eps)
+
+
+def _ofi_bars_numpy(
+    ticks: pd.DataFrame,
+    bar_size: str,
+    eps: float,
+) -> Optional[pd.DataFrame]:
+    """compute_ofi_bars via segmented reductions on raw NumPy arrays.
+
+    Bar boundaries are found once with a binary search of the bin edges
+    (aligned like resample's default origin='start_day') over the int64
+    nanosecond timestamps. OHLC and volume sums then come from
+    np.*.reduceat over the contiguous tick arrays, without intermediate
+    DataFrames.
+
+    Returns None when the inputs contain NaN mid/vol values (which resample
+    skips), so the caller can fall back to the pandas engine. OHLC values
+    are exact; sums are not bit-identical to the pandas engine: resample
+    sums use compensated (Kahan) summation and reduceat sums do not, so
+    volumes differ in the last bits (~1e-12 relative on daily bars) and
+    OFI_raw by ~1e-16. float32 (compact) columns are read as-is and
+    accumulated in float64.
+    """
+    index = _as_datetime_index(ticks.index)
+    mid = ticks['mid'].to_numpy()
+    vol = ticks['vol'].to_numpy()
+    sign = ticks['sign'].to_numpy()
+
+    if len(mid) == 0 or np.isnan(mid).any() or np.isnan(vol).any():
+        return None
+
+    ts = index.as_unit('ns').asi8
+    if not index.is_monotonic_increasing:
+        order = np.argsort(ts, kind='stable')
+        ts, mid, vol, sign = ts[order], mid[order], vol[order], sign[order]
+
+    # Bin edges: origin = midnight of the first tick's day (resample default)
+    freq_ns = pd.Timedelta(bar_size).value
+    origin_ns = index.min().normalize().as_unit('ns').value
+    first_bin = (ts[0] - origin_ns) // freq_ns
+    last_bin = (ts[-1] - origin_ns) // freq_ns
+    edges = origin_ns + freq_ns * np.arange(first_bin, last_bin + 2, dtype=np.int64)
+
+    # Binary search for segment boundaries; keep non-empty bins only
+    bounds = np.searchsorted(ts, edges, side='left')
+    nonempty = bounds[1:] > bounds[:-1]
+    starts = bounds[:-1][nonempty]
+    ends = bounds[1:][nonempty]
+
+    zero = vol.dtype.type(0)
+    buy_vol = np.add.reduceat(np.where(sign == 1, vol, zero), starts, dtype=np.float64)
+    sell_vol = np.add.reduceat(np.where(sign == -1, vol, zero), starts, dtype=np.float64)
+    tot_vol = np.add.reduceat(vol, starts, dtype=np.float64)
+
+    labels = pd.to_datetime(edges[:-1][nonempty], unit='ns', utc=index.tz is not None)
+    if index.tz is not None:
+        labels = labels.tz_convert(index.tz)
+
+    ofi_bars = pd.DataFrame({
+        'open': mid[starts].astype(np.float64),
+        'high': np.maximum.reduceat(mid, starts).astype(np.float64),
+        'low': np.minimum.reduceat(mid, starts).astype(np.float64),
+        'close': mid[ends - 1].astype(np.float64),
+        'volume': tot_vol,
+        'OFI_buy_vol': buy_vol,
+        'OFI_sell_vol': sell_vol,
+        'OFI_tot_vol': tot_vol.copy(),
+        'OFI_raw': (buy_vol - sell_vol) / (tot_vol + eps),
+    }, index=pd.DatetimeIndex(labels, name=index.name))
+
+    # Remove bars with no volume
+    return ofi_bars[ofi_bars['volume'] > 0].copy()
+
+
+def compute_bars_with_ofi(
+    ticks: pd.DataFrame,
+    bar_size: str = "4H",
+    eps: float = 1e-8,
+) -> pd.DataFrame:
+    """Aggregate labelled ticks into OHLCV + OFI bars with one resample.
+
+    Fuses ticks_to_bars and compute_ofi_bars: a single grouping of the tick
+    index yields every bar column, so callers need neither a second tick-level
+    resample nor a join.
+
+    Args:
+        ticks: DataFrame with columns ['mid', 'sign', 'vol']
+        bar_size: Pandas resample frequency string
+        eps: Small constant to avoid division by zero
+
+    Returns:
+        DataFrame indexed by bar time with columns:
+            - 'open', 'high', 'low', 'close', 'tick_count', 'volume'
+              (as ticks_to_bars)
+            - 'OFI_buy_vol', 'OFI_sell_vol', 'OFI_tot_vol', 'OFI_raw'
+              (as compute_ofi_bars)
+
+    Notes:
+        - Bars with no ticks are removed (as ticks_to_bars); bars with ticks
+          but zero volume are kept, callers drop them where compute_ofi_bars
+          would (volume > 0).
+    """
+    required = ['mid', 'sign', 'vol']
+    missing = [col for col in required if col not in ticks.columns]
+    if missing:
+        raise ValueError(f"Missing required columns for OFI computation: {missing}")
+
+    mid = ticks['mid'].to_numpy(dtype=np.float64)
+    vol = ticks['vol'].to_numpy(dtype=np.float64)
+    sign = ticks['sign'].to_numpy()
+
+    df = pd.DataFrame({
+        'mid': mid,
+        'tot_vol': vol,
+        'buy_vol': np.where(sign == 1, vol, 0.0),
+        'sell_vol': np.where(sign == -1, vol, 0.0),
+    }, index=_as_datetime_index(ticks.index))
+
+    bars = df.resample(bar_size).agg({
+        'mid': ['first', 'max', 'min', 'last', 'count'],
+        'tot_vol': 'sum',
+        'buy_vol': 'sum',
+        'sell_vol': 'sum',
+    })
+    bars.columns = [
+        'open', 'high', 'low', 'close', 'tick_count',
+        'volume', 'OFI_buy_vol', 'OFI_sell_vol',
+    ]
+    bars['OFI_tot_vol'] = bars['volume']
+    bars['OFI_raw'] = (
+        (bars['OFI_buy_vol'] - bars['OFI_sell_vol']) /
+        (bars['OFI_tot_vol'] + eps)
+    )
+
+    # Remove bars with no ticks
+    bars = bars[bars['tick_count'] > 0].copy()
+
+    return bars
+
+
+def _aggregate_ofi_bars(ticks: pd.DataFrame, bar_size: str) -> pd.DataFrame:
+    """Resample labelled ticks to OHLC + buy/sell/total volume (all bins kept)."""
+    mid = ticks['mid'].to_numpy(dtype=np.float64)
+    vol = ticks['vol'].to_numpy(dtype=np.float64)
+    sign = ticks['sign'].to_numpy()
+
     # Separate buy and sell volumes
-    buy_vol = ticks['vol'].where(ticks['sign'] == 1, 0)
-    sell_vol = ticks['vol'].where(ticks['sign'] == -1, 0)
+    buy_vol = np.where(sign == 1, vol, 0.0)
+    sell_vol = np.where(sign == -1, vol, 0.0)
 
     # Create DataFrame for resampling with OHLCV
     df = pd.DataFrame({
-        'mid': ticks['mid'],
+        'mid': mid,
         'buy_vol': buy_vol,
         'sell_vol': sell_vol,
-        'tot_vol': ticks['vol']
-    }, index=ticks.index)
+        'tot_vol': vol
+    }, index=_as_datetime_index(ticks.index))
 
     # Resample to bars - OHLCV
     ohlc = df['mid'].resample(bar_size).ohlc()
@@ -135,8 +341,11 @@ def compute_ofi_bars(
     ofi_components = df[['buy_vol', 'sell_vol', 'tot_vol']].resample(bar_size).sum()
 
     # Combine OHLCV and OFI
-    ofi_bars = pd.concat([ohlc, volume.rename('volume'), ofi_components], axis=1)
+    return pd.concat([ohlc, volume.rename('volume'), ofi_components], axis=1)
 
+
+def _finalize_ofi_bars(ofi_bars: pd.DataFrame, eps: float) -> pd.DataFrame:
+    """Add OFI_raw, rename OFI columns and drop bars without volume."""
     # Compute OFI_raw
     ofi_bars['OFI_raw'] = (
         (ofi_bars['buy_vol'] - ofi_bars['sell_vol']) /
@@ -156,37 +365,197 @@ def compute_ofi_bars(
     return ofi_bars
 
 
-def standardize_ofi(ofi_bars: pd.DataFrame, window: int = 200) -> pd.DataFrame:
+def compute_ofi_bars_multi(
+    ticks: pd.DataFrame,
+    bar_sizes: List[str],
+    eps: float = 1e-8,
+) -> Dict[str, pd.DataFrame]:
+    """Build OFI bars for several timeframes from a single tick pass.
+
+    Args:
+        ticks: DataFrame with columns ['mid', 'sign', 'vol']
+        bar_sizes: Pandas resample frequency strings (e.g. config bar_sizes)
+        eps: Small constant to avoid division by zero
+
+    Returns:
+        Dict mapping each bar_size to the frame compute_ofi_bars would
+        return, with the same bars and OHLC; volume sums and OFI_raw are
+        equal up to rounding (see Notes)
+
+    Notes:
+        - Only the finest bar size is aggregated from ticks; every coarser
+          size is rolled up from the nearest finer size that divides it
+          (open=first, high=max, low=min, close=last, volumes summed).
+        - The finest bar size must divide every other bar size evenly.
+        - Rolled-up sums add per-bar subtotals instead of ticks, so volumes
+          are not bit-identical to compute_ofi_bars: they differ in the
+          last bits (~1e-12 relative on daily bars), OFI_raw by ~1e-16.
+    """
+    required = ['mid', 'sign', 'vol']
+    missing = [col for col in required if col not in ticks.columns]
+    if missing:
+        raise ValueError(f"Missing required columns for OFI computation: {missing}")
+
+    ordered = sorted(set(bar_sizes), key=pd.Timedelta)
+    finest = pd.Timedelta(ordered[0])
+
+    raw_bars = {ordered[0]: _aggregate_ofi_bars(ticks, ordered[0])}
+
+    for bar_size in ordered[1:]:
+        span = pd.Timedelta(bar_size)
+        if span % finest != pd.Timedelta(0):
+            raise ValueError(f"Bar size {bar_size} is not a multiple of {ordered[0]}")
+
+        # Roll up from the coarsest already-built size that divides this one
+        source = max(
+            (b for b in raw_bars if span % pd.Timedelta(b) == pd.Timedelta(0)),
+            key=pd.Timedelta,
+        )
+        raw_bars[bar_size] = raw_bars[source].resample(bar_size).agg({
+            'open': 'first',
+            'high': 'max',
+            'low': 'min',
+            'close': 'last',
+            'volume': 'sum',
+            'buy_vol': 'sum',
+            'sell_vol': 'sum',
+            'tot_vol': 'sum',
+        })
+
+    return {
+        bar_size: _finalize_ofi_bars(raw_bars[bar_size].copy(), eps)
+        for bar_size in bar_sizes
+    }
+
+
+def iter_bar_aligned_ticks(
+    tick_chunks: Iterable[pd.DataFrame],
+    bar_size: str = "4H",
+) -> Iterator[pd.DataFrame]:
+    """Label a stream of tick chunks and re-cut it on bar boundaries.
+    
+    The tick rule state (last mid, last sign) is carried across chunks, and
+    the ticks of the last, possibly incomplete, bar of each chunk are held
+    back and prepended to the next one. Every yielded segment therefore
+    holds only complete bars and can be aggregated on its own.
+    
+    Args:
+        tick_chunks: Time-ordered tick frames (e.g. from
+            iter_partitioned_parquet_ticks)
+        bar_size: Pandas resample frequency string; must divide a day evenly
+            so bar boundaries do not depend on where a chunk starts
+        
+    Yields:
+        Labelled tick frames with 'mid', 'sign' and 'vol' columns
+    """
+    prev_mid = None
+    prev_sign = 1
+    carry = None
+    
+    for chunk in tick_chunks:
+        if len(chunk) == 0:
+            continue
+        
+        chunk = label_tick_directions(add_mid_price(chunk), prev_mid=prev_mid, prev_sign=prev_sign)
+        prev_mid = chunk['mid'].iloc[-1]
+        prev_sign = chunk['sign'].iloc[-1]
+        
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        
+        # Hold back the bar that may continue into the next chunk
+        ts = _as_datetime_index(chunk.index)
+        open_bar_mask = ts >= ts[-1].floor(bar_size)
+        carry = chunk[open_bar_mask]
+        if not open_bar_mask.all():
+            yield chunk[~open_bar_mask]
+    
+    if carry is not None:
+        yield carry
+
+
+def compute_ofi_bars_streaming(
+    tick_chunks: Iterable[pd.DataFrame],
+    bar_size: str = "4H",
+    eps: float = 1e-8,
+) -> pd.DataFrame:
+    """Build OFI bars from a stream of tick chunks in bounded memory.
+    
+    Args:
+        tick_chunks: Time-ordered raw tick frames (bid/ask or price, volume)
+        bar_size: Pandas resample frequency string (must divide a day evenly)
+        eps: Small constant to avoid division by zero
+        
+    Returns:
+        Same frame as compute_ofi_bars on the concatenated ticks
+    """
+    bars = [
+        compute_ofi_bars(segment, bar_size=bar_size, eps=eps)
+        for segment in iter_bar_aligned_ticks(tick_chunks, bar_size=bar_size)
+    ]
+    
+    if not bars:
+        raise ValueError("No ticks received from tick_chunks")
+    
+    return pd.concat(bars)
+
+
+def standardize_ofi(
+    ofi_bars: pd.DataFrame,
+    window: int = 200,
+    extra_windows: Iterable[int] = (),
+    moments: Optional[RollingMoments] = None,
+) -> pd.DataFrame:
     """Compute rolling mean/std and z-score for OFI_raw.
     
     Args:
         ofi_bars: DataFrame with 'OFI_raw' column
         window: Rolling window size for mean and std calculation
+        extra_windows: Further windows computed in the same pass, written
+            as 'OFI_z_{w}' columns (e.g. [50, 100, 500])
+        moments: Rolling state to continue from (e.g. the previous batch of
+            the same series); it is advanced past these bars. None = start
+            a fresh series.
         
     Returns:
         DataFrame with added columns:
             - 'OFI_mean': rolling mean of OFI_raw
             - 'OFI_std': rolling std of OFI_raw
             - 'OFI_z': (OFI_raw - OFI_mean) / OFI_std
+            - 'OFI_z_{w}': z-score over each extra window
+        
+        The input columns are shared with the returned frame, not copied.
             
     Notes:
-        - Initial values (before window is full) will be NaN
+        - Initial values (before window is full) will be NaN, unless
+          moments carries enough history
         - OFI_z measures how extreme current OFI is relative to recent history
+        - Statistics come from RollingMoments (see src.factors.rolling_stats);
+          they match pandas rolling mean/std to floating-point rounding
     """
-    ofi_bars = ofi_bars.copy()
-    
     if 'OFI_raw' not in ofi_bars.columns:
         raise ValueError("OFI_raw column not found in input DataFrame")
     
-    # Compute rolling statistics
-    ofi_bars['OFI_mean'] = ofi_bars['OFI_raw'].rolling(window=window).mean()
-    ofi_bars['OFI_std'] = ofi_bars['OFI_raw'].rolling(window=window).std()
+    extra_windows = [w for w in extra_windows if w != window]
+    if moments is None:
+        moments = RollingMoments([window, *extra_windows])
+    missing = sorted(set([window, *extra_windows]) - set(moments.windows))
+    if missing:
+        raise ValueError(f"Rolling state has no window(s) {missing}")
+    
+    # All windows from one pass over OFI_raw
+    ofi_raw = ofi_bars['OFI_raw'].to_numpy(dtype=np.float64)
+    stats = moments.update(ofi_raw)
     
-    # Compute z-score
-    ofi_bars['OFI_z'] = (
-        (ofi_bars['OFI_raw'] - ofi_bars['OFI_mean']) / 
-        ofi_bars['OFI_std']
-    )
+    ofi_bars = ofi_bars.copy(deep=False)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean, std = stats[window]
+        ofi_bars['OFI_mean'] = mean
+        ofi_bars['OFI_std'] = std
+        ofi_bars['OFI_z'] = (ofi_raw - mean) / std
+        
+        for w in extra_windows:
+            mean, std = stats[w]
+            ofi_bars[f'OFI_z_{w}'] = (ofi_raw - mean) / std
     
     return ofi_bars
-
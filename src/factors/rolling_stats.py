@@ -0,0 +1,241 @@
+"""Resumable sliding-window mean/std for several windows at once.
+
+RollingMoments turns a stream of values (e.g. OFI_raw bars arriving batch
+by batch) into rolling means and standard deviations for every configured
+window:
+
+    - One prefix-sum pass serves every window: sums restart at chunks of
+      max(windows) rows, and a window sum is a difference of two prefixes
+      of one chunk or the tail of one chunk plus the head of the next.
+      Every sum accumulates at most max(windows) terms, so errors stay
+      bounded by the window length instead of growing with the history,
+      as running add/remove sums or global cumsums do.
+    - Values are shifted by a fixed reference before squaring, so the
+      sum-of-squares variance does not cancel when the mean is far from 0.
+    - Chunks are aligned to absolute row positions and the state keeps the
+      last 2 * max(windows) - 1 values, so results are bit-identical whether a
+      series is processed in one call or resumed chunk by chunk.
+
+The state (tail buffer, row count, shift) serializes to a small bytes blob,
+so appending bars or stitching batches does not need the full history.
+"""
+
+import io
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+def _chunk_prefix_sums(x: np.ndarray, chunk: int, offset: int) -> Tuple[np.ndarray, int]:
+    """Prefix sums restarting at every chunk boundary (aligned to absolute positions).
+
+    Args:
+        x: 2-D array (series x time) of NaN-free values
+        chunk: Chunk length (>= the longest window)
+        offset: Absolute position of column 0
+
+    Returns:
+        (prefix, pad): prefix[k, c, j] is the sum of chunk c of x[k] through
+        its j-th row; x[:, 0] sits at flat row pad. Chunk 0 is all zeros, so
+        every window start has a row.
+    """
+    n_series, n = x.shape
+    pad = chunk + offset % chunk
+    n_chunks = -(-(pad + n) // chunk)
+
+    padded = np.zeros((n_series, n_chunks * chunk), dtype=np.float64)
+    padded[:, pad:pad + n] = x
+    return np.cumsum(padded.reshape(n_series, n_chunks, chunk), axis=2), pad
+
+
+def _window_sums(prefix: np.ndarray, window: int) -> np.ndarray:
+    """Trailing window sums from chunk prefix sums.
+
+    A window ending at row j of chunk c starts in chunk c (j >= window): a
+    prefix difference; or in chunk c - 1 (j < window): the tail of chunk
+    c - 1 (its total minus a prefix) plus a prefix of chunk c.
+
+    Args:
+        prefix: From _chunk_prefix_sums
+        window: Window length (<= chunk length)
+
+    Returns:
+        Window sums (series x flat rows) for every row after chunk 0
+    """
+    n_series, n_chunks, chunk = prefix.shape
+    sums = np.empty((n_series, n_chunks - 1, chunk), dtype=np.float64)
+    sums[:, :, :window] = prefix[:, 1:, :window] + (prefix[:, :-1, -1:] - prefix[:, :-1, chunk - window:])
+    sums[:, :, window:] = prefix[:, 1:, window:] - prefix[:, 1:, :chunk - window]
+    return sums.reshape(n_series, -1)
+
+
+class RollingMoments:
+    """Rolling mean/std of a value stream for several windows.
+
+    Args:
+        windows: Window lengths (e.g. [50, 100, 200, 500])
+        min_periods: Minimum valid values per window (None = the window
+            length, as pandas rolling)
+        ddof: Delta degrees of freedom of the standard deviation
+
+    Example:
+        >>> moments = RollingMoments([100, 200])
+        >>> stats = moments.update(batch_1['OFI_raw'])       # first batch
+        >>> blob = moments.state_bytes()                     # save
+        >>> moments = RollingMoments.from_state_bytes(blob)  # later
+        >>> stats = moments.update(batch_2['OFI_raw'])       # continues
+        >>> mean_200, std_200 = stats[200]
+    """
+
+    def __init__(self, windows: Iterable[int], min_periods: Optional[int] = None, ddof: int = 1):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        if not self.windows or self.windows[0] < 1:
+            raise ValueError(f"Windows must be positive integers, got {windows}")
+        self.min_periods = min_periods
+        self.ddof = ddof
+
+        self.n_seen = 0
+        self.shift: Optional[float] = None
+        self.tail = np.empty(0, dtype=np.float64)
+
+    @property
+    def tail_length(self) -> int:
+        """Number of past values the state keeps.
+
+        Sums restart every max(windows) rows, so a window reaches back at
+        most 2 * max(windows) - 1 rows to its chunk start.
+        """
+        return 2 * self.windows[-1] - 1
+
+    @classmethod
+    def from_history(
+        cls,
+        windows: Iterable[int],
+        history: Iterable[float],
+        min_periods: Optional[int] = None,
+        ddof: int = 1,
+    ) -> 'RollingMoments':
+        """Engine primed with past values (e.g. the tail of a saved series).
+
+        Args:
+            windows: Window lengths
+            history: Values preceding the next update (only the last
+                tail_length are kept)
+            min_periods: As in RollingMoments
+            ddof: As in RollingMoments
+
+        Returns:
+            RollingMoments whose next update continues after history. If
+            history is the whole series so far, results are bit-identical to
+            one pass; if it is only a recent part, chunks and shift differ and
+            results are equal up to rounding.
+        """
+        moments = cls(windows, min_periods=min_periods, ddof=ddof)
+        history = np.asarray(history, dtype=np.float64)
+        # The shift comes from the first valid value of the whole history
+        finite = np.flatnonzero(np.isfinite(history))
+        if len(finite) > 0:
+            moments.shift = float(history[finite[0]])
+        moments._advance(history[len(history) - min(len(history), moments.tail_length):], len(history))
+        return moments
+
+    def _advance(self, values: np.ndarray, n_new: int) -> None:
+        """Fix the shift on the first valid value and roll the tail buffer."""
+        if self.shift is None:
+            finite = values[np.isfinite(values)]
+            if len(finite) > 0:
+                self.shift = float(finite[0])
+        buffer = np.concatenate([self.tail, values])
+        self.tail = buffer[len(buffer) - min(len(buffer), self.tail_length):].copy()
+        self.n_seen += n_new
+
+    def update(self, values: Iterable[float]) -> Dict[int, Tuple[np.ndarray, np.ndarray]]:
+        """Consume the next values of the stream.
+
+        Args:
+            values: Next values (NaN = missing)
+
+        Returns:
+            Dict mapping each window to (mean, std) arrays aligned with values;
+            NaN where the window holds fewer than min_periods valid values
+        """
+        values = np.asarray(values, dtype=np.float64)
+        n_new = len(values)
+
+        # Buffered past values + new values, and the position of x[0]
+        x = np.concatenate([self.tail, values])
+        offset = self.n_seen - len(self.tail)
+        self._advance(values, n_new)
+        if n_new == 0:
+            return {w: (np.empty(0), np.empty(0)) for w in self.windows}
+
+        valid = ~np.isnan(x)
+        shifted = np.where(valid, x - (self.shift if self.shift is not None else 0.0), 0.0)
+        series = np.stack([shifted, shifted * shifted, valid.astype(np.float64)])
+
+        # One prefix pass serves every window
+        chunk = self.windows[-1]
+        prefix, pad = _chunk_prefix_sums(series, chunk, offset)
+        new = slice(pad - chunk + len(x) - n_new, pad - chunk + len(x))
+
+        # Length of the run of equal values ending at each row (a window
+        # inside one run has exactly zero variance, as in pandas)
+        idx = np.arange(len(x))
+        run_start = np.where(np.r_[False, x[1:] == x[:-1]], 0, idx)
+        run_length = (idx - np.maximum.accumulate(run_start) + 1)[len(x) - n_new:]
+
+        out = {}
+        for w in self.windows:
+            s1, s2, count = _window_sums(prefix, w)[:, new]
+            min_periods = w if self.min_periods is None else self.min_periods
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                mean = s1 / count
+                var = (s2 - s1 * mean) / (count - self.ddof)
+            if self.shift is not None:
+                mean += self.shift
+            var = np.maximum(var, 0.0)
+            var[run_length >= count] = 0.0
+            var[count - self.ddof <= 0] = np.nan
+
+            enough = count >= max(min_periods, 1)
+            out[w] = (np.where(enough, mean, np.nan), np.where(enough, np.sqrt(var), np.nan))
+
+        return out
+
+    def state_bytes(self) -> bytes:
+        """Serialize the state (windows, settings, tail buffer) to bytes."""
+        buf = io.BytesIO()
+        np.savez(
+            buf,
+            windows=np.array(self.windows, dtype=np.int64),
+            min_periods=np.array(-1 if self.min_periods is None else self.min_periods, dtype=np.int64),
+            ddof=np.array(self.ddof, dtype=np.int64),
+            n_seen=np.array(self.n_seen, dtype=np.int64),
+            shift=np.array(np.nan if self.shift is None else self.shift, dtype=np.float64),
+            tail=self.tail,
+        )
+        return buf.getvalue()
+
+    @classmethod
+    def from_state_bytes(cls, blob: bytes) -> 'RollingMoments':
+        """Restore an engine saved with state_bytes().
+
+        Args:
+            blob: Bytes returned by state_bytes()
+
+        Returns:
+            RollingMoments continuing where the saved one stopped
+        """
+        with np.load(io.BytesIO(blob)) as data:
+            min_periods = int(data['min_periods'])
+            moments = cls(
+                data['windows'].tolist(),
+                min_periods=None if min_periods < 0 else min_periods,
+                ddof=int(data['ddof']),
+            )
+            moments.n_seen = int(data['n_seen'])
+            shift = float(data['shift'])
+            moments.shift = None if np.isnan(shift) else shift
+            moments.tail = data['tail'].astype(np.float64)
+        return moments
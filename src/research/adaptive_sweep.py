@@ -0,0 +1,176 @@
+"""
+Phase 5: Successive-Halving Search
+
+Adaptive alternative to the full grid for large search spaces
+(ofi_param_sweep.search.mode: successive_halving):
+
+1. Rung 0 scores every config on the most recent `min_fraction` of the
+   (symbol, timeframe) history.
+2. The best 1/eta of the configs by `metric` (NaN, e.g. no trades, ranks
+   last) are promoted and the history slice grows by a factor of eta.
+3. The last rung scores the survivors on the full history.
+
+Each rung costs about n_configs * min_fraction full-history runs, so the
+budget is bounded by the number of rungs (log_eta(1 / min_fraction) + 1)
+rather than the grid size; `max_configs` caps n_configs by sampling the
+search space.
+
+Every evaluation is kept: one row per (config, rung) with 'search_rung',
+'history_fraction' and 'n_bars' columns.
+"""
+
+import math
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .ofi_param_sweep import ParamCombo, sweep_combos_on_bars
+from .sweep_store import SweepStore
+from ..utils.cost_utils import CostScenario
+
+# Defaults of ofi_param_sweep.search (config/settings.yaml ships the same)
+DEFAULT_MIN_FRACTION = 1 / 9
+DEFAULT_ETA = 3
+
+# A slice within this relative distance of the full history counts as the
+# full history, so a rounded min_fraction (e.g. 0.111 for 1/9) keeps its
+# rungs
+_FULL_HISTORY_RTOL = 0.01
+
+# Columns that identify a config in a metrics row
+_PARAM_COLUMNS = [
+    'symbol', 'timeframe', 'param_combo_id',
+    'entry_q_high', 'entry_q_low', 'hmax_bars', 'tp_R', 'atr_period'
+]
+
+
+def halving_fractions(min_fraction: float, eta: float) -> List[float]:
+    """
+    History fractions of the successive-halving rungs.
+
+    Args:
+        min_fraction: Fraction of history used by rung 0 (0 < min_fraction <= 1)
+        eta: Growth factor of the slice (and inverse of the kept share)
+
+    Returns:
+        Increasing fractions ending at 1.0, e.g. [1/9, 1/3, 1.0]
+    """
+    if not 0 < min_fraction <= 1:
+        raise ValueError(f"min_fraction must be in (0, 1], got {min_fraction}")
+    if eta <= 1:
+        raise ValueError(f"eta must be > 1, got {eta}")
+
+    # Slices min_fraction * eta**k below the full history, then the full
+    # history itself
+    fractions = []
+    fraction = min_fraction
+    while fraction < 1.0 and not math.isclose(fraction, 1.0, rel_tol=_FULL_HISTORY_RTOL):
+        fractions.append(fraction)
+        fraction *= eta
+    fractions.append(1.0)
+    return fractions
+
+
+def sample_search_space(
+    combos: List[ParamCombo],
+    max_configs: Optional[int],
+    seed: int = 0
+) -> List[ParamCombo]:
+    """
+    Uniform sample of at most max_configs combos, in grid order.
+
+    Args:
+        combos: Full search space
+        max_configs: Sample size (None = keep all)
+        seed: Random seed
+
+    Returns:
+        Sampled combos
+    """
+    if max_configs is None or len(combos) <= max_configs:
+        return list(combos)
+    rng = np.random.default_rng(seed)
+    keep = np.sort(rng.choice(len(combos), size=max_configs, replace=False))
+    return [combos[i] for i in keep]
+
+
+def _with_search_columns(row: Dict, rung: int, fraction: float, n_bars: int) -> Dict:
+    """Copy of a metrics row with the rung columns after the param columns."""
+    out = {key: row[key] for key in _PARAM_COLUMNS if key in row}
+    out['search_rung'] = rung
+    out['history_fraction'] = fraction
+    out['n_bars'] = n_bars
+    out.update(row)
+    return out
+
+
+def successive_halving_for_symbol_tf(
+    symbol: str,
+    timeframe: str,
+    df: pd.DataFrame,
+    combos: List[ParamCombo],
+    cost_scenarios: List[CostScenario],
+    config,
+    store: Optional[SweepStore] = None,
+    context: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Successive-halving search over combos for one (symbol, timeframe).
+
+    Args:
+        symbol: Symbol name (e.g., "BTCUSD")
+        timeframe: Timeframe (e.g., "8H")
+        df: Full bar history with OFI_z and OHLC columns
+        combos: Configs to search (already sampled)
+        cost_scenarios: List of CostScenario objects
+        config: Config dict (settings under ofi_param_sweep.search)
+        store: Optional checkpoint store; rung rows are stored under the
+            context plus the slice length, so reruns skip finished rungs
+        context: Hash from sweep_context() (required to use the store)
+
+    Returns:
+        DataFrame with one row per evaluated (config, rung)
+    """
+    search_cfg = config['ofi_param_sweep'].get('search', {})
+    eta = search_cfg.get('eta', DEFAULT_ETA)
+    metric = search_cfg.get('metric', 'mean_final_R_net_high_cost')
+    fractions = halving_fractions(search_cfg.get('min_fraction', DEFAULT_MIN_FRACTION), eta)
+
+    survivors = list(combos)
+    history = []
+
+    for rung, fraction in enumerate(fractions):
+        n_bars = max(1, int(round(len(df) * fraction)))
+        bars = df.iloc[len(df) - n_bars:]
+
+        rung_context = f"{context}:last{n_bars}" if context is not None else None
+        done = store.load(symbol, timeframe, rung_context) if store is not None and rung_context else {}
+        todo = [combo for combo in survivors if combo.to_id() not in done]
+
+        print(f"{symbol} {timeframe} rung {rung}: {len(survivors)} configs on last {n_bars} bars "
+              f"({fraction:.0%} of history, {len(done)} from checkpoint)")
+
+        on_row: Optional[Callable[[Dict], None]] = None
+        if store is not None and rung_context:
+            on_row = lambda row: store.put(symbol, timeframe, rung_context, [row])
+
+        rows_by_id = dict(done)
+        if todo:
+            new_rows = sweep_combos_on_bars(symbol, timeframe, bars, todo, cost_scenarios, config, on_row=on_row)
+            rows_by_id.update((row['param_combo_id'], row) for row in new_rows)
+
+        rung_rows = [rows_by_id[combo.to_id()] for combo in survivors if combo.to_id() in rows_by_id]
+        history.extend(_with_search_columns(row, rung, fraction, n_bars) for row in rung_rows)
+
+        if rung == len(fractions) - 1:
+            break
+
+        # Promote the best 1/eta (stable: ties keep grid order)
+        scores = np.array([row.get(metric, np.nan) for row in rung_rows], dtype=float)
+        order = sorted(range(len(rung_rows)), key=lambda i: (np.isnan(scores[i]), -np.nan_to_num(scores[i])))
+        n_keep = max(1, int(len(rung_rows) // eta))
+        promoted = {rung_rows[i]['param_combo_id'] for i in order[:n_keep]}
+        survivors = [combo for combo in survivors if combo.to_id() in promoted]
+
+    return pd.DataFrame(history)
@@ -17,23 +17,78 @@ from tqdm import tqdm
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from src.config_loader import get_config
+from src.factors.indicators import (
+    average_true_range, ma_regimes, moving_average, quantile_regimes, rolling_true_range_std
+)
+from src.utils.trade_metrics import (
+    TradeGroups, group_trades, grouped_column_stats, grouped_exit_reason_shares, trade_arrays
+)
 
 
-def compute_trade_metrics(trades_df: pd.DataFrame) -> Dict:
+# Columns read by trade_metrics_from_arrays
+TRADE_METRIC_COLUMNS = ['final_r', 'mfe_r', 'mae_r', 't_mfe', 'exit_reason']
+
+# Leg name per trade direction
+LEG_BY_DIRECTION = {1: 'long', -1: 'short'}
+
+
+def trade_metrics_by_group(
+    arrays: Dict[str, np.ndarray],
+    groups: TradeGroups
+) -> Dict[str, np.ndarray]:
     """
-    Compute performance metrics for a subset of trades.
+    Compute performance metrics for every group of a long trades table at once.
 
     Parameters
     ----------
-    trades_df : pd.DataFrame
-        Trade data with columns: final_r, mfe_r, mae_r, t_mfe, exit_reason
+    arrays : Dict[str, np.ndarray]
+        Arrays for TRADE_METRIC_COLUMNS
+    groups : TradeGroups
+        Trade groups from group_trades()
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Performance metrics, one value per group (n_trades = 0 and NaN
+        metrics for empty groups)
+    """
+    # One pass per column (lowercase column names from Phase 4)
+    final_r = grouped_column_stats(arrays['final_r'], groups)
+    mfe_r = grouped_column_stats(arrays['mfe_r'], groups, quantiles=(0.75, 0.90))
+    exit_shares = grouped_exit_reason_shares(arrays['exit_reason'], groups)
+
+    return {
+        'n_trades': final_r.n_rows,
+        'mean_final_R_gross': final_r.mean,
+        'sharpe_R_gross': final_r.sharpe(),
+        'median_MFE_R': mfe_r.median,
+        'p75_MFE_R': mfe_r.quantiles[0.75],
+        'p90_MFE_R': mfe_r.quantiles[0.90],
+        'median_MAE_R': grouped_column_stats(arrays['mae_r'], groups).median,
+        'median_t_MFE': grouped_column_stats(arrays['t_mfe'], groups).median,
+        'pct_stop': exit_shares['stop'],
+        'pct_tp_hit': exit_shares['tp_hit'],
+        'pct_hmax': exit_shares['hmax'],
+        'pct_end_of_data': exit_shares['end_of_data']
+    }
+
+
+def trade_metrics_from_arrays(arrays: Dict[str, np.ndarray]) -> Dict:
+    """
+    Compute performance metrics from trade column arrays.
+
+    Parameters
+    ----------
+    arrays : Dict[str, np.ndarray]
+        Arrays for TRADE_METRIC_COLUMNS
 
     Returns
     -------
     Dict
         Performance metrics
     """
-    if len(trades_df) == 0:
+    n_trades = len(arrays.get('final_r', ()))
+    if n_trades == 0:
         return {
             'n_trades': 0,
             'mean_final_R_gross': np.nan,
@@ -49,41 +104,60 @@ def compute_trade_metrics(trades_df: pd.DataFrame) -> Dict:
             'pct_end_of_data': np.nan
         }
 
-    # Basic metrics (use lowercase column names from Phase 4)
-    n_trades = len(trades_df)
-    mean_final_R = trades_df['final_r'].mean()
-    std_final_R = trades_df['final_r'].std()
-    sharpe_R = mean_final_R / std_final_R if std_final_R > 0 else np.nan
-
-    # MFE/MAE metrics (use lowercase column names)
-    median_MFE_R = trades_df['mfe_r'].median()
-    p75_MFE_R = trades_df['mfe_r'].quantile(0.75)
-    p90_MFE_R = trades_df['mfe_r'].quantile(0.90)
-    median_MAE_R = trades_df['mae_r'].median()
-    median_t_MFE = trades_df['t_mfe'].median()
-    
-    # Exit reason distribution
-    exit_counts = trades_df['exit_reason'].value_counts()
-    total = len(trades_df)
-    pct_stop = exit_counts.get('stop', 0) / total
-    pct_tp_hit = exit_counts.get('tp_hit', 0) / total
-    pct_hmax = exit_counts.get('hmax', 0) / total
-    pct_end_of_data = exit_counts.get('end_of_data', 0) / total
-    
-    return {
-        'n_trades': n_trades,
-        'mean_final_R_gross': mean_final_R,
-        'sharpe_R_gross': sharpe_R,
-        'median_MFE_R': median_MFE_R,
-        'p75_MFE_R': p75_MFE_R,
-        'p90_MFE_R': p90_MFE_R,
-        'median_MAE_R': median_MAE_R,
-        'median_t_MFE': median_t_MFE,
-        'pct_stop': pct_stop,
-        'pct_tp_hit': pct_tp_hit,
-        'pct_hmax': pct_hmax,
-        'pct_end_of_data': pct_end_of_data
-    }
+    grouped = trade_metrics_by_group(arrays, TradeGroups.single(n_trades))
+    metrics = {key: values[0] for key, values in grouped.items()}
+    metrics['n_trades'] = n_trades
+    return metrics
+
+
+def compute_trade_metrics(trades_df: pd.DataFrame) -> Dict:
+    """
+    Compute performance metrics for a subset of trades.
+
+    Parameters
+    ----------
+    trades_df : pd.DataFrame
+        Trade data with columns: final_r, mfe_r, mae_r, t_mfe, exit_reason
+
+    Returns
+    -------
+    Dict
+        Performance metrics
+    """
+    return trade_metrics_from_arrays(trade_arrays(trades_df, TRADE_METRIC_COLUMNS))
+
+
+def trade_metrics_table(
+    trades_df: pd.DataFrame,
+    by: List[str],
+    levels: Optional[Dict[str, List]] = None
+) -> pd.DataFrame:
+    """
+    Compute performance metrics for every group of a long trades table.
+
+    Parameters
+    ----------
+    trades_df : pd.DataFrame
+        Trade data with TRADE_METRIC_COLUMNS and the grouping columns
+    by : List[str]
+        Grouping columns (empty = one row over all trades)
+    levels : Optional[Dict[str, List]]
+        Values to report per grouping column; every combination gets a row,
+        in order, including those without trades (None = groups present in
+        trades_df, sorted)
+
+    Returns
+    -------
+    pd.DataFrame
+        Grouping columns followed by the compute_trade_metrics columns
+    """
+    keys = None
+    if by and levels is not None:
+        keys = pd.MultiIndex.from_product([levels[col] for col in by], names=by).to_frame(index=False)
+
+    groups = group_trades(trades_df, by, keys)
+    metrics = trade_metrics_by_group(trade_arrays(trades_df, TRADE_METRIC_COLUMNS), groups)
+    return pd.concat([groups.keys, pd.DataFrame(metrics)], axis=1)
 
 
 def analyze_long_short_legs(
@@ -119,26 +193,13 @@ def analyze_long_short_legs(
         print(f"  WARNING: No trades found in {trades_path}")
         return pd.DataFrame()
     
-    # Split by direction
-    long_trades = trades_df[trades_df['direction'] == 1]
-    short_trades = trades_df[trades_df['direction'] == -1]
-    
-    # Compute metrics for each leg
-    long_metrics = compute_trade_metrics(long_trades)
-    short_metrics = compute_trade_metrics(short_trades)
-    
-    # Build summary
-    summary = []
-    for leg, metrics in [('long', long_metrics), ('short', short_metrics)]:
-        row = {
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'leg': leg,
-            **metrics
-        }
-        summary.append(row)
-    
-    return pd.DataFrame(summary)
+    # Metrics for each leg (a leg without trades gets n_trades = 0)
+    trades_df['leg'] = trades_df['direction'].map(LEG_BY_DIRECTION)
+    summary = trade_metrics_table(trades_df, ['leg'], {'leg': list(LEG_BY_DIRECTION.values())})
+    summary.insert(0, 'symbol', symbol)
+    summary.insert(1, 'timeframe', timeframe)
+
+    return summary
 
 
 def compute_regime_indicators(
@@ -167,48 +228,28 @@ def compute_regime_indicators(
     Returns
     -------
     pd.DataFrame
-        Bars with added regime columns
+        Bars with added 'ma', 'vol_measure' and the categorical
+        'trend_state' / 'vol_regime' columns
     """
     df = bars_df.copy()
 
     # Trend regime: close vs MA
-    df['ma'] = df['close'].rolling(window=trend_ma_period).mean()
-    df['trend_state'] = np.where(df['close'] > df['ma'], 'above_ma', 'below_ma')
+    df['ma'] = moving_average(df['close'], trend_ma_period)
+    df['trend_state'] = ma_regimes(df['close'], df['ma'])
 
-    # Volatility regime
+    # Volatility regime (a bar missing high/low has no True Range and blanks
+    # the 20 windows it falls in, as in the original row-wise max)
     if vol_measure == "atr":
         # Use ATR if available, otherwise compute it
         if 'ATR' not in df.columns:
-            # Compute True Range
-            df['prev_close'] = df['close'].shift(1)
-            df['tr'] = df[['high', 'low', 'prev_close']].apply(
-                lambda x: max(x['high'] - x['low'],
-                            abs(x['high'] - x['prev_close']),
-                            abs(x['low'] - x['prev_close'])),
-                axis=1
-            )
-            df['vol_measure'] = df['tr'].rolling(window=20).mean()
-            df = df.drop(columns=['prev_close', 'tr'])
+            df['vol_measure'] = average_true_range(df, period=20, min_periods=None, skipna=False)
         else:
             df['vol_measure'] = df['ATR']
     else:  # true_range_std
-        df['prev_close'] = df['close'].shift(1)
-        df['tr'] = df[['high', 'low', 'prev_close']].apply(
-            lambda x: max(x['high'] - x['low'],
-                        abs(x['high'] - x['prev_close']),
-                        abs(x['low'] - x['prev_close'])),
-            axis=1
-        )
-        df['vol_measure'] = df['tr'].rolling(window=20).std()
-        df = df.drop(columns=['prev_close', 'tr'])
-
-    # Compute volatility quantiles
-    q_high = df['vol_measure'].quantile(high_vol_q)
-    q_low = df['vol_measure'].quantile(low_vol_q)
-
-    df['vol_regime'] = 'medium_vol'
-    df.loc[df['vol_measure'] >= q_high, 'vol_regime'] = 'high_vol'
-    df.loc[df['vol_measure'] <= q_low, 'vol_regime'] = 'low_vol'
+        df['vol_measure'] = rolling_true_range_std(df, window=20, skipna=False)
+
+    # Volatility quantile regimes
+    df['vol_regime'] = quantile_regimes(df['vol_measure'], low_q=low_vol_q, high_q=high_vol_q)
 
     return df
 
@@ -310,94 +351,38 @@ def analyze_regime_performance(
     # Merge trades with regimes
     trades_with_regimes = merge_trades_with_regimes(trades_df, bars_with_regimes)
 
-    # Analyze by regime combinations
-    summary = []
+    # Analyze by regime combinations: one grouped pass per breakdown, with a
+    # row for every listed group ('all' = not split on that dimension)
+    trades_with_regimes['leg'] = trades_with_regimes['direction'].map(LEG_BY_DIRECTION)
+    levels = {
+        'leg': list(LEG_BY_DIRECTION.values()),
+        'trend_state': ['above_ma', 'below_ma'],
+        'vol_regime': ['high_vol', 'medium_vol', 'low_vol']
+    }
+    breakdowns = [
+        [],
+        ['leg'],
+        ['trend_state'],
+        ['vol_regime'],
+        ['leg', 'trend_state'],
+        ['leg', 'vol_regime']
+    ]
 
-    # Overall (no regime filter)
-    overall_metrics = compute_trade_metrics(trades_with_regimes)
-    summary.append({
-        'symbol': symbol,
-        'timeframe': timeframe,
-        'leg': 'all',
-        'trend_regime': 'all',
-        'vol_regime': 'all',
-        **overall_metrics
-    })
-
-    # By leg
-    for leg_name, direction in [('long', 1), ('short', -1)]:
-        leg_trades = trades_with_regimes[trades_with_regimes['direction'] == direction]
-        leg_metrics = compute_trade_metrics(leg_trades)
-        summary.append({
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'leg': leg_name,
-            'trend_regime': 'all',
-            'vol_regime': 'all',
-            **leg_metrics
-        })
-
-    # By trend regime
-    for trend_state in ['above_ma', 'below_ma']:
-        trend_trades = trades_with_regimes[trades_with_regimes['trend_state'] == trend_state]
-        trend_metrics = compute_trade_metrics(trend_trades)
-        summary.append({
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'leg': 'all',
-            'trend_regime': trend_state,
-            'vol_regime': 'all',
-            **trend_metrics
-        })
-
-    # By volatility regime
-    for vol_state in ['high_vol', 'medium_vol', 'low_vol']:
-        vol_trades = trades_with_regimes[trades_with_regimes['vol_regime'] == vol_state]
-        vol_metrics = compute_trade_metrics(vol_trades)
-        summary.append({
-            'symbol': symbol,
-            'timeframe': timeframe,
-            'leg': 'all',
-            'trend_regime': 'all',
-            'vol_regime': vol_state,
-            **vol_metrics
-        })
-
-    # By leg × trend regime
-    for leg_name, direction in [('long', 1), ('short', -1)]:
-        for trend_state in ['above_ma', 'below_ma']:
-            subset = trades_with_regimes[
-                (trades_with_regimes['direction'] == direction) &
-                (trades_with_regimes['trend_state'] == trend_state)
-            ]
-            metrics = compute_trade_metrics(subset)
-            summary.append({
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'leg': leg_name,
-                'trend_regime': trend_state,
-                'vol_regime': 'all',
-                **metrics
-            })
-
-    # By leg × volatility regime
-    for leg_name, direction in [('long', 1), ('short', -1)]:
-        for vol_state in ['high_vol', 'medium_vol', 'low_vol']:
-            subset = trades_with_regimes[
-                (trades_with_regimes['direction'] == direction) &
-                (trades_with_regimes['vol_regime'] == vol_state)
-            ]
-            metrics = compute_trade_metrics(subset)
-            summary.append({
-                'symbol': symbol,
-                'timeframe': timeframe,
-                'leg': leg_name,
-                'trend_regime': 'all',
-                'vol_regime': vol_state,
-                **metrics
-            })
-
-    return pd.DataFrame(summary)
+    summary = []
+    for by in breakdowns:
+        table = trade_metrics_table(trades_with_regimes, by, levels)
+        table = table.rename(columns={'trend_state': 'trend_regime'})
+        for col in ['leg', 'trend_regime', 'vol_regime']:
+            if col not in table.columns:
+                table[col] = 'all'
+        summary.append(table)
+
+    summary = pd.concat(summary, ignore_index=True)
+    summary.insert(0, 'symbol', symbol)
+    summary.insert(1, 'timeframe', timeframe)
+    id_columns = ['symbol', 'timeframe', 'leg', 'trend_regime', 'vol_regime']
+
+    return summary[id_columns + [col for col in summary.columns if col not in id_columns]]
 
 
 def run_phase6A_long_short_regime(config_path: Path) -> None:
@@ -21,7 +21,9 @@ from src.trading.trade_path_simulator import (
     TradePathConfig,
     simulate_trade_paths
 )
-from src.utils.cost_utils import CostScenario, apply_cost_scenario_to_trades
+from src.trading.feature_cache import FeatureCache, get_feature_cache
+from src.utils.cost_utils import CostScenario, compute_cost_R_matrix
+from src.utils.trade_metrics import column_stats, exit_reason_shares
 
 
 class JointStrategy(Enum):
@@ -183,7 +185,8 @@ def simulate_joint_strategy(
     bars_with_signals: pd.DataFrame,
     strategy: JointStrategy,
     trade_config: TradePathConfig,
-    cost_scenarios: List[CostScenario]
+    cost_scenarios: List[CostScenario],
+    feature_cache: Optional[FeatureCache] = None
 ) -> Dict:
     """
     Simulate trades for a joint strategy and compute metrics.
@@ -202,20 +205,37 @@ def simulate_joint_strategy(
         Trade simulation config
     cost_scenarios : List[CostScenario]
         Cost scenarios to apply
+    feature_cache : Optional[FeatureCache]
+        Cache for the ATR array shared by all strategies of a
+        symbol/timeframe (None = process-wide default cache)
 
     Returns
     -------
     Dict
         Performance metrics
     """
+    if 'ATR' not in bars_with_signals.columns:
+        if feature_cache is None:
+            feature_cache = get_feature_cache()
+        bars_with_signals = bars_with_signals.assign(ATR=feature_cache.atr(
+            symbol, timeframe, bars_with_signals,
+            trade_config.atr_period, trade_config.atr_method
+        ))
+
     # Simulate trades using existing simulator
     trades_df = simulate_trade_paths(
         bars_with_signals,
         hmax_bars=trade_config.hmax_bars,
         position_size=trade_config.position_size,
         save_paths=False,
-        tp_R=trade_config.tp_R
-    )
+        tp_R=trade_config.tp_R,
+        engine=trade_config.engine
+    ).rename(columns={
+        'atr': 'ATR_entry',
+        'mfe_r': 'MFE_R',
+        'mae_r': 'MAE_R',
+        'final_r': 'final_R'
+    })
 
     if len(trades_df) == 0:
         return {
@@ -229,21 +249,15 @@ def simulate_joint_strategy(
 
     # Compute gross metrics
     n_trades = len(trades_df)
-    mean_final_R_gross = trades_df['final_R'].mean()
-    std_final_R = trades_df['final_R'].std()
-    sharpe_R_gross = mean_final_R_gross / std_final_R if std_final_R > 0 else np.nan
+    final_R = trades_df['final_R'].to_numpy()
+    gross = column_stats(final_R)
 
     # MFE/MAE metrics
-    median_MFE_R = trades_df['MFE_R'].median()
-    p75_MFE_R = trades_df['MFE_R'].quantile(0.75)
-    median_MAE_R = trades_df['MAE_R'].median()
+    mfe = column_stats(trades_df['MFE_R'].to_numpy(), quantiles=(0.75,))
+    mae = column_stats(trades_df['MAE_R'].to_numpy())
 
     # Exit reason distribution
-    exit_counts = trades_df['exit_reason'].value_counts()
-    total = len(trades_df)
-    pct_stop = exit_counts.get('stop', 0) / total
-    pct_tp_hit = exit_counts.get('tp_hit', 0) / total
-    pct_hmax = exit_counts.get('hmax', 0) / total
+    exit_shares = exit_reason_shares(trades_df['exit_reason'].to_numpy())
 
     # Build result dict
     result = {
@@ -251,27 +265,27 @@ def simulate_joint_strategy(
         'timeframe': timeframe,
         'strategy': strategy.value,
         'n_trades': n_trades,
-        'mean_final_R_gross': mean_final_R_gross,
-        'sharpe_R_gross': sharpe_R_gross,
-        'median_MFE_R': median_MFE_R,
-        'p75_MFE_R': p75_MFE_R,
-        'median_MAE_R': median_MAE_R,
-        'pct_stop': pct_stop,
-        'pct_tp_hit': pct_tp_hit,
-        'pct_hmax': pct_hmax
+        'mean_final_R_gross': gross.mean,
+        'sharpe_R_gross': gross.sharpe(),
+        'median_MFE_R': mfe.median,
+        'p75_MFE_R': mfe.quantiles[0.75],
+        'median_MAE_R': mae.median,
+        'pct_stop': exit_shares['stop'],
+        'pct_tp_hit': exit_shares['tp_hit'],
+        'pct_hmax': exit_shares['hmax']
     }
 
-    # Apply cost scenarios
-    for scenario in cost_scenarios:
-        trades_with_cost = apply_cost_scenario_to_trades(trades_df, scenario)
-
-        if len(trades_with_cost) > 0:
-            mean_net = trades_with_cost[f'final_R_net_{scenario.name}'].mean()
-            std_net = trades_with_cost[f'final_R_net_{scenario.name}'].std()
-            sharpe_net = mean_net / std_net if std_net > 0 else np.nan
-
-            result[f'mean_final_R_net_{scenario.name}'] = mean_net
-            result[f'sharpe_R_net_{scenario.name}'] = sharpe_net
+    # Apply cost scenarios (all scenarios in one vectorized pass)
+    cost_R = compute_cost_R_matrix(
+        trades_df['entry_price'].to_numpy(),
+        trades_df['exit_price'].to_numpy() if 'exit_price' in trades_df.columns else None,
+        trades_df['ATR_entry'].to_numpy(),
+        np.array([scenario.per_side_rate for scenario in cost_scenarios], dtype=np.float64)
+    )
+    for j, scenario in enumerate(cost_scenarios):
+        net = column_stats(final_R.astype(np.float64) - cost_R[:, j])
+        result[f'mean_final_R_net_{scenario.name}'] = net.mean
+        result[f'sharpe_R_net_{scenario.name}'] = net.sharpe()
 
     return result
 
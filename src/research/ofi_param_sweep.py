@@ -7,8 +7,9 @@ This module coordinates:
 3. Computing performance metrics per (symbol, timeframe, param_combo, cost_scenario)
 """
 
+import os
 from dataclasses import dataclass
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, List, Dict, Optional, Tuple
 from pathlib import Path
 import pandas as pd
 import numpy as np
@@ -16,7 +17,12 @@ from tqdm import tqdm
 
 from ..config_loader import get_config
 from ..trading.trade_path_simulator import TradePathConfig, simulate_ofi_trade_paths_for_df
-from ..utils.cost_utils import CostScenario, apply_cost_scenario_to_trades
+from ..trading.batched_simulator import simulate_ofi_trade_paths_batched
+from ..utils.cost_utils import CostScenario, compute_cost_R_matrix
+from ..utils.trade_metrics import (
+    TradeGroups, group_trades, grouped_column_stats, grouped_exit_reason_shares, trade_arrays
+)
+from .sweep_store import SweepStore, sweep_context
 
 
 @dataclass(frozen=True)
@@ -29,11 +35,13 @@ class ParamCombo:
         entry_q_low: Low quantile threshold (e.g., 0.2)
         hmax_bars: Maximum holding period in bars
         tp_R: Optional static take profit in R-multiples (None = no TP)
+        atr_period: Optional ATR period (None = ofi_trade_path.atr_period)
     """
     entry_q_high: float
     entry_q_low: float
     hmax_bars: int
     tp_R: Optional[float]
+    atr_period: Optional[int] = None
     
     def to_id(self) -> str:
         """
@@ -42,9 +50,13 @@ class ParamCombo:
         Examples:
             "qh0.80_ql0.20_hmax150_tpNone"
             "qh0.85_ql0.15_hmax100_tp2.0"
+            "qh0.85_ql0.15_hmax100_tp2.0_atr14"
         """
         tp_str = f"tp{self.tp_R}" if self.tp_R is not None else "tpNone"
-        return f"qh{self.entry_q_high:.2f}_ql{self.entry_q_low:.2f}_hmax{self.hmax_bars}_{tp_str}"
+        combo_id = f"qh{self.entry_q_high:.2f}_ql{self.entry_q_low:.2f}_hmax{self.hmax_bars}_{tp_str}"
+        if self.atr_period is not None:
+            combo_id += f"_atr{self.atr_period}"
+        return combo_id
     
     def __repr__(self) -> str:
         return self.to_id()
@@ -54,6 +66,9 @@ def generate_param_combos_from_config(cfg) -> List[ParamCombo]:
     """
     Read ofi_param_sweep settings from config and build a list of ParamCombo objects.
 
+    The optional atr_period_candidates list adds ATR period as a fourth
+    grid dimension; without it every combo uses ofi_trade_path.atr_period.
+
     Args:
         cfg: Config dict with ofi_param_sweep section
 
@@ -62,35 +77,122 @@ def generate_param_combos_from_config(cfg) -> List[ParamCombo]:
     """
     sweep_cfg = cfg['ofi_param_sweep']
 
+    atr_periods = sweep_cfg.get('atr_period_candidates') or [None]
+
     combos = []
     for q_high, q_low in sweep_cfg['ofi_quantile_sets']:
         for hmax in sweep_cfg['hmax_candidates']:
             for tp_R in sweep_cfg['tp_R_levels']:
-                combos.append(ParamCombo(
-                    entry_q_high=q_high,
-                    entry_q_low=q_low,
-                    hmax_bars=hmax,
-                    tp_R=tp_R
-                ))
+                for atr_period in atr_periods:
+                    combos.append(ParamCombo(
+                        entry_q_high=q_high,
+                        entry_q_low=q_low,
+                        hmax_bars=hmax,
+                        tp_R=tp_R,
+                        atr_period=atr_period
+                    ))
 
     return combos
 
 
-def compute_performance_metrics(
-    trades_df: pd.DataFrame,
+# Columns read by performance_metrics_from_arrays
+PERFORMANCE_METRIC_COLUMNS = [
+    'direction', 'final_R', 'entry_price', 'exit_price', 'ATR_entry',
+    'MFE_R', 'MAE_R', 'bars_held', 'exit_reason'
+]
+
+
+def performance_metrics_by_group(
+    arrays: Dict[str, np.ndarray],
+    groups: TradeGroups,
+    cost_scenarios: List[CostScenario]
+) -> Dict[str, np.ndarray]:
+    """
+    Compute performance metrics for every group of a long trades table at once.
+
+    Args:
+        arrays: Arrays for PERFORMANCE_METRIC_COLUMNS ('exit_price' optional)
+        groups: Trade groups from src.utils.trade_metrics.group_trades
+        cost_scenarios: List of CostScenario objects
+
+    Returns:
+        Dictionary mapping each metric to an array with one value per group
+    """
+    # Cost-R for all scenarios at once (n_trades x n_scenarios)
+    cost_R = compute_cost_R_matrix(
+        arrays['entry_price'],
+        arrays.get('exit_price'),
+        arrays['ATR_entry'],
+        np.array([scenario.per_side_rate for scenario in cost_scenarios], dtype=np.float64)
+    )
+    final_R = arrays['final_R']
+    gross = grouped_column_stats(final_R, groups)
+
+    # Basic counts
+    direction = np.asarray(arrays['direction'])[groups.order]
+    codes = groups.codes[groups.order]
+    metrics = {
+        'n_trades': gross.n_rows,
+        'n_long': np.bincount(codes[direction == 1], minlength=groups.n_groups),
+        'n_short': np.bincount(codes[direction == -1], minlength=groups.n_groups),
+    }
+
+    # Gross metrics
+    metrics['mean_final_R_gross'] = gross.mean
+    metrics['median_final_R_gross'] = gross.median
+    metrics['std_final_R_gross'] = gross.std
+    metrics['sharpe_R_gross'] = gross.sharpe(zero_std=0)
+    metrics['win_rate_gross'] = gross.win_rate
+
+    # Net metrics for each cost scenario
+    for j, scenario in enumerate(cost_scenarios):
+        net = grouped_column_stats(final_R.astype(np.float64) - cost_R[:, j], groups)
+
+        metrics[f'mean_cost_R_{scenario.name}'] = grouped_column_stats(cost_R[:, j], groups).mean
+        metrics[f'mean_final_R_net_{scenario.name}'] = net.mean
+        metrics[f'median_final_R_net_{scenario.name}'] = net.median
+        metrics[f'std_final_R_net_{scenario.name}'] = net.std
+        metrics[f'sharpe_R_net_{scenario.name}'] = net.sharpe(zero_std=0)
+        metrics[f'win_rate_net_{scenario.name}'] = net.win_rate
+
+    # MFE/MAE statistics
+    mfe = grouped_column_stats(arrays['MFE_R'], groups, quantiles=(0.75, 0.90))
+    metrics['median_MFE_R'] = mfe.median
+    metrics['p75_MFE_R'] = mfe.quantiles[0.75]
+    metrics['p90_MFE_R'] = mfe.quantiles[0.90]
+    metrics['median_MAE_R'] = grouped_column_stats(arrays['MAE_R'], groups).median
+
+    # Time statistics
+    bars_held = grouped_column_stats(arrays['bars_held'], groups)
+    metrics['median_bars_held'] = bars_held.median
+    metrics['mean_bars_held'] = bars_held.mean
+
+    # Exit reason distribution
+    exit_shares = grouped_exit_reason_shares(arrays['exit_reason'], groups)
+    metrics['pct_stop'] = exit_shares['stop']
+    metrics['pct_tp_hit'] = exit_shares['tp_hit']
+    metrics['pct_hmax'] = exit_shares['hmax']
+    metrics['pct_end_of_data'] = exit_shares['end_of_data']
+
+    return metrics
+
+
+def performance_metrics_from_arrays(
+    arrays: Dict[str, np.ndarray],
     cost_scenarios: List[CostScenario]
 ) -> Dict:
     """
-    Compute performance metrics for a set of trades under different cost scenarios.
-    
+    Compute performance metrics from trade column arrays.
+
     Args:
-        trades_df: DataFrame with gross trade results
+        arrays: Arrays for PERFORMANCE_METRIC_COLUMNS ('exit_price' optional)
         cost_scenarios: List of CostScenario objects
-    
+
     Returns:
         Dictionary with metrics for gross and each cost scenario
     """
-    if trades_df.empty:
+    n_trades = len(arrays.get('final_R', ()))
+    if n_trades == 0:
         metrics = {
             'n_trades': 0,
             'n_long': 0,
@@ -101,61 +203,62 @@ def compute_performance_metrics(
             metrics[f'mean_final_R_net_{scenario.name}'] = np.nan
             metrics[f'sharpe_R_net_{scenario.name}'] = np.nan
         return metrics
+
+    grouped = performance_metrics_by_group(arrays, TradeGroups.single(n_trades), cost_scenarios)
+    metrics = {key: values[0] for key, values in grouped.items()}
+    metrics['n_trades'] = n_trades
+    return metrics
+
+
+def compute_performance_metrics(
+    trades_df: pd.DataFrame,
+    cost_scenarios: List[CostScenario]
+) -> Dict:
+    """
+    Compute performance metrics for a set of trades under different cost scenarios.
     
-    # Apply cost scenarios
-    trades_with_costs = trades_df.copy()
-    for scenario in cost_scenarios:
-        trades_with_costs = apply_cost_scenario_to_trades(trades_with_costs, scenario)
-    
-    # Basic counts
-    metrics = {
-        'n_trades': len(trades_df),
-        'n_long': (trades_df['direction'] == 1).sum(),
-        'n_short': (trades_df['direction'] == -1).sum(),
-    }
-    
-    # Gross metrics
-    metrics['mean_final_R_gross'] = trades_df['final_R'].mean()
-    metrics['median_final_R_gross'] = trades_df['final_R'].median()
-    metrics['std_final_R_gross'] = trades_df['final_R'].std()
-    metrics['sharpe_R_gross'] = (
-        trades_df['final_R'].mean() / trades_df['final_R'].std()
-        if trades_df['final_R'].std() > 0 else 0
-    )
-    metrics['win_rate_gross'] = (trades_df['final_R'] > 0).mean()
-    
-    # Net metrics for each cost scenario
-    for scenario in cost_scenarios:
-        net_col = f'final_R_net_{scenario.name}'
-        cost_col = f'cost_R_{scenario.name}'
-        
-        metrics[f'mean_cost_R_{scenario.name}'] = trades_with_costs[cost_col].mean()
-        metrics[f'mean_final_R_net_{scenario.name}'] = trades_with_costs[net_col].mean()
-        metrics[f'median_final_R_net_{scenario.name}'] = trades_with_costs[net_col].median()
-        metrics[f'std_final_R_net_{scenario.name}'] = trades_with_costs[net_col].std()
-        metrics[f'sharpe_R_net_{scenario.name}'] = (
-            trades_with_costs[net_col].mean() / trades_with_costs[net_col].std()
-            if trades_with_costs[net_col].std() > 0 else 0
-        )
-        metrics[f'win_rate_net_{scenario.name}'] = (trades_with_costs[net_col] > 0).mean()
+    Args:
+        trades_df: DataFrame with gross trade results
+        cost_scenarios: List of CostScenario objects
     
-    # MFE/MAE statistics
-    metrics['median_MFE_R'] = trades_df['MFE_R'].median()
-    metrics['p75_MFE_R'] = trades_df['MFE_R'].quantile(0.75)
-    metrics['p90_MFE_R'] = trades_df['MFE_R'].quantile(0.90)
-    metrics['median_MAE_R'] = trades_df['MAE_R'].median()
+    Returns:
+        Dictionary with metrics for gross and each cost scenario
+    """
+    return performance_metrics_from_arrays(trade_arrays(trades_df, PERFORMANCE_METRIC_COLUMNS), cost_scenarios)
 
-    # Time statistics
-    metrics['median_bars_held'] = trades_df['bars_held'].median()
-    metrics['mean_bars_held'] = trades_df['bars_held'].mean()
 
-    # Exit reason distribution
-    metrics['pct_stop'] = (trades_df['exit_reason'] == 'stop').mean()
-    metrics['pct_tp_hit'] = (trades_df['exit_reason'] == 'tp_hit').mean()
-    metrics['pct_hmax'] = (trades_df['exit_reason'] == 'hmax').mean()
-    metrics['pct_end_of_data'] = (trades_df['exit_reason'] == 'end_of_data').mean()
+def sweep_bars_path(symbol: str, timeframe: str, config) -> str:
+    """Path of the base bar+OFI data for a (symbol, timeframe) pair."""
+    bars_pattern = config['ofi_param_sweep']['paths']['bars_with_ofi_pattern']
+    return bars_pattern.format(symbol=symbol, tf=timeframe)
 
-    return metrics
+
+def load_sweep_bars(symbol: str, timeframe: str, config) -> Optional[pd.DataFrame]:
+    """
+    Load the base bar+OFI data for a (symbol, timeframe) pair.
+
+    Args:
+        symbol: Symbol name (e.g., "BTCUSD")
+        timeframe: Timeframe (e.g., "8H")
+        config: Config dict
+
+    Returns:
+        Bars DataFrame, or None if the file does not exist
+    """
+    bars_path = sweep_bars_path(symbol, timeframe, config)
+
+    print(f"\n{'='*80}")
+    print(f"Processing {symbol} {timeframe}")
+    print(f"Loading data from: {bars_path}")
+
+    try:
+        df = pd.read_csv(bars_path, index_col=0, parse_dates=True)
+        print(f"Loaded {len(df)} bars")
+    except FileNotFoundError:
+        print(f"WARNING: File not found: {bars_path}")
+        return None
+
+    return df
 
 
 def run_param_sweep_for_symbol_tf(
@@ -170,7 +273,9 @@ def run_param_sweep_for_symbol_tf(
 
     For each ParamCombo:
     1. Build TradePathConfig
-    2. Run simulate_ofi_trade_paths_for_df() to get gross trades
+    2. Get gross trades: by default all combos are simulated together with
+       simulate_ofi_trade_paths_batched() (ofi_param_sweep.batched: false
+       runs simulate_ofi_trade_paths_for_df() per combo; same trades)
     3. For each cost scenario, apply costs and compute metrics
     4. Store one row per (symbol, timeframe, ParamCombo, cost_scenario)
 
@@ -184,49 +289,113 @@ def run_param_sweep_for_symbol_tf(
     Returns:
         DataFrame with one row per parameter combination
     """
-    # Load base bar+OFI data
-    bars_pattern = config['ofi_param_sweep']['paths']['bars_with_ofi_pattern']
-    bars_path = bars_pattern.format(symbol=symbol, tf=timeframe)
+    df = load_sweep_bars(symbol, timeframe, config)
+    if df is None:
+        return pd.DataFrame()
 
-    print(f"\n{'='*80}")
-    print(f"Processing {symbol} {timeframe}")
-    print(f"Loading data from: {bars_path}")
+    return pd.DataFrame(sweep_combos_on_bars(symbol, timeframe, df, combos, cost_scenarios, config))
 
-    try:
-        df = pd.read_csv(bars_path, index_col=0, parse_dates=True)
-        print(f"Loaded {len(df)} bars")
-    except FileNotFoundError:
-        print(f"WARNING: File not found: {bars_path}")
-        return pd.DataFrame()
 
-    # Get base config settings
-    base_cfg = config['ofi_trade_path']
+def build_trade_path_configs(combos: List[ParamCombo], config) -> Dict[str, TradePathConfig]:
+    """
+    Build one TradePathConfig per ParamCombo from the ofi_trade_path settings.
 
-    results = []
+    Args:
+        combos: List of ParamCombo objects
+        config: Config dict
 
-    for combo in tqdm(combos, desc=f"{symbol} {timeframe}", leave=False):
-        # Build TradePathConfig for this combo
-        cfg = TradePathConfig(
+    Returns:
+        Dict mapping combo id to TradePathConfig
+    """
+    base_cfg = config['ofi_trade_path']
+
+    return {
+        combo.to_id(): TradePathConfig(
             entry_mode=base_cfg['entry_mode'],
             entry_q_high=combo.entry_q_high,
             entry_q_low=combo.entry_q_low,
-            atr_period=base_cfg['atr_period'],
+            atr_period=combo.atr_period if combo.atr_period is not None else base_cfg['atr_period'],
             atr_method=base_cfg['atr_method'],
             hmax_bars=combo.hmax_bars,
             tp_R=combo.tp_R,
             position_size=base_cfg['fixed_position_size'],
-            save_paths=False
+            save_paths=False,
+            engine=base_cfg.get('engine', 'python'),
+            quantile_window=base_cfg.get('quantile_window'),
+            quantile_min_periods=base_cfg.get('quantile_min_periods')
         )
+        for combo in combos
+    }
+
 
-        # Run simulation
+def sweep_combos_on_bars(
+    symbol: str,
+    timeframe: str,
+    df: pd.DataFrame,
+    combos: List[ParamCombo],
+    cost_scenarios: List[CostScenario],
+    config,
+    progress: bool = True,
+    on_row: Optional[Callable[[Dict], None]] = None
+) -> List[Dict]:
+    """
+    Simulate and score a list of combos on already loaded bars.
+
+    Shared by the serial sweep and the parallel sweep workers.
+
+    Args:
+        symbol: Symbol name (e.g., "BTCUSD")
+        timeframe: Timeframe (e.g., "8H")
+        df: Bar data with OFI_z and OHLC columns
+        combos: List of ParamCombo objects to test
+        cost_scenarios: List of CostScenario objects
+        config: Config dict
+        progress: Show a tqdm bar over the combos
+        on_row: Called with each metrics row as soon as it is computed
+            (e.g. to checkpoint it)
+
+    Returns:
+        List of metrics rows, one per combo, in combo order
+    """
+    cfgs = build_trade_path_configs(combos, config)
+
+    # Batched: all combos in one shared pass, then metrics per config_id
+    # straight from the long trades table
+    batched_metrics = None
+    if config['ofi_param_sweep'].get('batched', True):
         try:
-            trades_df = simulate_ofi_trade_paths_for_df(symbol, timeframe, df, cfg)
+            all_trades = simulate_ofi_trade_paths_batched(symbol, timeframe, df, cfgs)
         except Exception as e:
-            print(f"ERROR in simulation for {combo}: {e}")
-            continue
+            print(f"ERROR in batched simulation for {symbol} {timeframe}: {e}")
+            return []
+        batched_metrics = {}
+        if not all_trades.empty:
+            groups = group_trades(all_trades, 'config_id', sort=False)
+            grouped = performance_metrics_by_group(
+                trade_arrays(all_trades, PERFORMANCE_METRIC_COLUMNS), groups, cost_scenarios
+            )
+            batched_metrics = {
+                config_id: {key: values[g] for key, values in grouped.items()}
+                for g, config_id in enumerate(groups.keys['config_id'])
+            }
 
-        # Compute metrics
-        metrics = compute_performance_metrics(trades_df, cost_scenarios)
+    results = []
+
+    for combo in tqdm(combos, desc=f"{symbol} {timeframe}", leave=False, disable=not progress):
+        if batched_metrics is not None:
+            metrics = batched_metrics.get(combo.to_id())
+            if metrics is None:
+                metrics = performance_metrics_from_arrays({}, cost_scenarios)
+        else:
+            # Run simulation
+            try:
+                trades_df = simulate_ofi_trade_paths_for_df(symbol, timeframe, df, cfgs[combo.to_id()])
+            except Exception as e:
+                print(f"ERROR in simulation for {combo}: {e}")
+                continue
+
+            # Compute metrics
+            metrics = compute_performance_metrics(trades_df, cost_scenarios)
 
         # Build result row
         row = {
@@ -238,11 +407,15 @@ def run_param_sweep_for_symbol_tf(
             'hmax_bars': combo.hmax_bars,
             'tp_R': combo.tp_R if combo.tp_R is not None else np.nan,
         }
+        if combo.atr_period is not None:
+            row['atr_period'] = combo.atr_period
         row.update(metrics)
 
+        if on_row is not None:
+            on_row(row)
         results.append(row)
 
-    return pd.DataFrame(results)
+    return results
 
 
 def run_phase5_param_sweep(config_path: Path) -> None:
@@ -284,31 +457,136 @@ def run_phase5_param_sweep(config_path: Path) -> None:
     print(f"  - Hmax candidates: {sweep_cfg['hmax_candidates']}")
     print(f"  - TP_R levels: {sweep_cfg['tp_R_levels']}")
 
+    # Search mode: full grid, or successive halving over (a sample of) it
+    search_cfg = sweep_cfg.get('search') or {}
+    search_mode = search_cfg.get('mode', 'grid')
+    if search_mode not in ('grid', 'successive_halving'):
+        raise ValueError(f"Unknown search mode: {search_mode}. Must be 'grid' or 'successive_halving'.")
+    if search_mode == 'successive_halving':
+        from .adaptive_sweep import (
+            DEFAULT_ETA, DEFAULT_MIN_FRACTION,
+            halving_fractions, sample_search_space, successive_halving_for_symbol_tf
+        )
+
+        combos = sample_search_space(combos, search_cfg.get('max_configs'), search_cfg.get('seed', 0))
+        eta = search_cfg.get('eta', DEFAULT_ETA)
+        fractions = halving_fractions(search_cfg.get('min_fraction', DEFAULT_MIN_FRACTION), eta)
+        print(f"\nSuccessive halving: {len(combos)} configs, eta={eta}, "
+              f"history fractions {[round(f, 4) for f in fractions]}")
+
     # Create output directory
     output_dir = Path(sweep_cfg['paths']['sweep_results_dir'])
     output_dir.mkdir(parents=True, exist_ok=True)
     print(f"\nOutput directory: {output_dir}")
 
     # Run sweep for each symbol/timeframe
-    all_results = []
-
-    for symbol in sweep_cfg['symbols']:
-        for timeframe in sweep_cfg['timeframes']:
-            # Run sweep
-            results_df = run_param_sweep_for_symbol_tf(
-                symbol, timeframe, combos, cost_scenarios, config
+    pairs = [(symbol, timeframe) for symbol in sweep_cfg['symbols'] for timeframe in sweep_cfg['timeframes']]
+    n_workers = sweep_cfg.get('n_workers', 1) or os.cpu_count()
+
+    # Checkpoint store: every completed row is committed as soon as it is
+    # computed; on restart (or after a grid extension) only combos missing
+    # from the store are run
+    store = None
+    if sweep_cfg.get('resume', True):
+        store_path = sweep_cfg['paths'].get('checkpoint_db') or output_dir / "ofi_param_sweep_checkpoint.sqlite"
+        store = SweepStore(store_path)
+        print(f"Checkpoint store: {store_path}")
+
+    contexts = {}
+    done_rows = {}
+    combos_by_pair = {}
+    for symbol, timeframe in pairs:
+        context = sweep_context(sweep_bars_path(symbol, timeframe, config), cost_scenarios, config)
+        done = {}
+        if search_mode == 'grid' and store is not None and context is not None:
+            done = store.load(symbol, timeframe, context)
+        contexts[(symbol, timeframe)] = context
+        done_rows[(symbol, timeframe)] = done
+        combos_by_pair[(symbol, timeframe)] = [combo for combo in combos if combo.to_id() not in done]
+        if done:
+            print(f"{symbol} {timeframe}: {len(done)} combos restored from checkpoint, "
+                  f"{len(combos_by_pair[(symbol, timeframe)])} to run")
+
+    def save_rows(symbol: str, timeframe: str, rows: List[Dict]) -> None:
+        context = contexts[(symbol, timeframe)]
+        if store is not None and context is not None:
+            store.put(symbol, timeframe, context, rows)
+
+    def run_serial():
+        for symbol, timeframe in pairs:
+            todo = combos_by_pair[(symbol, timeframe)]
+            if not todo:
+                yield symbol, timeframe, []
+                continue
+            df = load_sweep_bars(symbol, timeframe, config)
+            if df is None:
+                yield symbol, timeframe, []
+                continue
+            yield symbol, timeframe, sweep_combos_on_bars(
+                symbol, timeframe, df, todo, cost_scenarios, config,
+                on_row=lambda row: save_rows(symbol, timeframe, [row])
             )
 
-            if results_df.empty:
-                print(f"WARNING: No results for {symbol} {timeframe}")
+    search_history = []
+
+    def run_halving():
+        for symbol, timeframe in pairs:
+            df = load_sweep_bars(symbol, timeframe, config)
+            if df is None:
+                yield symbol, timeframe, []
                 continue
+            pair_history = successive_halving_for_symbol_tf(
+                symbol, timeframe, df, combos, cost_scenarios, config,
+                store=store, context=contexts[(symbol, timeframe)]
+            )
+            search_history.append(pair_history)
+            # Every evaluated config once, at the deepest rung it reached
+            yield symbol, timeframe, pair_history.drop_duplicates('param_combo_id', keep='last').to_dict('records')
+
+    if search_mode == 'successive_halving':
+        # Rungs depend on the previous rung, so pairs run in this process
+        pair_results = run_halving()
+    elif n_workers > 1:
+        from .parallel_sweep import run_param_sweep_parallel
+
+        print(f"Parallel sweep: {n_workers} workers")
+        pair_results = run_param_sweep_parallel(
+            combos_by_pair, cost_scenarios, config, n_workers,
+            combos_per_task=sweep_cfg.get('combos_per_task'),
+            on_rows=save_rows
+        )
+    else:
+        pair_results = run_serial()
+
+    results_by_pair = {}
+
+    for symbol, timeframe, new_rows in pair_results:
+        # Checkpointed and new rows, in combo order
+        rows_by_id = dict(done_rows[(symbol, timeframe)])
+        rows_by_id.update((row['param_combo_id'], row) for row in new_rows)
+        results_df = pd.DataFrame([rows_by_id[combo.to_id()] for combo in combos if combo.to_id() in rows_by_id])
+
+        if results_df.empty:
+            print(f"WARNING: No results for {symbol} {timeframe}")
+            continue
+
+        # Save per-(symbol,timeframe) results
+        output_file = output_dir / f"ofi_param_sweep_{symbol}_{timeframe}.csv"
+        results_df.to_csv(output_file, index=False)
+        print(f"Saved: {output_file} ({len(results_df)} rows)")
+
+        results_by_pair[(symbol, timeframe)] = results_df
+
+    if store is not None:
+        store.close()
 
-            # Save per-(symbol,timeframe) results
-            output_file = output_dir / f"ofi_param_sweep_{symbol}_{timeframe}.csv"
-            results_df.to_csv(output_file, index=False)
-            print(f"Saved: {output_file} ({len(results_df)} rows)")
+    if search_history:
+        history_file = output_dir / "ofi_param_sweep_search_history.csv"
+        pd.concat(search_history, ignore_index=True).to_csv(history_file, index=False)
+        print(f"Saved search history: {history_file}")
 
-            all_results.append(results_df)
+    # Serial pair order, whichever order the pairs completed in
+    all_results = [results_by_pair[pair] for pair in pairs if pair in results_by_pair]
 
     if not all_results:
         print("\nERROR: No results generated!")
@@ -328,19 +606,21 @@ def run_phase5_param_sweep(config_path: Path) -> None:
     print(f"\n{'='*80}")
     print("Creating rankings...")
 
-    # Sort by different metrics
+    # Sort by different metrics (successive halving: configs that reached
+    # deeper rungs, i.e. longer history, rank first)
     rankings = []
+    halving = 'search_rung' in global_df.columns
 
     for scenario in cost_scenarios:
         net_col = f'mean_final_R_net_{scenario.name}'
         sharpe_col = f'sharpe_R_net_{scenario.name}'
 
         # Rank by net expectancy
-        ranked = global_df.sort_values(net_col, ascending=False).copy()
+        ranked = global_df.sort_values(['search_rung', net_col] if halving else net_col, ascending=False).copy()
         ranked[f'rank_by_{net_col}'] = range(1, len(ranked) + 1)
 
         # Rank by Sharpe
-        ranked_sharpe = global_df.sort_values(sharpe_col, ascending=False).copy()
+        ranked_sharpe = global_df.sort_values(['search_rung', sharpe_col] if halving else sharpe_col, ascending=False).copy()
         ranked[f'rank_by_{sharpe_col}'] = range(1, len(ranked_sharpe) + 1)
 
         rankings.append(ranked)
@@ -358,7 +638,8 @@ def run_phase5_param_sweep(config_path: Path) -> None:
         high_cost_scenario = [s for s in cost_scenarios if 'high' in s.name.lower()]
         if high_cost_scenario:
             net_col = f'mean_final_R_net_{high_cost_scenario[0].name}'
-            top10 = global_df.nlargest(10, net_col)
+            final_df = global_df[global_df['search_rung'] == global_df['search_rung'].max()] if halving else global_df
+            top10 = final_df.nlargest(10, net_col)
 
             print(f"\n{'='*80}")
             print(f"Top 10 by {net_col}:")
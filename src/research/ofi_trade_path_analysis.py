@@ -72,7 +72,9 @@ def analyze_single_config(
         entry_q_high=config['entry_q_high'],
         entry_q_low=config['entry_q_low'],
         atr_period=config['atr_period'],
-        atr_method=config['atr_method']
+        atr_method=config['atr_method'],
+        quantile_window=config.get('quantile_window'),
+        quantile_min_periods=config.get('quantile_min_periods')
     )
     
     n_long_signals = (df['signal'] == 1).sum()
@@ -87,7 +89,8 @@ def analyze_single_config(
         df,
         hmax_bars=config['hmax_bars'],
         position_size=config['fixed_position_size'],
-        save_paths=config['save_paths']
+        save_paths=config['save_paths'],
+        engine=config.get('engine', 'python')
     )
     
     if len(trade_df) == 0:
@@ -0,0 +1,193 @@
+"""
+Phase 5: Parallel Parameter Sweep
+
+Fans the Phase 5 sweep out to a process pool:
+
+1. Each (symbol, timeframe) bar file is loaded once in the parent and the
+   columns the simulator reads are written as .npy files to a scratch
+   directory.
+2. Workers memory-map those files, so all processes share one page-cache
+   copy of the bars instead of each parsing the CSV or unpickling a frame.
+3. Each task runs sweep_combos_on_bars() on a contiguous chunk of combos
+   (chunks keep combos sharing an OFI quantile set together, so the batched
+   simulator still shares signals) and sends its metrics rows back.
+4. The parent collects rows as tasks finish (passing them to a checkpoint
+   callback) and hands back a (symbol, timeframe) result as soon as all
+   of its chunks are in.
+
+Rows are reassembled in combo order, so the results match a serial run.
+"""
+
+import math
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from .ofi_param_sweep import ParamCombo, load_sweep_bars, sweep_combos_on_bars
+from ..utils.cost_utils import CostScenario
+
+# Columns the trade path simulator reads (ATR only if precomputed)
+SWEEP_COLUMNS = ['open', 'high', 'low', 'close', 'OFI_z', 'ATR']
+
+
+@dataclass(frozen=True)
+class SharedBars:
+    """
+    Handle to a bar frame published as memory-mapped .npy files.
+
+    Attributes:
+        directory: Directory holding one .npy file per column plus index.npy
+        columns: Published columns, in frame order
+        index_name: Name of the frame index
+        index_tz: Timezone of a DatetimeIndex (None if naive)
+        datetime_index: Whether index.npy holds int64 nanoseconds
+    """
+    directory: str
+    columns: Tuple[str, ...]
+    index_name: Optional[str]
+    index_tz: Optional[str]
+    datetime_index: bool
+
+
+def publish_bars(df: pd.DataFrame, directory: Path) -> SharedBars:
+    """
+    Write the simulator columns of a bar frame as .npy files.
+
+    Args:
+        df: Bar data with OFI_z and OHLC columns
+        directory: Directory to write into (created if missing)
+
+    Returns:
+        SharedBars handle to pass to workers
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    columns = tuple(col for col in SWEEP_COLUMNS if col in df.columns)
+    for col in columns:
+        np.save(directory / f"{col}.npy", df[col].to_numpy())
+
+    datetime_index = isinstance(df.index, pd.DatetimeIndex)
+    if datetime_index:
+        np.save(directory / "index.npy", df.index.as_unit('ns').asi8)
+        index_tz = str(df.index.tz) if df.index.tz is not None else None
+    else:
+        np.save(directory / "index.npy", df.index.to_numpy(), allow_pickle=True)
+        index_tz = None
+
+    return SharedBars(
+        directory=str(directory),
+        columns=columns,
+        index_name=df.index.name,
+        index_tz=index_tz,
+        datetime_index=datetime_index
+    )
+
+
+def attach_bars(shared: SharedBars) -> pd.DataFrame:
+    """
+    Rebuild a bar frame over the memory-mapped columns of a SharedBars.
+
+    Args:
+        shared: Handle returned by publish_bars()
+
+    Returns:
+        DataFrame whose columns are read-only views of the mapped files
+    """
+    directory = Path(shared.directory)
+
+    if shared.datetime_index:
+        index = pd.DatetimeIndex(np.load(directory / "index.npy").view('M8[ns]'), name=shared.index_name)
+        if shared.index_tz is not None:
+            index = index.tz_localize('UTC').tz_convert(shared.index_tz)
+    else:
+        index = pd.Index(np.load(directory / "index.npy", allow_pickle=True), name=shared.index_name)
+
+    columns = {col: np.load(directory / f"{col}.npy", mmap_mode='r') for col in shared.columns}
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+def _sweep_task(
+    shared: SharedBars,
+    symbol: str,
+    timeframe: str,
+    combos: List[ParamCombo],
+    cost_scenarios: List[CostScenario],
+    config
+) -> List[Dict]:
+    """Worker entry point: score one chunk of combos on shared bars."""
+    df = attach_bars(shared)
+    return sweep_combos_on_bars(symbol, timeframe, df, combos, cost_scenarios, config, progress=False)
+
+
+def run_param_sweep_parallel(
+    combos_by_pair: Dict[Tuple[str, str], List[ParamCombo]],
+    cost_scenarios: List[CostScenario],
+    config,
+    n_workers: int,
+    combos_per_task: Optional[int] = None,
+    on_rows: Optional[Callable[[str, str, List[Dict]], None]] = None
+) -> Iterator[Tuple[str, str, List[Dict]]]:
+    """
+    Run the parameter sweep for several (symbol, timeframe) pairs in a process pool.
+
+    Args:
+        combos_by_pair: Combos to run per (symbol, timeframe) pair
+        cost_scenarios: List of CostScenario objects
+        config: Config dict
+        n_workers: Number of worker processes
+        combos_per_task: Combos per task (None = about four tasks per worker)
+        on_rows: Called with (symbol, timeframe, rows) as each task's rows
+            arrive (e.g. to checkpoint them)
+
+    Yields:
+        (symbol, timeframe, rows) as each pair completes, rows being the
+        metrics rows of its combos in combo order (as returned by
+        sweep_combos_on_bars()). Pairs without combos or without a bar
+        file yield no rows.
+    """
+    if combos_per_task is None:
+        n_combos = sum(len(combos) for combos in combos_by_pair.values())
+        combos_per_task = math.ceil(n_combos / (4 * n_workers))
+    combos_per_task = max(1, combos_per_task)
+
+    with tempfile.TemporaryDirectory(prefix="ofi_sweep_") as scratch, \
+            ProcessPoolExecutor(max_workers=n_workers) as pool:
+        futures = {}
+        parts: Dict[Tuple[str, str], List[Optional[List[Dict]]]] = {}
+
+        for (symbol, timeframe), combos in combos_by_pair.items():
+            if not combos:
+                yield symbol, timeframe, []
+                continue
+
+            df = load_sweep_bars(symbol, timeframe, config)
+            if df is None:
+                yield symbol, timeframe, []
+                continue
+
+            shared = publish_bars(df, Path(scratch) / f"{symbol}_{timeframe}")
+            del df
+
+            chunks = [combos[i:i + combos_per_task] for i in range(0, len(combos), combos_per_task)]
+            parts[(symbol, timeframe)] = [None] * len(chunks)
+            for k, chunk in enumerate(chunks):
+                future = pool.submit(_sweep_task, shared, symbol, timeframe, chunk, cost_scenarios, config)
+                futures[future] = (symbol, timeframe, k)
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Sweep tasks"):
+            symbol, timeframe, k = futures[future]
+            rows = future.result()
+            if on_rows is not None:
+                on_rows(symbol, timeframe, rows)
+
+            pair_parts = parts[(symbol, timeframe)]
+            pair_parts[k] = rows
+            if all(chunk_rows is not None for chunk_rows in pair_parts):
+                yield symbol, timeframe, [row for chunk_rows in pair_parts for row in chunk_rows]
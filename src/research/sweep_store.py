@@ -0,0 +1,138 @@
+"""
+Phase 5: Checkpoint Store for the Parameter Sweep
+
+Every completed (symbol, timeframe, param_combo_id) metrics row is committed
+to a SQLite file as soon as it is computed, so a crashed or interrupted
+sweep resumes where it stopped and a grid extension (e.g. new tp_R_levels)
+only computes the new cells.
+
+Rows are stored under a context hash of everything besides the combo that
+changes the result: the ofi_trade_path settings the simulator reads, the
+cost scenarios and the size/mtime of the bar file. Rows from another
+context are never returned, so editing the config or rebuilding the bars
+recomputes instead of reusing stale metrics.
+"""
+
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..utils.cost_utils import CostScenario
+
+
+def _json_default(value):
+    """Serialize NumPy scalars found in metrics rows."""
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def sweep_context(
+    bars_path: Path,
+    cost_scenarios: List[CostScenario],
+    config
+) -> Optional[str]:
+    """
+    Hash of the sweep inputs shared by all combos of a (symbol, timeframe).
+
+    Args:
+        bars_path: Bar+OFI CSV of the pair
+        cost_scenarios: List of CostScenario objects
+        config: Config dict
+
+    Returns:
+        Hex digest, or None if the bar file does not exist
+    """
+    bars_path = Path(bars_path)
+    if not bars_path.exists():
+        return None
+
+    stat = bars_path.stat()
+    base_cfg = config['ofi_trade_path']
+    payload = {
+        'entry_mode': base_cfg['entry_mode'],
+        'atr_period': base_cfg['atr_period'],
+        'atr_method': base_cfg['atr_method'],
+        'position_size': base_cfg['fixed_position_size'],
+        'cost_scenarios': [[sc.name, sc.per_side_rate] for sc in cost_scenarios],
+        'bars': [bars_path.name, stat.st_size, stat.st_mtime_ns],
+    }
+    # Only present with causal thresholds, so existing contexts stay valid
+    if base_cfg.get('quantile_window') is not None:
+        payload['quantile_window'] = base_cfg['quantile_window']
+        payload['quantile_min_periods'] = base_cfg.get('quantile_min_periods')
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class SweepStore:
+    """
+    Durable store of sweep metrics rows.
+
+    Args:
+        path: SQLite file (created with its parent directory if missing)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sweep_rows ("
+            " symbol TEXT NOT NULL,"
+            " timeframe TEXT NOT NULL,"
+            " context TEXT NOT NULL,"
+            " param_combo_id TEXT NOT NULL,"
+            " row_json TEXT NOT NULL,"
+            " PRIMARY KEY (symbol, timeframe, context, param_combo_id))"
+        )
+        self._conn.commit()
+
+    def load(self, symbol: str, timeframe: str, context: str) -> Dict[str, Dict]:
+        """
+        Completed rows of a (symbol, timeframe) under a context.
+
+        Args:
+            symbol: Symbol name
+            timeframe: Timeframe
+            context: Hash from sweep_context()
+
+        Returns:
+            Dict mapping param_combo_id to its metrics row
+        """
+        cursor = self._conn.execute(
+            "SELECT param_combo_id, row_json FROM sweep_rows"
+            " WHERE symbol = ? AND timeframe = ? AND context = ?",
+            (symbol, timeframe, context)
+        )
+        return {combo_id: json.loads(row_json) for combo_id, row_json in cursor}
+
+    def put(self, symbol: str, timeframe: str, context: str, rows: List[Dict]) -> None:
+        """
+        Commit completed metrics rows (replacing rows of the same combo).
+
+        Args:
+            symbol: Symbol name
+            timeframe: Timeframe
+            context: Hash from sweep_context()
+            rows: Metrics rows with a 'param_combo_id' key
+        """
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO sweep_rows VALUES (?, ?, ?, ?, ?)",
+            [
+                (symbol, timeframe, context, row['param_combo_id'], json.dumps(row, default=_json_default))
+                for row in rows
+            ]
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
@@ -0,0 +1,372 @@
+"""
+Batched multi-config trade path simulation.
+
+Runs many TradePathConfigs over one shared set of bar arrays instead of
+replaying the bars once per config:
+
+1. ATR is computed once per (atr_period, atr_method), memoized in a
+   FeatureCache, and the entry signals of every quantile set come as one
+   int8 (bars x quantile sets) matrix from a single quantile pass.
+2. For every candidate entry (bar, direction) the first trailing-stop bar and
+   the first TP bar for each TP level are found in one vectorized pass over a
+   (candidates x max Hmax) window. These depend only on the entry, not on the
+   config.
+3. All configs then advance in lockstep: per-config state arrays hold the
+   current bar, and each step gathers the next entry and its exit
+   (min of TP, stop, Hmax and end of data) for every config at once.
+4. MFE/MAE are reduced per config over the chosen holding windows.
+
+Trades are bit-identical to simulate_ofi_trade_paths_for_df run config by
+config; the cost of adding configs is a few array gathers per trade.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .feature_cache import FeatureCache, get_feature_cache
+from .trade_path_simulator import TradePathConfig, _path_extremes
+
+EXIT_REASONS = np.array(["tp_hit", "stop", "hmax", "end_of_data"], dtype=object)
+
+# Elements per (candidates x bars) block when scanning forward windows
+_SCAN_BLOCK = 2_000_000
+
+
+def _first_exit_offsets(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr: np.ndarray,
+    entry_bars: np.ndarray,
+    entry_dirs: np.ndarray,
+    max_hold: int,
+    tp_levels: List[float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First stop / TP bar (as bars after entry) for each candidate entry.
+
+    Uses the same per-bar arithmetic as Trade.update, so the exit bar picked
+    for any Hmax <= max_hold is the one simulate_trade_paths would pick.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        stop_k (n_entries,) and tp_k (n_tp_levels, n_entries); max_hold + 1
+        where the condition never fires within max_hold bars
+    """
+    n = len(close)
+    n_entries = len(entry_bars)
+    none = max_hold + 1
+    stop_k = np.full(n_entries, none, dtype=np.int64)
+    tp_k = np.full((len(tp_levels), n_entries), none, dtype=np.int64)
+
+    offsets = np.arange(1, max_hold + 1)
+    block = max(1, _SCAN_BLOCK // max_hold)
+
+    def first_true(mask):
+        hit = mask.any(axis=1)
+        return np.where(hit, mask.argmax(axis=1) + 1, none)
+
+    for start in range(0, n_entries, block):
+        stop = min(start + block, n_entries)
+        e = entry_bars[start:stop]
+        d = entry_dirs[start:stop]
+
+        bars = e[:, None] + offsets[None, :]
+        in_data = bars <= n - 1
+        bars = np.minimum(bars, n - 1)
+
+        ep = close[e][:, None]
+        a = atr[e][:, None]
+        long = (d == 1)[:, None]
+
+        favorable = np.where(long, high[bars] - ep, ep - low[bars])
+        favorable[np.isnan(favorable)] = -np.inf
+        run_mfe = np.maximum(np.maximum.accumulate(favorable, axis=1), 0.0)
+        mfe_r = run_mfe / a
+        current_r = (close[bars] - ep) * d[:, None].astype(np.float64) / a
+
+        stop_k[start:stop] = first_true(in_data & (mfe_r > 0) & (current_r - mfe_r <= -mfe_r))
+        for i, level in enumerate(tp_levels):
+            tp_k[i, start:stop] = first_true(in_data & (current_r >= level))
+
+    return stop_k, tp_k
+
+
+def simulate_trade_paths_batched(
+    df: pd.DataFrame,
+    signals: np.ndarray,
+    config_signal: np.ndarray,
+    hmax_bars: np.ndarray,
+    tp_R: List[Optional[float]],
+    position_size: np.ndarray,
+) -> pd.DataFrame:
+    """
+    Simulate several configs that share price and ATR arrays.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Bars with 'high', 'low', 'close', 'ATR' columns
+    signals : np.ndarray
+        (n_bars, n_signal_sets) array of -1/0/1 entry signals (e.g. from
+        ofi_signals.signal_matrix)
+    config_signal : np.ndarray
+        Column of `signals` used by each config
+    hmax_bars : np.ndarray
+        Maximum holding period per config
+    tp_R : List[Optional[float]]
+        Static TP per config (None = no TP)
+    position_size : np.ndarray
+        Position size per config
+
+    Returns
+    -------
+    pd.DataFrame
+        simulate_trade_paths columns plus 'config' (index into the config
+        arrays), ordered by config then entry
+    """
+    n = len(df)
+    n_configs = len(config_signal)
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    atr = df['ATR'].to_numpy(dtype=np.float64)
+
+    config_signal = np.asarray(config_signal, dtype=np.int64)
+    hmax_bars = np.asarray(hmax_bars, dtype=np.int64)
+    position_size = np.asarray(position_size, dtype=np.float64)
+    hold_cap = np.maximum(hmax_bars, 1)
+
+    # Candidate entries: non-zero signal, valid ATR, not on the last bar
+    signals = np.asarray(signals)
+    can_enter = (signals != 0) & (atr > 0)[:, None]
+    can_enter[n - 1:, :] = False
+
+    # Next candidate bar at or after each bar, per signal set (n = none)
+    n_sets = signals.shape[1]
+    next_entry = np.full((n_sets, n + 1), n, dtype=np.int64)
+    for s in range(n_sets):
+        cand = np.flatnonzero(can_enter[:, s])
+        pos = np.searchsorted(cand, np.arange(n + 1))
+        next_entry[s] = np.append(cand, n)[pos]
+
+    # Unique (bar, direction) entries across signal sets
+    bar_idx, set_idx = np.nonzero(can_enter)
+    keys = np.unique(bar_idx * 2 + (signals[bar_idx, set_idx] == 1))
+    entry_bars = keys // 2
+    entry_dirs = np.where(keys % 2 == 1, 1, -1)
+    row_of_key = np.full(2 * n, -1, dtype=np.int64)
+    row_of_key[keys] = np.arange(len(keys))
+
+    tp_levels = sorted({tp for tp in tp_R if tp is not None})
+    config_tp = np.array([tp_levels.index(tp) if tp is not None else -1 for tp in tp_R], dtype=np.int64)
+
+    max_hold = int(hold_cap.max()) if n_configs else 1
+    stop_k, tp_k = _first_exit_offsets(
+        high, low, close, atr, entry_bars, entry_dirs, max_hold, tp_levels
+    )
+    # Last row (index -1) is the "never" row for configs without TP
+    tp_k = np.vstack([tp_k, np.full(len(keys), max_hold + 1, dtype=np.int64)])
+
+    # Lockstep walk: per-config current bar
+    pos = np.zeros(n_configs, dtype=np.int64)
+    out_config, out_entry, out_exit, out_dir, out_reason = [], [], [], [], []
+    active = np.arange(n_configs)
+
+    while len(active):
+        e = next_entry[config_signal[active], pos[active]]
+        alive = e < n
+        active = active[alive]
+        e = e[alive]
+        if not len(active):
+            break
+
+        d = signals[e, config_signal[active]].astype(np.int64)
+        row = row_of_key[e * 2 + (d == 1)]
+        first_stop = stop_k[row]
+        first_tp = tp_k[config_tp[active], row]
+        first = np.minimum(first_stop, first_tp)
+        limit = np.minimum(hold_cap[active], n - 1 - e)
+
+        exits_early = first <= limit
+        held = np.where(exits_early, first, limit)
+        reason = np.where(
+            exits_early,
+            np.where(first_tp <= first_stop, 0, 1),
+            np.where(limit >= hmax_bars[active], 2, 3),
+        )
+
+        out_config.append(active)
+        out_entry.append(e)
+        out_exit.append(e + held)
+        out_dir.append(d)
+        out_reason.append(reason)
+
+        # A new entry may open on the exit bar
+        pos[active] = e + held
+
+    if not out_config:
+        return pd.DataFrame()
+
+    config = np.concatenate(out_config)
+    order = np.lexsort((np.concatenate(out_entry), config))
+    config = config[order]
+    entry_idx = np.concatenate(out_entry)[order]
+    exit_idx = np.concatenate(out_exit)[order]
+    direction = np.concatenate(out_dir)[order]
+    reason = np.concatenate(out_reason)[order]
+
+    entry_price = close[entry_idx]
+    entry_atr = atr[entry_idx]
+
+    # MFE/MAE per config (trades of one config never overlap)
+    n_trades = len(config)
+    mfe = np.empty(n_trades)
+    mae = np.empty(n_trades)
+    mfe_r = np.empty(n_trades)
+    mae_r = np.empty(n_trades)
+    t_mfe = np.empty(n_trades, dtype=np.int64)
+    t_mae = np.empty(n_trades, dtype=np.int64)
+    bounds = np.flatnonzero(np.diff(config)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, n_trades]):
+        mfe[lo:hi], mae[lo:hi], mfe_r[lo:hi], mae_r[lo:hi], t_mfe[lo:hi], t_mae[lo:hi] = _path_extremes(
+            high, low, entry_idx[lo:hi], exit_idx[lo:hi], direction[lo:hi],
+            entry_price[lo:hi], entry_atr[lo:hi]
+        )
+
+    size = position_size[config]
+    final_pnl = (close[exit_idx] - entry_price) * direction * size
+    final_r = final_pnl / (entry_atr * size)
+
+    return pd.DataFrame({
+        'config': config,
+        'entry_idx': entry_idx,
+        'entry_time': df.index[entry_idx],
+        'entry_price': entry_price,
+        'direction': direction,
+        'atr': entry_atr,
+        'bars_held': exit_idx - entry_idx,
+        'mfe': mfe,
+        'mae': mae,
+        'mfe_r': mfe_r,
+        'mae_r': mae_r,
+        't_mfe': t_mfe,
+        't_mae': t_mae,
+        'exit_idx': exit_idx,
+        'exit_time': df.index[exit_idx],
+        'exit_price': close[exit_idx],
+        'exit_reason': EXIT_REASONS[reason],
+        'final_r': final_r,
+        'final_pnl': final_pnl,
+    })
+
+
+def simulate_ofi_trade_paths_batched(
+    symbol: str,
+    timeframe: str,
+    df: pd.DataFrame,
+    configs: Dict[str, TradePathConfig],
+    feature_cache: Optional[FeatureCache] = None
+) -> pd.DataFrame:
+    """
+    Batched counterpart of simulate_ofi_trade_paths_for_df.
+
+    Parameters
+    ----------
+    symbol : str
+        Symbol name (e.g., "BTCUSD")
+    timeframe : str
+        Timeframe (e.g., "8H")
+    df : pd.DataFrame
+        Bar data with OFI_z and OHLC columns (ATR will be computed if missing)
+    configs : Dict[str, TradePathConfig]
+        Configs keyed by config id (e.g. ParamCombo.to_id())
+    feature_cache : Optional[FeatureCache]
+        Cache for ATR/signal arrays (None = process-wide default cache)
+
+    Returns
+    -------
+    pd.DataFrame
+        One long trades table: 'config_id' followed by the columns of
+        simulate_ofi_trade_paths_for_df, ordered by config then entry.
+        Configs without trades contribute no rows.
+    """
+    required_cols = ['OFI_z', 'open', 'high', 'low', 'close']
+    missing = [col for col in required_cols if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {missing}")
+
+    if feature_cache is None:
+        feature_cache = get_feature_cache()
+
+    config_ids = list(configs)
+    bars = df[['high', 'low', 'close'] + (['ATR'] if 'ATR' in df.columns else [])]
+
+    # Configs sharing an ATR definition share one batched run
+    atr_groups: Dict[tuple, List[int]] = {}
+    for i, config_id in enumerate(config_ids):
+        cfg = configs[config_id]
+        key = None if 'ATR' in df.columns else (cfg.atr_period, cfg.atr_method)
+        atr_groups.setdefault(key, []).append(i)
+
+    results = []
+
+    for atr_key, members in atr_groups.items():
+        if atr_key is None:
+            group_bars = bars
+        else:
+            group_bars = bars.assign(ATR=feature_cache.atr(symbol, timeframe, df, atr_key[0], atr_key[1]))
+
+        # One signal matrix per (entry_mode, quantile window); columns are
+        # the distinct quantile sets of the group
+        quantile_sets: Dict[tuple, List[tuple]] = {}
+        config_set = []
+        for i in members:
+            cfg = configs[config_ids[i]]
+            mode_key = (cfg.entry_mode, cfg.quantile_window, cfg.quantile_min_periods)
+            sets = quantile_sets.setdefault(mode_key, [])
+            pair = (cfg.entry_q_high, cfg.entry_q_low)
+            if pair not in sets:
+                sets.append(pair)
+            config_set.append((mode_key, sets.index(pair)))
+
+        matrices = []
+        first_column = {}
+        for mode_key, sets in quantile_sets.items():
+            first_column[mode_key] = sum(m.shape[1] for m in matrices)
+            matrices.append(feature_cache.signal_matrix(symbol, timeframe, df, sets, *mode_key))
+        config_signal = [first_column[mode_key] + col for mode_key, col in config_set]
+
+        trades = simulate_trade_paths_batched(
+            group_bars,
+            matrices[0] if len(matrices) == 1 else np.hstack(matrices),
+            np.array(config_signal),
+            np.array([configs[config_ids[i]].hmax_bars for i in members]),
+            [configs[config_ids[i]].tp_R for i in members],
+            np.array([configs[config_ids[i]].position_size for i in members]),
+        )
+        if trades.empty:
+            continue
+        trades['config'] = np.asarray(members)[trades['config'].to_numpy()]
+        results.append(trades)
+
+    if not results:
+        return pd.DataFrame()
+
+    trades_df = pd.concat(results, ignore_index=True)
+    trades_df = trades_df.sort_values(['config', 'entry_idx'], kind='stable', ignore_index=True)
+    trades_df.insert(0, 'config_id', np.asarray(config_ids, dtype=object)[trades_df.pop('config').to_numpy()])
+
+    trades_df['symbol'] = symbol
+    trades_df['timeframe'] = timeframe
+
+    return trades_df.rename(columns={
+        'atr': 'ATR_entry',
+        'mfe_r': 'MFE_R',
+        'mae_r': 'MAE_R',
+        't_mfe': 't_MFE',
+        'final_r': 'final_R'
+    })
@@ -0,0 +1,271 @@
+"""
+Memoized ATR and OFI signal arrays.
+
+Parameter combos that differ only in exit settings (hmax_bars, tp_R) share
+the same ATR and entry signals. FeatureCache keeps those arrays per
+(symbol, timeframe) so they are computed once:
+
+- ATR keyed by (atr_period, atr_method)
+- signals keyed by (entry_mode, entry_q_high, entry_q_low, quantile window),
+  and int8 signal matrices keyed by (entry_mode, quantile sets, window) for
+  callers that evaluate many quantile sets together
+- rolling OFI_z thresholds keyed by (window, min_periods, level), so signal
+  sets sharing a level (e.g. 0.80 in (0.80, 0.20) and (0.80, 0.25)) build
+  it once
+
+Entries also carry a digest of the input columns (and index), so a
+different slice or a rebuilt file of the same symbol/timeframe misses, and
+are evicted least-recently-used once `max_entries` is exceeded. Hashing the
+inputs is a few milliseconds, far below an ATR or quantile pass.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _bars_fingerprint(df: pd.DataFrame, columns: List[str]) -> str:
+    """Digest of the index and the given columns of a bar frame."""
+    row_hashes = pd.util.hash_pandas_object(df[columns], index=True).to_numpy()
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+
+class FeatureCache:
+    """
+    LRU cache of ATR and signal arrays per (symbol, timeframe).
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of cached arrays (ATR and signal arrays count alike)
+    """
+
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_or_compute(self, key: Hashable, compute) -> np.ndarray:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        self.misses += 1
+        values = compute()
+        values.setflags(write=False)
+        self._entries[key] = values
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return values
+
+    def atr(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        atr_period: int = 20,
+        atr_method: str = "rolling_mean"
+    ) -> np.ndarray:
+        """
+        ATR array for the bars (as compute_atr would add it).
+
+        Parameters
+        ----------
+        symbol, timeframe : str
+            Cache scope
+        df : pd.DataFrame
+            Bars with 'high', 'low', 'close'
+        atr_period : int
+            ATR period
+        atr_method : str
+            "rolling_mean" or "ema"
+
+        Returns
+        -------
+        np.ndarray
+            Read-only float64 array aligned with df
+        """
+        from ..factors.indicators import average_true_range
+
+        key = (symbol, timeframe, _bars_fingerprint(df, ['high', 'low', 'close']), 'atr', atr_period, atr_method)
+        return self._get_or_compute(
+            key,
+            lambda: average_true_range(df, period=atr_period, method=atr_method).to_numpy()
+        )
+
+    def rolling_thresholds(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        window: int,
+        levels: Iterable[float],
+        min_periods: Optional[int] = None
+    ) -> Dict[float, np.ndarray]:
+        """
+        Causal OFI_z quantile thresholds for several levels.
+
+        Levels not cached yet are computed together (one order-statistics
+        build for all of them).
+
+        Parameters
+        ----------
+        symbol, timeframe : str
+            Cache scope
+        df : pd.DataFrame
+            Bars with 'OFI_z'
+        window : int
+            Rolling window in bars
+        levels : Iterable[float]
+            Quantile levels
+        min_periods : Optional[int]
+            Minimum values per window (None = window)
+
+        Returns
+        -------
+        Dict[float, np.ndarray]
+            Level -> read-only threshold array aligned with df
+        """
+        from .range_quantiles import rolling_quantiles
+
+        fingerprint = _bars_fingerprint(df, ['OFI_z'])
+        keys = {
+            level: (symbol, timeframe, fingerprint, 'rolling_q', window, min_periods, level)
+            for level in dict.fromkeys(levels)
+        }
+        missing = [level for level, key in keys.items() if key not in self._entries]
+        computed = {}
+        if missing:
+            computed = rolling_quantiles(df['OFI_z'].to_numpy(), window, missing, min_periods=min_periods)
+        return {
+            level: self._get_or_compute(key, lambda level=level: computed[level])
+            for level, key in keys.items()
+        }
+
+    def _signal_matrix(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        quantile_sets: Sequence[Tuple[float, float]],
+        entry_mode: str,
+        quantile_window: Optional[int],
+        quantile_min_periods: Optional[int]
+    ) -> np.ndarray:
+        """Uncached signal matrix; rolling thresholds come from the cache."""
+        from .ofi_signals import quantile_levels, signals_from_thresholds
+        from .range_quantiles import sample_quantiles
+
+        ofi_z = df['OFI_z'].to_numpy(dtype=np.float64)
+        levels = quantile_levels(quantile_sets)
+        if quantile_window is None:
+            thresholds = sample_quantiles(ofi_z, levels)
+        else:
+            thresholds = self.rolling_thresholds(
+                symbol, timeframe, df, quantile_window, levels, quantile_min_periods
+            )
+        return signals_from_thresholds(ofi_z, quantile_sets, thresholds, entry_mode)
+
+    def signal_matrix(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        quantile_sets: Sequence[Tuple[float, float]],
+        entry_mode: str = "trend",
+        quantile_window: Optional[int] = None,
+        quantile_min_periods: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Signals of several quantile sets from one quantile pass.
+
+        Parameters
+        ----------
+        symbol, timeframe : str
+            Cache scope
+        df : pd.DataFrame
+            Bars with 'OFI_z'
+        quantile_sets : Sequence[Tuple[float, float]]
+            (entry_q_high, entry_q_low) pairs, one per column
+        entry_mode : str
+            "trend" or "reversal"
+        quantile_window : Optional[int]
+            Rolling threshold window (None = whole-sample quantiles)
+        quantile_min_periods : Optional[int]
+            Minimum values per rolling window (None = quantile_window)
+
+        Returns
+        -------
+        np.ndarray
+            Read-only int8 array (n_bars x n_quantile_sets), as
+            ofi_signals.signal_matrix
+        """
+        quantile_sets = [tuple(pair) for pair in quantile_sets]
+        key = (
+            symbol, timeframe, _bars_fingerprint(df, ['OFI_z']), 'signal_matrix',
+            entry_mode, tuple(quantile_sets), quantile_window, quantile_min_periods
+        )
+        return self._get_or_compute(key, lambda: self._signal_matrix(
+            symbol, timeframe, df, quantile_sets, entry_mode, quantile_window, quantile_min_periods
+        ))
+
+    def signals(
+        self,
+        symbol: str,
+        timeframe: str,
+        df: pd.DataFrame,
+        entry_mode: str = "trend",
+        entry_q_high: float = 0.8,
+        entry_q_low: float = 0.2,
+        quantile_window: Optional[int] = None,
+        quantile_min_periods: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Signal array for the bars (as generate_ofi_signals would add it).
+
+        Parameters
+        ----------
+        symbol, timeframe : str
+            Cache scope
+        df : pd.DataFrame
+            Bars with 'OFI_z'
+        entry_mode : str
+            "trend" or "reversal"
+        entry_q_high, entry_q_low : float
+            OFI_z quantile thresholds
+        quantile_window : Optional[int]
+            Rolling threshold window (None = whole-sample quantiles)
+        quantile_min_periods : Optional[int]
+            Minimum values per rolling window (None = quantile_window)
+
+        Returns
+        -------
+        np.ndarray
+            Read-only int8 array of -1/0/1 aligned with df
+        """
+        key = (
+            symbol, timeframe, _bars_fingerprint(df, ['OFI_z']), 'signal',
+            entry_mode, entry_q_high, entry_q_low, quantile_window, quantile_min_periods
+        )
+        return self._get_or_compute(key, lambda: self._signal_matrix(
+            symbol, timeframe, df, [(entry_q_high, entry_q_low)], entry_mode,
+            quantile_window, quantile_min_periods
+        )[:, 0].copy())
+
+    def clear(self) -> None:
+        """Drop all cached arrays."""
+        self._entries.clear()
+
+
+# Shared by the simulators when no cache is passed explicitly
+_default_cache = FeatureCache()
+
+
+def get_feature_cache() -> FeatureCache:
+    """Return the process-wide default FeatureCache."""
+    return _default_cache
@@ -1,18 +1,146 @@
 """
 Phase 4.1: OFI Signal Generation
 
-Generate long/short entry signals based on OFI_z quantile thresholds.
+Generate long/short entry signals based on OFI_z quantile thresholds,
+either over the whole sample or causal (rolling window of past bars).
+signal_matrix() evaluates many (q_high, q_low) sets at once as an int8
+(bars x sets) matrix from a single quantile pass.
 """
 
+from typing import Dict, List, Optional, Sequence, Tuple
+
 import pandas as pd
 import numpy as np
 
+from ..factors.indicators import average_true_range
+from .range_quantiles import rolling_quantiles, sample_quantiles
+
+
+def _entry_sides(entry_mode: str) -> Tuple[int, int]:
+    """Signal of a bar at the high / low threshold for an entry mode."""
+    if entry_mode == "trend":
+        return 1, -1
+    if entry_mode == "reversal":
+        return -1, 1
+    raise ValueError(f"Unknown entry_mode: {entry_mode}. Must be 'trend' or 'reversal'.")
+
+
+def quantile_levels(quantile_sets: Sequence[Tuple[float, float]]) -> List[float]:
+    """Distinct levels of (entry_q_high, entry_q_low) pairs, in first-seen order."""
+    return list(dict.fromkeys(q for pair in quantile_sets for q in pair))
+
+
+def signals_from_thresholds(
+    ofi_z: np.ndarray,
+    quantile_sets: Sequence[Tuple[float, float]],
+    thresholds: Dict[float, object],
+    entry_mode: str = "trend"
+) -> np.ndarray:
+    """
+    Entry signal matrix from OFI_z and precomputed thresholds.
+
+    Whole-sample (scalar) thresholds are ranked once: each bar's position
+    among the sorted distinct thresholds tells which of them it reaches,
+    so every quantile set costs two integer comparisons per bar.
+
+    Parameters
+    ----------
+    ofi_z : np.ndarray
+        OFI_z values
+    quantile_sets : Sequence[Tuple[float, float]]
+        (entry_q_high, entry_q_low) pairs, one per column
+    thresholds : Dict[float, float or np.ndarray]
+        Level -> threshold (scalar, or array aligned with ofi_z; NaN
+        never triggers)
+    entry_mode : str
+        "trend" or "reversal" (see generate_ofi_signals)
+
+    Returns
+    -------
+    np.ndarray
+        int8 array (n_bars x n_quantile_sets) of 1 (long), -1 (short) and
+        0; a bar past both thresholds of a set takes the low-threshold side
+    """
+    high_side, low_side = _entry_sides(entry_mode)
+    ofi_z = np.asarray(ofi_z, dtype=np.float64)
+
+    if all(np.ndim(value) == 0 for value in thresholds.values()):
+        levels = np.array(sorted({float(v) for v in thresholds.values() if not np.isnan(v)}))
+        # Thresholds at or below / strictly below each bar (NaN bars reach none)
+        missing = np.isnan(ofi_z)
+        reached = np.searchsorted(levels, ofi_z, side='right').astype(np.int32)
+        reached[missing] = 0
+        below = np.searchsorted(levels, ofi_z, side='left').astype(np.int32)
+        below[missing] = len(levels)
+
+        # Rank of each set's thresholds; NaN thresholds are out of reach
+        def ranks(levels_of_sets, unreachable):
+            value = np.array([thresholds[q] for q in levels_of_sets], dtype=np.float64)
+            rank = np.searchsorted(levels, value).astype(np.int32)
+            return np.where(np.isnan(value), unreachable, rank)[None, :]
+
+        high_rank = ranks([q_high for q_high, _ in quantile_sets], len(levels))
+        low_rank = ranks([q_low for _, q_low in quantile_sets], -1)
+
+        signals = (reached[:, None] > high_rank).view(np.int8) * np.int8(high_side)
+        np.copyto(signals, np.int8(low_side), where=below[:, None] <= low_rank)
+        return signals
+
+    signals = np.zeros((len(ofi_z), len(quantile_sets)), dtype=np.int8)
+    for col, (q_high, q_low) in enumerate(quantile_sets):
+        signals[ofi_z >= thresholds[q_high], col] = high_side
+        signals[ofi_z <= thresholds[q_low], col] = low_side
+    return signals
+
+
+def signal_matrix(
+    ofi_z: np.ndarray,
+    quantile_sets: Sequence[Tuple[float, float]],
+    entry_mode: str = "trend",
+    quantile_window: Optional[int] = None,
+    quantile_min_periods: Optional[int] = None
+) -> np.ndarray:
+    """
+    Entry signals of several quantile sets at once.
+
+    OFI_z is sorted once (whole sample) or its order statistics are built
+    once (rolling window) for all levels of all sets.
+
+    Parameters
+    ----------
+    ofi_z : np.ndarray
+        OFI_z values
+    quantile_sets : Sequence[Tuple[float, float]]
+        (entry_q_high, entry_q_low) pairs, one per column
+    entry_mode : str
+        "trend" or "reversal" (see generate_ofi_signals)
+    quantile_window : Optional[int]
+        Rolling threshold window (None = whole-sample quantiles)
+    quantile_min_periods : Optional[int]
+        Minimum values per rolling window (None = quantile_window)
+
+    Returns
+    -------
+    np.ndarray
+        int8 array (n_bars x n_quantile_sets); column j equals the
+        'signal' column generate_ofi_signals adds for quantile_sets[j]
+    """
+    ofi_z = np.asarray(ofi_z, dtype=np.float64)
+    levels = quantile_levels(quantile_sets)
+    if quantile_window is None:
+        thresholds = sample_quantiles(ofi_z, levels)
+    else:
+        thresholds = rolling_quantiles(ofi_z, quantile_window, levels, min_periods=quantile_min_periods)
+    return signals_from_thresholds(ofi_z, quantile_sets, thresholds, entry_mode)
+
 
 def generate_ofi_signals(
     df: pd.DataFrame,
     entry_mode: str = "trend",
     entry_q_high: float = 0.8,
     entry_q_low: float = 0.2,
+    quantile_window: Optional[int] = None,
+    quantile_min_periods: Optional[int] = None,
 ) -> pd.DataFrame:
     """
     Generate entry signals based on OFI_z quantiles.
@@ -29,6 +157,14 @@ def generate_ofi_signals(
         Upper quantile threshold (e.g., 0.8 for 80th percentile)
     entry_q_low : float
         Lower quantile threshold (e.g., 0.2 for 20th percentile)
+    quantile_window : Optional[int]
+        None: thresholds are quantiles of the whole sample (they see
+        future bars). Otherwise thresholds are causal: quantiles of the
+        last quantile_window bars up to and including each bar (see
+        range_quantiles.rolling_quantiles)
+    quantile_min_periods : Optional[int]
+        Minimum OFI_z values in a rolling window before it signals
+        (None = quantile_window)
     
     Returns
     -------
@@ -37,28 +173,18 @@ def generate_ofi_signals(
         - 1: long entry
         - -1: short entry
         - 0: no entry
+
+    Notes
+    -----
+    For several quantile sets use signal_matrix(), which shares the
+    quantile pass between them.
     """
     df = df.copy()
-    
-    # Calculate quantile thresholds
-    q_high_val = df['OFI_z'].quantile(entry_q_high)
-    q_low_val = df['OFI_z'].quantile(entry_q_low)
-    
-    # Initialize signal column
-    df['signal'] = 0
-    
-    if entry_mode == "trend":
-        # Trend following: high OFI_z → long, low OFI_z → short
-        df.loc[df['OFI_z'] >= q_high_val, 'signal'] = 1   # Long
-        df.loc[df['OFI_z'] <= q_low_val, 'signal'] = -1   # Short
-    
-    elif entry_mode == "reversal":
-        # Mean reversion: high OFI_z → short, low OFI_z → long
-        df.loc[df['OFI_z'] >= q_high_val, 'signal'] = -1  # Short
-        df.loc[df['OFI_z'] <= q_low_val, 'signal'] = 1    # Long
-    
-    else:
-        raise ValueError(f"Unknown entry_mode: {entry_mode}. Must be 'trend' or 'reversal'.")
+    signals = signal_matrix(
+        df['OFI_z'].to_numpy(dtype=np.float64), [(entry_q_high, entry_q_low)], entry_mode,
+        quantile_window=quantile_window, quantile_min_periods=quantile_min_periods
+    )
+    df['signal'] = signals[:, 0].astype(np.int64)
     
     return df
 
@@ -86,21 +212,7 @@ def compute_atr(
         Input dataframe with added 'ATR' column
     """
     df = df.copy()
-    
-    # Calculate True Range
-    high_low = df['high'] - df['low']
-    high_close = np.abs(df['high'] - df['close'].shift(1))
-    low_close = np.abs(df['low'] - df['close'].shift(1))
-    
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    
-    # Calculate ATR
-    if method == "rolling_mean":
-        df['ATR'] = tr.rolling(window=period, min_periods=1).mean()
-    elif method == "ema":
-        df['ATR'] = tr.ewm(span=period, adjust=False).mean()
-    else:
-        raise ValueError(f"Unknown ATR method: {method}")
+    df['ATR'] = average_true_range(df, period=period, method=method)
     
     return df
 
@@ -111,7 +223,9 @@ def prepare_trading_data(
     entry_q_high: float = 0.8,
     entry_q_low: float = 0.2,
     atr_period: int = 20,
-    atr_method: str = "rolling_mean"
+    atr_method: str = "rolling_mean",
+    quantile_window: Optional[int] = None,
+    quantile_min_periods: Optional[int] = None
 ) -> pd.DataFrame:
     """
     Prepare complete trading data with signals and ATR.
@@ -132,6 +246,10 @@ def prepare_trading_data(
         ATR period
     atr_method : str
         ATR calculation method
+    quantile_window : Optional[int]
+        Rolling window of the entry thresholds (None = whole sample)
+    quantile_min_periods : Optional[int]
+        Minimum values per rolling window (None = quantile_window)
     
     Returns
     -------
@@ -139,7 +257,10 @@ def prepare_trading_data(
         Complete trading data with 'signal' and 'ATR' columns
     """
     # Generate signals
-    df = generate_ofi_signals(df, entry_mode, entry_q_high, entry_q_low)
+    df = generate_ofi_signals(
+        df, entry_mode, entry_q_high, entry_q_low,
+        quantile_window=quantile_window, quantile_min_periods=quantile_min_periods
+    )
     
     # Compute ATR
     df = compute_atr(df, atr_period, atr_method)
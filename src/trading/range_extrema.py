@@ -0,0 +1,58 @@
+"""
+Forward-window extrema for the trade path simulator.
+
+Sparse tables over a price array answer max/min over any window [i, j]
+with two lookups, which lets the simulator test a whole block of holding
+bars at once ("can TP, the trailing stop or Hmax fire anywhere in here?")
+instead of stepping through every bar.
+"""
+
+import numpy as np
+
+
+class SparseTable:
+    """
+    Range max or min over windows of at most `max_window` bars.
+
+    Level k holds the extremum of every window of length 2**k, so a query
+    combines two overlapping level-k windows. Levels are NumPy arrays read
+    through memoryviews, so scalar lookups return plain floats. NaNs
+    are ignored (np.fmax / np.fmin semantics); an all-NaN window returns NaN.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1-D float array
+    max_window : int
+        Longest window that will be queried (bounds memory to
+        log2(max_window) levels)
+    op : str
+        "max" or "min"
+    """
+
+    def __init__(self, values: np.ndarray, max_window: int, op: str = "max"):
+        if op not in ("max", "min"):
+            raise ValueError(f"Unknown op: {op}. Must be 'max' or 'min'.")
+        self.op = op
+        reducer = np.fmax if op == "max" else np.fmin
+
+        level = np.ascontiguousarray(values, dtype=np.float64)
+        self.levels = [memoryview(level)]
+        k = 1
+        while (1 << k) <= min(max_window, len(values)):
+            half = 1 << (k - 1)
+            level = reducer(level[:-half], level[half:])
+            self.levels.append(memoryview(level))
+            k += 1
+
+    def query(self, i: int, j: int) -> float:
+        """Extremum of values[i:j + 1] (i <= j, j - i + 1 <= max_window)."""
+        k = (j - i + 1).bit_length() - 1
+        level = self.levels[k]
+        a = level[i]
+        b = level[j - (1 << k) + 1]
+        if b != b:
+            return a
+        if self.op == "max":
+            return a if a >= b else b
+        return a if a <= b else b
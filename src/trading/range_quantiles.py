@@ -0,0 +1,272 @@
+"""
+Causal rolling quantiles for entry thresholds.
+
+An order-statistics structure over a bar series answers "k-th smallest
+value of the `window` bars ending at bar t" for every t at once:
+
+- The series is cut into chunks of 2 * window bars starting every
+  `window` bars, so every trailing window lies inside one chunk.
+- Each chunk gets a wavelet matrix over the ranks of its values: level b
+  splits the ranks by bit b (stably) and keeps the running count of zero
+  bits, so a query narrows down to the k-th smallest in log2(2 * window)
+  steps. Steps only gather and compare integer arrays, so each one runs
+  for all bars in a single NumPy pass.
+- The next order statistic (needed to interpolate a quantile) is one more
+  k-th smallest query, so it costs the same log2(2 * window) steps however
+  the chunk's ranks interleave with the window.
+
+Thresholds for many quantile levels share one build, and the cost does
+not grow with the window length beyond the log2 factor (pandas
+rolling().quantile is one skiplist pass per level).
+
+sample_quantiles() is the whole-sample counterpart: one sort serves every
+level.
+"""
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+class RollingOrderStatistics:
+    """
+    Order statistics of the trailing windows of a fixed series.
+
+    NaNs rank above every number, so the k-th smallest of a window is a
+    number as long as k is below the window's count of numbers.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1-D float array
+    window : int
+        Window length in bars
+    """
+
+    def __init__(self, values: np.ndarray, window: int):
+        if window < 1:
+            raise ValueError(f"window must be positive, got {window}")
+        values = np.asarray(values, dtype=np.float64)
+        n = len(values)
+        self.n = n
+        self.window = window
+        self.chunk_length = length = 2 * window
+        n_chunks = (n - 1) // window + 1 if n > 0 else 0
+
+        # Chunk c holds bars c * window .. c * window + 2 * window - 1
+        # (NaN-padded past the end, never inside a window)
+        bar = np.arange(n_chunks)[:, None] * window + np.arange(length)[None, :]
+        chunks = np.where(bar < n, values[np.minimum(bar, max(n - 1, 0))], np.nan)
+
+        index_dtype = np.int32 if n_chunks * (length + 1) < 2**31 else np.int64
+        order = np.argsort(chunks, axis=1).astype(index_dtype)
+        self.sorted_values = np.take_along_axis(chunks, order, axis=1).ravel()
+        self.positions = order.ravel()
+
+        # Flat scatter targets are offset by the start of their chunk row
+        row_start = (np.arange(n_chunks, dtype=index_dtype) * length)[:, None]
+        ranks = np.empty(n_chunks * length, dtype=index_dtype)
+        ranks[(order + row_start).ravel()] = np.tile(np.arange(length, dtype=index_dtype), n_chunks)
+        ranks = ranks.reshape(n_chunks, length)
+
+        self.n_bits = max(1, (length - 1).bit_length())
+        self.zero_prefix = []
+        self.n_zeros = []
+        offsets = np.arange(length, dtype=index_dtype) + row_start
+        for bit in range(self.n_bits - 1, -1, -1):
+            is_zero = np.bitwise_and(ranks, 1 << bit) == 0
+            prefix = np.zeros((n_chunks, length + 1), dtype=index_dtype)
+            np.cumsum(is_zero, axis=1, out=prefix[:, 1:])
+            n_zeros = prefix[:, -1].copy()
+
+            # Stable partition: zeros keep their order, then the ones
+            zeros_before = prefix[:, :-1]
+            target = np.where(is_zero, zeros_before + row_start, offsets + n_zeros[:, None] - zeros_before)
+            partitioned = np.empty(n_chunks * length, dtype=index_dtype)
+            partitioned[target.ravel()] = ranks.ravel()
+            ranks = partitioned.reshape(n_chunks, length)
+
+            self.zero_prefix.append(prefix.ravel())
+            self.n_zeros.append(n_zeros)
+
+    def _locate(self, stop: np.ndarray):
+        """Chunk of each window ending before stop, and its local bounds."""
+        start = np.maximum(stop - self.window, 0)
+        chunk = start // self.window
+        return chunk, start - chunk * self.window, stop - chunk * self.window
+
+    def kth_smallest(self, stop: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """
+        k-th smallest (0-based) value of values[max(0, stop - window):stop].
+
+        Parameters
+        ----------
+        stop : np.ndarray
+            End (exclusive) of each window, 1 <= stop <= len(values)
+        k : np.ndarray
+            Order statistic, 0 <= k < window length
+
+        Returns
+        -------
+        np.ndarray
+            Float array with one value per query
+        """
+        return self.sorted_values[self._kth_rank(stop, k)]
+
+    def _kth_rank(self, stop: np.ndarray, k: np.ndarray) -> np.ndarray:
+        """Flat index (into sorted_values) of each k-th smallest."""
+        dtype = self.positions.dtype
+        chunk, start, stop = self._locate(np.asarray(stop, dtype=np.int64))
+        row = (chunk * (self.chunk_length + 1)).astype(dtype)
+        start = start.astype(dtype)
+        stop = stop.astype(dtype)
+        k = np.asarray(k, dtype=dtype).copy()
+        rank = np.zeros(len(k), dtype=dtype)
+
+        zeros_before = np.empty_like(k)
+        zeros_through = np.empty_like(k)
+        zeros = np.empty_like(k)
+        one = np.empty(len(k), dtype=bool)
+        for level, bit in enumerate(range(self.n_bits - 1, -1, -1)):
+            prefix = self.zero_prefix[level]
+            n_zeros = self.n_zeros[level][chunk]
+            np.take(prefix, row + start, out=zeros_before)
+            np.take(prefix, row + stop, out=zeros_through)
+            np.subtract(zeros_through, zeros_before, out=zeros)
+            np.greater_equal(k, zeros, out=one)
+
+            # Ones: skip the zeros of the range and move past the zero block
+            np.subtract(k, zeros, out=k, where=one)
+            start += n_zeros - zeros_before
+            np.copyto(start, zeros_before, where=~one)
+            stop += n_zeros - zeros_through
+            np.copyto(stop, zeros_through, where=~one)
+            rank |= one.astype(dtype) << bit
+
+        return chunk * self.chunk_length + rank
+
+
+def _linear_positions(count: np.ndarray, q: float):
+    """
+    Lower order statistic and interpolation weight of level q.
+
+    np.percentile's linear method (q arrives as q * 100 and is divided
+    back); `above` marks samples where the lower statistic is the largest.
+    """
+    q_frac = (q * 100.0) / 100.0
+    virtual = (count - 1) * q_frac
+    previous = np.floor(virtual)
+    above = virtual >= count - 1
+    lower = np.where(above, count - 1, previous).astype(np.int64)
+    gamma = virtual - np.where(above, -1.0, previous)
+    return lower, gamma, above
+
+
+def _interpolate(a: np.ndarray, b: np.ndarray, gamma: np.ndarray) -> np.ndarray:
+    """np.percentile's lerp between neighbouring order statistics."""
+    diff = b - a
+    return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+
+def sample_quantiles(values: np.ndarray, quantiles: Iterable[float]) -> Dict[float, float]:
+    """
+    Whole-sample quantiles of a series for several levels from one sort.
+
+    Matches pd.Series.quantile (linear interpolation, NaNs skipped) exactly.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1-D float array (e.g. OFI_z)
+    quantiles : Iterable[float]
+        Levels in [0, 1]
+
+    Returns
+    -------
+    Dict[float, float]
+        Level -> quantile (NaN if values holds no numbers)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ordered = np.sort(values[~np.isnan(values)])
+    count = len(ordered)
+
+    out = {}
+    for q in dict.fromkeys(quantiles):
+        if count == 0:
+            out[q] = np.nan
+            continue
+        lower, gamma, _ = _linear_positions(np.int64(count), q)
+        upper = min(int(lower) + 1, count - 1)
+        out[q] = float(_interpolate(ordered[lower], ordered[upper], gamma))
+    return out
+
+
+def rolling_quantiles(
+    values: np.ndarray,
+    window: int,
+    quantiles: Iterable[float],
+    min_periods: Optional[int] = None
+) -> Dict[float, np.ndarray]:
+    """
+    Trailing-window quantiles of a series for several levels at once.
+
+    The window of bar t is values[t - window + 1 .. t] (the bar itself and
+    the bars before it, never later ones), NaNs skipped. Quantiles use
+    linear interpolation and match np.percentile on each window exactly.
+
+    Parameters
+    ----------
+    values : np.ndarray
+        1-D float array (e.g. OFI_z)
+    window : int
+        Window length in bars
+    quantiles : Iterable[float]
+        Levels in [0, 1]
+    min_periods : Optional[int]
+        Minimum non-NaN values in a window, 0..window (None = window)
+
+    Returns
+    -------
+    Dict[float, np.ndarray]
+        Level -> float array aligned with values; NaN where the window
+        holds fewer than min_periods values
+
+    Raises
+    ------
+    ValueError
+        If window < 1 or min_periods is outside 0..window (as
+        pd.Series.rolling)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    quantiles = list(dict.fromkeys(quantiles))
+    n = len(values)
+    if window < 1:
+        raise ValueError(f"window must be positive, got {window}")
+    min_periods = window if min_periods is None else min_periods
+    if min_periods < 0:
+        raise ValueError(f"min_periods must be >= 0, got {min_periods}")
+    if min_periods > window:
+        raise ValueError(f"min_periods {min_periods} must be <= window {window}")
+
+    valid_before = np.concatenate([[0], np.cumsum(~np.isnan(values))])
+    stop = np.arange(1, n + 1)
+    count = valid_before[stop] - valid_before[np.maximum(stop - window, 0)]
+    rows = np.flatnonzero(count >= max(min_periods, 1))
+
+    out = {q: np.full(n, np.nan) for q in quantiles}
+    if len(rows) == 0 or not quantiles:
+        return out
+
+    stats = RollingOrderStatistics(values, window)
+    stop, count = stop[rows], count[rows]
+
+    for q in quantiles:
+        lower, gamma, above = _linear_positions(count, q)
+        lower_rank = stats._kth_rank(stop, lower)
+        a = stats.sorted_values[lower_rank]
+        b = a.copy()
+        has_next = ~above
+        b[has_next] = stats.kth_smallest(stop[has_next], lower[has_next] + 1)
+
+        out[q][rows] = _interpolate(a, b, gamma)
+    return out
@@ -8,12 +8,19 @@ Simulate individual trades with detailed path tracking:
 - Track MFE, MAE, t_MFE, final R, exit reason, etc.
 """
 
+import math
+
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 from enum import Enum
 
+from ..utils.trade_metrics import column_stats, exit_reason_shares
+
+if TYPE_CHECKING:
+    from .feature_cache import FeatureCache
+
 
 class EntryMode(Enum):
     """Entry mode for OFI signals."""
@@ -36,6 +43,12 @@ class TradePathConfig:
         tp_R: Optional static take profit in R-multiples (None = no TP)
         position_size: Fixed position size (notional)
         save_paths: Whether to save bar-by-bar path history
+        engine: "python" (Trade objects, row by row), "numpy" (array state
+            machine) or "jump" (forward-window extrema); same trades
+        quantile_window: Rolling window (bars) of the causal entry
+            thresholds; None = quantiles of the whole sample
+        quantile_min_periods: Minimum OFI_z values per rolling window
+            (None = quantile_window)
     """
     entry_mode: str = "trend"
     entry_q_high: float = 0.8
@@ -46,6 +59,9 @@ class TradePathConfig:
     tp_R: Optional[float] = None  # New for Phase 5
     position_size: float = 1.0
     save_paths: bool = False
+    engine: str = "python"
+    quantile_window: Optional[int] = None
+    quantile_min_periods: Optional[int] = None
 
 
 class Trade:
@@ -157,7 +173,8 @@ def simulate_trade_paths(
     hmax_bars: int = 150,
     position_size: float = 1.0,
     save_paths: bool = False,
-    tp_R: Optional[float] = None
+    tp_R: Optional[float] = None,
+    engine: str = "python"
 ) -> pd.DataFrame:
     """
     Simulate trades based on signals in the dataframe.
@@ -181,12 +198,23 @@ def simulate_trade_paths(
         Whether to save bar-by-bar path history
     tp_R : Optional[float]
         Static take profit level in R-multiples (None = no TP)
+    engine : str
+        "python" walks the rows with Trade objects; "numpy" runs the same
+        state machine over contiguous arrays; "jump" skips holding bars
+        with forward-window extrema. All three return identical trades
 
     Returns
     -------
     pd.DataFrame
         Trade summary with one row per trade
     """
+    if engine == "numpy":
+        return _simulate_trade_paths_arrays(df, hmax_bars, position_size, tp_R)
+    elif engine == "jump":
+        return _simulate_trade_paths_jump(df, hmax_bars, position_size, tp_R)
+    elif engine != "python":
+        raise ValueError(f"Unknown engine: {engine}. Must be 'python', 'numpy' or 'jump'.")
+
     trades = []
     active_trade = None
     
@@ -260,6 +288,359 @@ def simulate_trade_paths(
     return trade_df
 
 
+def _simulate_trade_paths_arrays(
+    df: pd.DataFrame,
+    hmax_bars: int,
+    position_size: float,
+    tp_R: Optional[float]
+) -> pd.DataFrame:
+    """
+    Array engine for simulate_trade_paths.
+
+    Reads high/low/close/signal/ATR once and runs the entry / TP / trailing
+    stop / Hmax state machine over plain floats, writing each trade into
+    preallocated column arrays. Arithmetic follows Trade.update/Trade.close
+    operation for operation, so the trades are bit-identical to the
+    "python" engine.
+    """
+    n = len(df)
+    high = df['high'].to_numpy(dtype=np.float64).tolist()
+    low = df['low'].to_numpy(dtype=np.float64).tolist()
+    close = df['close'].to_numpy(dtype=np.float64).tolist()
+    signal = df['signal'].to_numpy().tolist()
+    atr = df['ATR'].to_numpy(dtype=np.float64).tolist()
+
+    # At most one trade per bar
+    entry_idx = np.empty(n, dtype=np.int64)
+    exit_idx = np.empty(n, dtype=np.int64)
+    direction = np.empty(n, dtype=np.int64)
+    bars_held = np.empty(n, dtype=np.int64)
+    t_mfe = np.empty(n, dtype=np.int64)
+    t_mae = np.empty(n, dtype=np.int64)
+    mfe = np.empty(n, dtype=np.float64)
+    mae = np.empty(n, dtype=np.float64)
+    mfe_r = np.empty(n, dtype=np.float64)
+    mae_r = np.empty(n, dtype=np.float64)
+    final_pnl = np.empty(n, dtype=np.float64)
+    final_r = np.empty(n, dtype=np.float64)
+    exit_reason = np.empty(n, dtype=object)
+
+    n_trades = 0
+    idx = 0
+    while idx < n:
+        # Entry: non-zero signal with valid ATR (NaN fails atr > 0)
+        if signal[idx] == 0 or not atr[idx] > 0:
+            idx += 1
+            continue
+
+        d = int(signal[idx])
+        a = atr[idx]
+        ep = close[idx]
+        t_mfe_i = t_mae_i = held = 0
+        mfe_i = mae_i = mfe_r_i = mae_r_i = 0.0
+        reason = None
+
+        j = idx + 1
+        while j < n:
+            held += 1
+            if d == 1:
+                favorable = high[j] - ep
+                adverse = low[j] - ep
+            else:
+                favorable = ep - low[j]
+                adverse = ep - high[j]
+
+            if favorable > mfe_i:
+                mfe_i = favorable
+                mfe_r_i = favorable / a
+                t_mfe_i = held
+            if adverse < mae_i:
+                mae_i = adverse
+                mae_r_i = adverse / a
+                t_mae_i = held
+
+            current_r = (close[j] - ep) * d / a
+
+            if tp_R is not None and current_r >= tp_R:
+                reason = "tp_hit"
+            elif mfe_r_i > 0 and current_r - mfe_r_i <= -mfe_r_i:
+                reason = "stop"
+            elif held >= hmax_bars:
+                reason = "hmax"
+            elif j == n - 1:
+                reason = "end_of_data"
+
+            if reason is not None:
+                break
+            j += 1
+
+        if reason is None:
+            # Entered on the last bar: never updated, never closed
+            break
+
+        k = n_trades
+        entry_idx[k] = idx
+        exit_idx[k] = j
+        direction[k] = d
+        bars_held[k] = held
+        mfe[k] = mfe_i
+        mae[k] = mae_i
+        mfe_r[k] = mfe_r_i
+        mae_r[k] = mae_r_i
+        t_mfe[k] = t_mfe_i
+        t_mae[k] = t_mae_i
+        final_pnl[k] = (close[j] - ep) * d * position_size
+        final_r[k] = final_pnl[k] / (a * position_size)
+        exit_reason[k] = reason
+        n_trades += 1
+
+        # A new entry may open on the exit bar
+        idx = j
+
+    return _trades_to_frame(
+        df, close, atr, n_trades, entry_idx, exit_idx, direction, bars_held,
+        mfe, mae, mfe_r, mae_r, t_mfe, t_mae, exit_reason, final_r, final_pnl
+    )
+
+
+def _simulate_trade_paths_jump(
+    df: pd.DataFrame,
+    hmax_bars: int,
+    position_size: float,
+    tp_R: Optional[float]
+) -> pd.DataFrame:
+    """
+    Extrema-jump engine for simulate_trade_paths.
+
+    Instead of stepping through every holding bar, each open trade gallops
+    over blocks of doubling length. Sparse tables give the block's best
+    high/low and best/worst close, which decide whether TP or the trailing
+    stop can fire anywhere in the block:
+
+    - TP is monotone in close, so the best close decides it exactly.
+    - The trailing stop needs MFE_R > 0 and current_R - MFE_R <= -MFE_R.
+      With current_R > 0 that only holds when current_R is within one ulp
+      of MFE_R, so a block whose worst current_R exceeds the ulp of its
+      largest possible MFE_R cannot stop.
+
+    Blocks that cannot exit are skipped (carrying MFE forward), blocks that
+    might are halved down to single bars, which are evaluated exactly as in
+    Trade.update. Per-trade cost is O(log hold) table lookups; MFE/MAE and
+    their times are then reduced for all trades at once (holding windows
+    never overlap). Trades are bit-identical to the "python" engine.
+    """
+    from .range_extrema import SparseTable
+
+    n = len(df)
+    high = np.ascontiguousarray(df['high'].to_numpy(dtype=np.float64))
+    low = np.ascontiguousarray(df['low'].to_numpy(dtype=np.float64))
+    close = np.ascontiguousarray(df['close'].to_numpy(dtype=np.float64))
+    atr = np.ascontiguousarray(df['ATR'].to_numpy(dtype=np.float64))
+    signal = df['signal'].to_numpy()
+
+    # Scalar reads through memoryviews return plain floats
+    close_mv = memoryview(close)
+    high_mv = memoryview(high)
+    low_mv = memoryview(low)
+    atr_mv = memoryview(atr)
+
+    # Only bars with a non-zero signal and a valid ATR can open a trade
+    entry_bars = np.flatnonzero((signal != 0) & (atr > 0)).tolist()
+    entry_signal = signal.tolist()
+
+    hold_cap = max(hmax_bars, 1)
+    high_max = SparseTable(high, hold_cap, "max")
+    low_min = SparseTable(low, hold_cap, "min")
+    close_max = SparseTable(close, hold_cap, "max")
+    close_min = SparseTable(close, hold_cap, "min")
+
+    entry_idx, exit_idx, direction, exit_reason = [], [], [], []
+
+    next_entry = 0
+    idx = 0
+    while True:
+        # Jump to the first candidate entry bar at or after idx
+        while next_entry < len(entry_bars) and entry_bars[next_entry] < idx:
+            next_entry += 1
+        if next_entry == len(entry_bars) or entry_bars[next_entry] >= n - 1:
+            break
+        idx = entry_bars[next_entry]
+
+        d = int(entry_signal[idx])
+        a = atr_mv[idx]
+        ep = close_mv[idx]
+        last = min(idx + hold_cap, n - 1)
+        run_mfe = 0.0
+        reason = None
+
+        # Gallop over blocks strictly before the forced exit bar
+        pos = idx + 1
+        size = 1
+        while pos < last:
+            end = min(pos + size, last) - 1
+            if d == 1:
+                fav = high_max.query(pos, end) - ep
+            else:
+                fav = ep - low_min.query(pos, end)
+            block_mfe = fav if fav > run_mfe else run_mfe
+
+            may_exit = False
+            if tp_R is not None:
+                best_c = close_max.query(pos, end) if d == 1 else close_min.query(pos, end)
+                may_exit = (best_c - ep) * d / a >= tp_R
+            if not may_exit and block_mfe > 0:
+                worst_c = close_min.query(pos, end) if d == 1 else close_max.query(pos, end)
+                worst_r = (worst_c - ep) * d / a
+                may_exit = not worst_r > math.ulp(block_mfe / a)
+
+            if not may_exit:
+                run_mfe = block_mfe
+                pos = end + 1
+                size *= 2
+            elif size > 1:
+                size //= 2
+            else:
+                # Single bar that might exit: evaluate as Trade.update does
+                favorable = high_mv[pos] - ep if d == 1 else ep - low_mv[pos]
+                if favorable > run_mfe:
+                    run_mfe = favorable
+                run_mfe_r = run_mfe / a
+                current_r = (close_mv[pos] - ep) * d / a
+                if tp_R is not None and current_r >= tp_R:
+                    reason = "tp_hit"
+                    break
+                if run_mfe_r > 0 and current_r - run_mfe_r <= -run_mfe_r:
+                    reason = "stop"
+                    break
+                pos += 1
+
+        if reason is None:
+            # Forced exit bar: TP/stop still take precedence
+            favorable = high_mv[pos] - ep if d == 1 else ep - low_mv[pos]
+            if favorable > run_mfe:
+                run_mfe = favorable
+            run_mfe_r = run_mfe / a
+            current_r = (close_mv[pos] - ep) * d / a
+            if tp_R is not None and current_r >= tp_R:
+                reason = "tp_hit"
+            elif run_mfe_r > 0 and current_r - run_mfe_r <= -run_mfe_r:
+                reason = "stop"
+            elif pos - idx >= hmax_bars:
+                reason = "hmax"
+            else:
+                reason = "end_of_data"
+
+        entry_idx.append(idx)
+        exit_idx.append(pos)
+        direction.append(d)
+        exit_reason.append(reason)
+
+        # A new entry may open on the exit bar
+        idx = pos
+
+    n_trades = len(entry_idx)
+    if n_trades == 0:
+        return pd.DataFrame()
+
+    entry_idx = np.asarray(entry_idx, dtype=np.int64)
+    exit_idx = np.asarray(exit_idx, dtype=np.int64)
+    direction = np.asarray(direction, dtype=np.int64)
+    entry_price = close[entry_idx]
+    entry_atr = atr[entry_idx]
+
+    mfe, mae, mfe_r, mae_r, t_mfe, t_mae = _path_extremes(
+        high, low, entry_idx, exit_idx, direction, entry_price, entry_atr
+    )
+    final_pnl = (close[exit_idx] - entry_price) * direction * position_size
+    final_r = final_pnl / (entry_atr * position_size)
+
+    return _trades_to_frame(
+        df, close, atr, n_trades, entry_idx, exit_idx, direction, exit_idx - entry_idx,
+        mfe, mae, mfe_r, mae_r, t_mfe, t_mae, np.asarray(exit_reason, dtype=object),
+        final_r, final_pnl
+    )
+
+
+def _path_extremes(high, low, entry_idx, exit_idx, direction, entry_price, entry_atr):
+    """
+    MFE/MAE (price and R) and their first bar for non-overlapping trades.
+
+    Holding window of trade i is bars entry_idx[i] + 1 .. exit_idx[i]. Uses
+    the same per-bar arithmetic and strict-improvement rule as Trade.update
+    (NaN bars never update, ties keep the earliest bar).
+    """
+    holds = exit_idx - entry_idx
+    starts = np.concatenate([[0], np.cumsum(holds)[:-1]])
+    trade_of_bar = np.repeat(np.arange(len(holds)), holds)
+    bar = np.arange(holds.sum()) - starts[trade_of_bar] + entry_idx[trade_of_bar] + 1
+
+    ep = entry_price[trade_of_bar]
+    is_long = direction[trade_of_bar] == 1
+    favorable = np.where(is_long, high[bar] - ep, ep - low[bar])
+    adverse = np.where(is_long, low[bar] - ep, ep - high[bar])
+    favorable[np.isnan(favorable)] = -np.inf
+    adverse[np.isnan(adverse)] = np.inf
+
+    def first_extreme(values, reduce):
+        best = reduce.reduceat(values, starts)
+        hit = np.flatnonzero(values == best[trade_of_bar])
+        trades, first = np.unique(trade_of_bar[hit], return_index=True)
+        t_best = np.zeros(len(holds), dtype=np.int64)
+        t_best[trades] = hit[first] - starts[trades] + 1
+        return best, t_best
+
+    best_fav, t_fav = first_extreme(favorable, np.maximum)
+    best_adv, t_adv = first_extreme(adverse, np.minimum)
+
+    has_mfe = best_fav > 0
+    has_mae = best_adv < 0
+    mfe = np.where(has_mfe, best_fav, 0.0)
+    mae = np.where(has_mae, best_adv, 0.0)
+    return (
+        mfe,
+        mae,
+        np.where(has_mfe, mfe / entry_atr, 0.0),
+        np.where(has_mae, mae / entry_atr, 0.0),
+        np.where(has_mfe, t_fav, 0),
+        np.where(has_mae, t_adv, 0),
+    )
+
+
+def _trades_to_frame(
+    df, close, atr, n_trades, entry_idx, exit_idx, direction, bars_held,
+    mfe, mae, mfe_r, mae_r, t_mfe, t_mae, exit_reason, final_r, final_pnl
+) -> pd.DataFrame:
+    """Assemble preallocated trade columns into the simulate_trade_paths frame."""
+    if n_trades == 0:
+        return pd.DataFrame()
+
+    entry_idx = entry_idx[:n_trades]
+    exit_idx = exit_idx[:n_trades]
+    close_arr = np.asarray(close)
+    atr_arr = np.asarray(atr)
+
+    return pd.DataFrame({
+        'entry_idx': entry_idx,
+        'entry_time': df.index[entry_idx],
+        'entry_price': close_arr[entry_idx],
+        'direction': direction[:n_trades],
+        'atr': atr_arr[entry_idx],
+        'bars_held': bars_held[:n_trades],
+        'mfe': mfe[:n_trades],
+        'mae': mae[:n_trades],
+        'mfe_r': mfe_r[:n_trades],
+        'mae_r': mae_r[:n_trades],
+        't_mfe': t_mfe[:n_trades],
+        't_mae': t_mae[:n_trades],
+        'exit_idx': exit_idx,
+        'exit_time': df.index[exit_idx],
+        'exit_price': close_arr[exit_idx],
+        'exit_reason': exit_reason[:n_trades],
+        'final_r': final_r[:n_trades],
+        'final_pnl': final_pnl[:n_trades],
+    })
+
+
 def analyze_trade_statistics(trade_df: pd.DataFrame) -> Dict:
     """
     Compute aggregate statistics from trade results.
@@ -281,45 +662,53 @@ def analyze_trade_statistics(trade_df: pd.DataFrame) -> Dict:
             'n_short': 0,
         }
 
+    final_r = column_stats(trade_df['final_r'].to_numpy())
+    mfe_r = column_stats(trade_df['mfe_r'].to_numpy())
+    mae_r = column_stats(trade_df['mae_r'].to_numpy())
+    bars_held = column_stats(trade_df['bars_held'].to_numpy())
+    t_mfe = column_stats(trade_df['t_mfe'].to_numpy())
+    exit_shares = exit_reason_shares(trade_df['exit_reason'].to_numpy())
+    direction = trade_df['direction'].to_numpy()
+
     stats = {
         # Basic counts
         'n_trades': len(trade_df),
-        'n_long': (trade_df['direction'] == 1).sum(),
-        'n_short': (trade_df['direction'] == -1).sum(),
+        'n_long': np.count_nonzero(direction == 1),
+        'n_short': np.count_nonzero(direction == -1),
 
         # Final R statistics
-        'mean_r': trade_df['final_r'].mean(),
-        'median_r': trade_df['final_r'].median(),
-        'std_r': trade_df['final_r'].std(),
-        'min_r': trade_df['final_r'].min(),
-        'max_r': trade_df['final_r'].max(),
+        'mean_r': final_r.mean,
+        'median_r': final_r.median,
+        'std_r': final_r.std,
+        'min_r': final_r.min,
+        'max_r': final_r.max,
 
         # Win rate
-        'win_rate': (trade_df['final_r'] > 0).mean(),
-        'avg_win_r': trade_df[trade_df['final_r'] > 0]['final_r'].mean() if (trade_df['final_r'] > 0).any() else 0,
-        'avg_loss_r': trade_df[trade_df['final_r'] <= 0]['final_r'].mean() if (trade_df['final_r'] <= 0).any() else 0,
+        'win_rate': final_r.win_rate,
+        'avg_win_r': final_r.mean_pos if final_r.n_pos > 0 else 0,
+        'avg_loss_r': final_r.mean_nonpos if final_r.n_nonpos > 0 else 0,
 
         # MFE/MAE statistics
-        'mean_mfe_r': trade_df['mfe_r'].mean(),
-        'median_mfe_r': trade_df['mfe_r'].median(),
-        'mean_mae_r': trade_df['mae_r'].mean(),
-        'median_mae_r': trade_df['mae_r'].median(),
+        'mean_mfe_r': mfe_r.mean,
+        'median_mfe_r': mfe_r.median,
+        'mean_mae_r': mae_r.mean,
+        'median_mae_r': mae_r.median,
 
         # Time statistics
-        'mean_bars_held': trade_df['bars_held'].mean(),
-        'median_bars_held': trade_df['bars_held'].median(),
-        'mean_t_mfe': trade_df['t_mfe'].mean(),
-        'median_t_mfe': trade_df['t_mfe'].median(),
+        'mean_bars_held': bars_held.mean,
+        'median_bars_held': bars_held.median,
+        'mean_t_mfe': t_mfe.mean,
+        'median_t_mfe': t_mfe.median,
 
         # Exit reasons
-        'pct_stop': (trade_df['exit_reason'] == 'stop').mean(),
-        'pct_tp_hit': (trade_df['exit_reason'] == 'tp_hit').mean(),
-        'pct_hmax': (trade_df['exit_reason'] == 'hmax').mean(),
-        'pct_end_of_data': (trade_df['exit_reason'] == 'end_of_data').mean(),
+        'pct_stop': exit_shares['stop'],
+        'pct_tp_hit': exit_shares['tp_hit'],
+        'pct_hmax': exit_shares['hmax'],
+        'pct_end_of_data': exit_shares['end_of_data'],
 
         # Expectancy
-        'expectancy_r': trade_df['final_r'].mean(),
-        'sharpe_r': trade_df['final_r'].mean() / trade_df['final_r'].std() if trade_df['final_r'].std() > 0 else 0,
+        'expectancy_r': final_r.mean,
+        'sharpe_r': final_r.sharpe(zero_std=0),
     }
 
     return stats
@@ -329,12 +718,15 @@ def simulate_ofi_trade_paths_for_df(
     symbol: str,
     timeframe: str,
     df: pd.DataFrame,
-    cfg: TradePathConfig
+    cfg: TradePathConfig,
+    feature_cache: Optional["FeatureCache"] = None
 ) -> pd.DataFrame:
     """
     High-level wrapper for trade path simulation with TradePathConfig.
 
-    This function is used by Phase 5 parameter sweep.
+    This function is used by Phase 5 parameter sweep. ATR and signals are
+    read from a FeatureCache, so combos that only differ in exit settings
+    reuse them and only the exit logic runs per call.
 
     Parameters
     ----------
@@ -346,6 +738,8 @@ def simulate_ofi_trade_paths_for_df(
         Bar data with OFI_z and OHLC columns (ATR will be computed if missing)
     cfg : TradePathConfig
         Configuration object
+    feature_cache : Optional[FeatureCache]
+        Cache for ATR/signal arrays (None = process-wide default cache)
 
     Returns
     -------
@@ -364,28 +758,42 @@ def simulate_ofi_trade_paths_for_df(
     if missing:
         raise ValueError(f"Missing required columns: {missing}")
 
-    # Compute ATR if not present
-    from ..trading.ofi_signals import compute_atr, generate_ofi_signals
+    from .feature_cache import get_feature_cache
 
-    df_copy = df.copy()
-    if 'ATR' not in df_copy.columns:
-        df_copy = compute_atr(df_copy, period=cfg.atr_period, method=cfg.atr_method)
+    if feature_cache is None:
+        feature_cache = get_feature_cache()
 
-    # Generate signals based on OFI_z quantiles
-    df_with_signals = generate_ofi_signals(
-        df_copy,
+    # ATR (computed if not present) and OFI_z quantile signals, memoized
+    if 'ATR' in df.columns:
+        atr = df['ATR'].to_numpy()
+    else:
+        atr = feature_cache.atr(symbol, timeframe, df, cfg.atr_period, cfg.atr_method)
+    signal = feature_cache.signals(
+        symbol, timeframe, df,
         entry_mode=cfg.entry_mode,
         entry_q_high=cfg.entry_q_high,
-        entry_q_low=cfg.entry_q_low
+        entry_q_low=cfg.entry_q_low,
+        quantile_window=cfg.quantile_window,
+        quantile_min_periods=cfg.quantile_min_periods
     )
 
+    # Only the columns the simulator reads, without copying the bars
+    df_with_signals = pd.DataFrame({
+        'high': df['high'],
+        'low': df['low'],
+        'close': df['close'],
+        'ATR': atr,
+        'signal': signal,
+    }, index=df.index, copy=False)
+
     # Run simulation
     trades_df = simulate_trade_paths(
         df_with_signals,
         hmax_bars=cfg.hmax_bars,
         position_size=cfg.position_size,
         save_paths=cfg.save_paths,
-        tp_R=cfg.tp_R
+        tp_R=cfg.tp_R,
+        engine=cfg.engine
     )
 
     if trades_df.empty:
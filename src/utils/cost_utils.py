@@ -2,10 +2,14 @@
 Cost modeling utilities for Phase 5.
 
 This module provides tools to overlay transaction costs on gross trade results.
+
+Costs for all trades and scenarios are computed as one (n_trades x
+n_scenarios) cost-R matrix (compute_cost_R_matrix); compute_round_trip_cost_R
+remains as the single-trade reference.
 """
 
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 import pandas as pd
 import numpy as np
 
@@ -75,6 +79,89 @@ def compute_round_trip_cost_R(row: pd.Series, scenario: CostScenario) -> float:
     return cost_R
 
 
+def compute_cost_R_matrix(
+    entry_price: np.ndarray,
+    exit_price: Optional[np.ndarray],
+    atr_entry: np.ndarray,
+    per_side_rates: np.ndarray
+) -> np.ndarray:
+    """
+    Round-trip cost in R-multiples for every trade under every scenario.
+
+    Vectorized compute_round_trip_cost_R: entry + exit cost (2 x entry cost
+    where exit_price is missing or NaN) divided by ATR_entry, and 0.0 where
+    entry_price or ATR_entry is NaN or ATR_entry <= 0. Values are identical
+    to the per-row function.
+
+    Args:
+        entry_price: Entry prices, shape (n_trades,)
+        exit_price: Exit prices, shape (n_trades,), or None
+        atr_entry: ATR at entry, shape (n_trades,)
+        per_side_rates: Per-side cost rates, shape (n_scenarios,)
+
+    Returns:
+        Array of shape (n_trades, n_scenarios)
+    """
+    entry = np.asarray(entry_price, dtype=np.float64)[:, None]
+    atr = np.asarray(atr_entry, dtype=np.float64)[:, None]
+    rates = np.asarray(per_side_rates, dtype=np.float64)[None, :]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cost_price = 2.0 * rates * entry
+        if exit_price is not None:
+            exit_ = np.asarray(exit_price, dtype=np.float64)[:, None]
+            cost_price = np.where(np.isnan(exit_), cost_price, rates * entry + rates * exit_)
+        cost_R = cost_price / atr
+
+    valid = ~np.isnan(entry) & ~np.isnan(atr) & (atr > 0)
+    return np.where(valid, cost_R, 0.0)
+
+
+def apply_cost_scenarios(
+    trades_df: pd.DataFrame,
+    scenarios: List[CostScenario]
+) -> pd.DataFrame:
+    """
+    Apply several cost scenarios to a DataFrame of gross trades in one pass.
+
+    Args:
+        trades_df: DataFrame with gross trade results. Must contain:
+            - 'final_R': Gross R-multiple
+            - 'entry_price': Entry price
+            - 'ATR_entry': ATR at entry
+            - 'exit_price': Exit price (optional)
+        scenarios: List of CostScenario objects
+
+    Returns:
+        New DataFrame with 'cost_R_{name}' and 'final_R_net_{name}' columns
+        for each scenario, in scenario order
+    """
+    if trades_df.empty:
+        # Return empty DataFrame with expected columns
+        result = trades_df.copy()
+        for scenario in scenarios:
+            result[f'cost_R_{scenario.name}'] = []
+            result[f'final_R_net_{scenario.name}'] = []
+        return result
+
+    cost_R = compute_cost_R_matrix(
+        trades_df['entry_price'].to_numpy(),
+        trades_df['exit_price'].to_numpy() if 'exit_price' in trades_df.columns else None,
+        trades_df['ATR_entry'].to_numpy(),
+        np.array([scenario.per_side_rate for scenario in scenarios], dtype=np.float64)
+    )
+    final_R = trades_df['final_R'].to_numpy(dtype=np.float64)[:, None]
+    net_R = final_R - cost_R
+
+    new_columns = {}
+    for j, scenario in enumerate(scenarios):
+        new_columns[f'cost_R_{scenario.name}'] = cost_R[:, j]
+        new_columns[f'final_R_net_{scenario.name}'] = net_R[:, j]
+
+    # One copy of the frame for all scenarios
+    return trades_df.assign(**new_columns)
+
+
 def apply_cost_scenario_to_trades(
     trades_df: pd.DataFrame,
     scenario: CostScenario
@@ -111,28 +198,7 @@ def apply_cost_scenario_to_trades(
         >>> result = apply_cost_scenario_to_trades(trades, scenario)
         >>> # result will have 'cost_R_low_cost' and 'final_R_net_low_cost' columns
     """
-    if trades_df.empty:
-        # Return empty DataFrame with expected columns
-        result = trades_df.copy()
-        result[f'cost_R_{scenario.name}'] = []
-        result[f'final_R_net_{scenario.name}'] = []
-        return result
-    
-    # Make a copy to avoid modifying the original
-    result = trades_df.copy()
-    
-    # Compute cost_R for each trade
-    result[f'cost_R_{scenario.name}'] = result.apply(
-        lambda row: compute_round_trip_cost_R(row, scenario),
-        axis=1
-    )
-    
-    # Compute net R
-    result[f'final_R_net_{scenario.name}'] = (
-        result['final_R'] - result[f'cost_R_{scenario.name}']
-    )
-    
-    return result
+    return apply_cost_scenarios(trades_df, [scenario])
 
 
 def apply_multiple_cost_scenarios(
@@ -149,10 +215,4 @@ def apply_multiple_cost_scenarios(
     Returns:
         DataFrame with cost and net R columns for each scenario
     """
-    result = trades_df.copy()
-    
-    for scenario in scenarios:
-        result = apply_cost_scenario_to_trades(result, scenario)
-    
-    return result
-
+    return apply_cost_scenarios(trades_df, scenarios)
@@ -0,0 +1,402 @@
+"""
+Shared trade-metrics kernel.
+
+Trade summaries across the project (Phase 5 sweep, Phase 4 trade
+statistics, Phase 6 long/short and regime analysis, Phase 6B joint
+strategies) are built from the same few reductions of a trades table.
+This module computes them from NumPy arrays:
+
+- group_trades() / grouped_column_stats() / grouped_exit_reason_shares():
+  count, mean, std, median, quantiles, min/max, win/loss splits and exit
+  reason shares for every group of a long trades table (e.g. by config,
+  leg or regime) at once, from sort-based segment reductions
+- column_stats() / exit_reason_shares(): the same for a single column,
+  as a one-group call of the grouped kernels
+
+Reductions follow pandas' algorithms (NaN-skipping pairwise sum, two-pass
+variance, linear percentiles) in float64, so on float64 (and integer)
+columns results equal the Series.mean/std/median/quantile values they
+replace. float32 columns are upcast to float64 first (trade_arrays does
+this when extracting columns): their statistics are the float64 ones, not
+pandas' float32 reductions, and differ from those in the low digits.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+EXIT_REASONS = ('stop', 'tp_hit', 'hmax', 'end_of_data')
+
+
+@dataclass
+class ColumnStats:
+    """
+    Summary statistics of one trade column.
+
+    Attributes:
+        n_rows: Number of rows (including NaN)
+        count: Number of non-NaN values
+        mean: Mean of non-NaN values
+        std: Sample standard deviation (ddof=1; NaN if count < 2)
+        median: Median of non-NaN values
+        min: Minimum of non-NaN values
+        max: Maximum of non-NaN values
+        n_pos: Number of values > 0
+        n_nonpos: Number of values <= 0
+        mean_pos: Mean of values > 0 (NaN if none)
+        mean_nonpos: Mean of values <= 0 (NaN if none)
+        quantiles: Requested quantiles keyed by q
+    """
+    n_rows: int
+    count: int
+    mean: float
+    std: float
+    median: float
+    min: float
+    max: float
+    n_pos: int
+    n_nonpos: int
+    mean_pos: float
+    mean_nonpos: float
+    quantiles: Dict[float, float] = field(default_factory=dict)
+
+    @property
+    def win_rate(self) -> float:
+        """Share of rows > 0 (NaN rows count as non-wins)."""
+        return self.n_pos / self.n_rows if self.n_rows > 0 else np.nan
+
+    def sharpe(self, zero_std: float = np.nan) -> float:
+        """mean / std, or zero_std when std is not positive."""
+        return self.mean / self.std if self.std > 0 else zero_std
+
+
+@dataclass
+class TradeGroups:
+    """
+    Rows of a long trades table split into groups.
+
+    Attributes:
+        codes: Group code per row (-1 = in no group)
+        keys: One row per group with the grouping columns
+        order: Row positions sorted stably by group, rows in no group dropped
+            (each group's rows are contiguous and keep their original order)
+        n_rows: Number of rows per group
+    """
+    codes: np.ndarray
+    keys: pd.DataFrame
+    order: np.ndarray
+    n_rows: np.ndarray
+
+    @classmethod
+    def from_codes(cls, codes: np.ndarray, keys: pd.DataFrame) -> 'TradeGroups':
+        """Build from a group code per row and the group keys."""
+        codes = np.asarray(codes, dtype=np.intp)
+        order = np.argsort(codes, kind='stable')
+        order = order[np.count_nonzero(codes < 0):]
+        n_rows = np.bincount(codes[order], minlength=len(keys))
+        return cls(codes=codes, keys=keys, order=order, n_rows=n_rows)
+
+    @classmethod
+    def single(cls, n_rows: int) -> 'TradeGroups':
+        """All of n_rows rows in one group."""
+        return cls.from_codes(np.zeros(n_rows, dtype=np.intp), pd.DataFrame(index=range(1)))
+
+    @property
+    def n_groups(self) -> int:
+        """Number of groups."""
+        return len(self.n_rows)
+
+
+@dataclass
+class GroupedColumnStats:
+    """
+    Summary statistics of one trade column per group.
+
+    Same fields as ColumnStats, each an array with one entry per group.
+    Groups without valid values get NaN statistics.
+    """
+    n_rows: np.ndarray
+    count: np.ndarray
+    mean: np.ndarray
+    std: np.ndarray
+    median: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    n_pos: np.ndarray
+    n_nonpos: np.ndarray
+    mean_pos: np.ndarray
+    mean_nonpos: np.ndarray
+    quantiles: Dict[float, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def win_rate(self) -> np.ndarray:
+        """Share of rows > 0 per group (NaN for empty groups)."""
+        return _safe_divide(self.n_pos, self.n_rows)
+
+    def sharpe(self, zero_std: float = np.nan) -> np.ndarray:
+        """mean / std per group, or zero_std where std is not positive."""
+        positive = self.std > 0
+        return np.where(positive, self.mean / np.where(positive, self.std, 1.0), zero_std)
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator, NaN where the denominator is 0."""
+    denominator = np.asarray(denominator)
+    return np.where(denominator > 0, numerator / np.maximum(denominator, 1), np.nan)
+
+
+def _block_sums(values: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Sums of consecutive blocks of values.
+
+    Blocks of equal length are stacked into one 2-D array and reduced
+    along rows, so each block gets NumPy's pairwise sum exactly as if it
+    were summed on its own (np.add.reduceat sums all but the last block
+    sequentially). The loop runs over distinct block lengths, not blocks.
+    """
+    sums = np.zeros(len(lengths), dtype=np.float64)
+    starts = np.cumsum(lengths) - lengths
+    for length in np.unique(lengths[lengths > 0]):
+        blocks = np.flatnonzero(lengths == length)
+        sums[blocks] = np.add.reduce(values[starts[blocks, None] + np.arange(length)], axis=1)
+    return sums
+
+
+def _linear_quantile(ordered: np.ndarray, start: np.ndarray, count: np.ndarray, q: float) -> np.ndarray:
+    """
+    Linear-interpolated quantile of sorted segments (as np.percentile).
+
+    Args:
+        ordered: Values sorted within each segment
+        start: Offset of each segment (groups with count > 0 only)
+        count: Length of each segment (> 0)
+        q: Quantile in [0, 1]
+
+    Returns:
+        Quantile per segment
+    """
+    # np.percentile receives q * 100 and divides it back
+    q = (q * 100.0) / 100.0
+    virtual = (count - 1) * q
+    previous = np.floor(virtual)
+    above = virtual >= count - 1
+    previous_idx = np.where(above, count - 1, previous).astype(np.intp)
+    next_idx = np.where(above, count - 1, previous + 1).astype(np.intp)
+    gamma = virtual - np.where(above, -1.0, previous)
+
+    a = ordered[start + previous_idx]
+    b = ordered[start + next_idx]
+    diff = b - a
+    return np.where(gamma >= 0.5, b - diff * (1 - gamma), a + diff * gamma)
+
+
+def group_trades(
+    trades_df: pd.DataFrame,
+    by: Union[str, List[str]],
+    keys: Optional[pd.DataFrame] = None,
+    sort: bool = True
+) -> TradeGroups:
+    """
+    Split the rows of a long trades table into groups.
+
+    Args:
+        trades_df: Long trades table
+        by: Grouping column(s); an empty list puts all rows in one group
+        keys: Groups to report, one row per group with the `by` columns
+            (None = groups present in trades_df). Rows outside these groups
+            or with a missing key belong to no group.
+        sort: Order groups by key when keys is None (False = order of
+            first appearance)
+
+    Returns:
+        TradeGroups
+    """
+    by = [by] if isinstance(by, str) else list(by)
+
+    if not by:
+        return TradeGroups.single(len(trades_df))
+
+    if keys is None:
+        grouped = trades_df.groupby(by, sort=sort)
+        codes = grouped.ngroup().to_numpy(dtype=np.float64)
+        codes = np.where(np.isnan(codes), -1, codes)
+        return TradeGroups.from_codes(codes, grouped.size().index.to_frame(index=False))
+
+    keys = keys[by].reset_index(drop=True)
+    if len(by) == 1:
+        codes = pd.Index(keys[by[0]]).get_indexer(trades_df[by[0]])
+    else:
+        codes = pd.MultiIndex.from_frame(keys).get_indexer(pd.MultiIndex.from_frame(trades_df[by]))
+    return TradeGroups.from_codes(codes, keys)
+
+
+def grouped_column_stats(
+    values: Union[np.ndarray, pd.Series],
+    groups: TradeGroups,
+    quantiles: Sequence[float] = ()
+) -> GroupedColumnStats:
+    """
+    Summary statistics (as ColumnStats) of every group of one column at once.
+
+    Sums run over each group's values in their original order and order
+    statistics come from one lexsort of (group, value), so every group's
+    statistics equal those of its subset on its own.
+
+    Args:
+        values: 1-D numeric array (NaN = missing), one value per row; any
+            other dtype (float32, integers) is cast to float64
+        groups: Row groups from group_trades()
+        quantiles: Quantiles to compute (e.g. (0.75, 0.90))
+
+    Returns:
+        GroupedColumnStats
+    """
+    values = np.asarray(values)[groups.order].astype(np.float64, copy=False)
+    codes = groups.codes[groups.order]
+    n_groups = groups.n_groups
+    n_rows = groups.n_rows
+
+    missing = np.isnan(values)
+    count = np.bincount(codes[~missing], minlength=n_groups)
+
+    # Mean: NaN-filled sum / count
+    filled = np.where(missing, 0.0, values)
+    mean = _safe_divide(_block_sums(filled, n_rows), count)
+
+    # Std: two-pass variance
+    sqr = (np.repeat(mean, n_rows) - filled) ** 2
+    sqr[missing] = 0.0
+    var = _safe_divide(_block_sums(sqr, n_rows), count - 1)
+    std = np.sqrt(np.where(count > 1, var, np.nan))
+
+    # Win/loss splits (masking keeps the blocks contiguous and in order)
+    pos = values > 0
+    nonpos = values <= 0
+    n_pos = np.bincount(codes[pos], minlength=n_groups)
+    n_nonpos = np.bincount(codes[nonpos], minlength=n_groups)
+    mean_pos = _safe_divide(_block_sums(values[pos], n_pos), n_pos)
+    mean_nonpos = _safe_divide(_block_sums(values[nonpos], n_nonpos), n_nonpos)
+
+    # Order statistics: NaN sorts to the end of its group
+    ordered = values[np.lexsort((values, codes))]
+    has_values = count > 0
+    s = (np.cumsum(n_rows) - n_rows)[has_values]
+    c = count[has_values]
+
+    def order_stat(stat: np.ndarray) -> np.ndarray:
+        out = np.full(n_groups, np.nan)
+        out[has_values] = stat
+        return out
+
+    mid = c // 2
+    median = order_stat(np.where(
+        c % 2 == 1,
+        ordered[s + mid],
+        (ordered[s + np.maximum(mid - 1, 0)] + ordered[s + mid]) / 2.0
+    ))
+
+    return GroupedColumnStats(
+        n_rows=n_rows, count=count, mean=mean, std=std, median=median,
+        min=order_stat(ordered[s]), max=order_stat(ordered[s + c - 1]),
+        n_pos=n_pos, n_nonpos=n_nonpos, mean_pos=mean_pos, mean_nonpos=mean_nonpos,
+        quantiles={q: order_stat(_linear_quantile(ordered, s, c, q)) for q in quantiles}
+    )
+
+
+def grouped_exit_reason_shares(
+    exit_reason: Union[np.ndarray, pd.Series],
+    groups: TradeGroups,
+    reasons: Sequence[str] = EXIT_REASONS
+) -> Dict[str, np.ndarray]:
+    """
+    Share of trades per exit reason for every group at once.
+
+    Args:
+        exit_reason: Exit reason per row
+        groups: Row groups from group_trades()
+        reasons: Reasons to report (missing ones get 0.0)
+
+    Returns:
+        Dict mapping reason to its share of each group's trades (NaN for
+        empty groups)
+    """
+    exit_reason = np.asarray(exit_reason, dtype=object)[groups.order]
+    labels, label_codes = np.unique(exit_reason.astype(str), return_inverse=True)
+    n_groups = groups.n_groups
+
+    counts = np.bincount(
+        groups.codes[groups.order] * len(labels) + label_codes,
+        minlength=n_groups * len(labels)
+    ).reshape(n_groups, len(labels))
+
+    by_label = {label: counts[:, k] for k, label in enumerate(labels)}
+    zeros = np.zeros(n_groups, dtype=np.intp)
+    return {reason: _safe_divide(by_label.get(reason, zeros), groups.n_rows) for reason in reasons}
+
+
+
+def column_stats(values: Union[np.ndarray, pd.Series], quantiles: Sequence[float] = ()) -> ColumnStats:
+    """
+    Compute summary statistics of one column.
+
+    Args:
+        values: 1-D numeric array (NaN = missing); float32 is upcast to
+            float64
+        quantiles: Quantiles to compute (e.g. (0.75, 0.90))
+
+    Returns:
+        ColumnStats
+    """
+    values = np.asarray(values)
+    grouped = grouped_column_stats(values, TradeGroups.single(len(values)), quantiles)
+    return ColumnStats(
+        n_rows=int(grouped.n_rows[0]), count=int(grouped.count[0]),
+        mean=grouped.mean[0], std=grouped.std[0], median=grouped.median[0],
+        min=grouped.min[0], max=grouped.max[0],
+        n_pos=int(grouped.n_pos[0]), n_nonpos=int(grouped.n_nonpos[0]),
+        mean_pos=grouped.mean_pos[0], mean_nonpos=grouped.mean_nonpos[0],
+        quantiles={q: values_q[0] for q, values_q in grouped.quantiles.items()}
+    )
+
+
+def exit_reason_shares(
+    exit_reason: Union[np.ndarray, pd.Series],
+    reasons: Sequence[str] = EXIT_REASONS
+) -> Dict[str, float]:
+    """
+    Share of trades per exit reason.
+
+    Args:
+        exit_reason: Exit reason per trade
+        reasons: Reasons to report (missing ones get 0.0)
+
+    Returns:
+        Dict mapping reason to its share of all trades (NaN if no trades)
+    """
+    exit_reason = np.asarray(exit_reason, dtype=object)
+    shares = grouped_exit_reason_shares(exit_reason, TradeGroups.single(len(exit_reason)), reasons)
+    return {reason: share[0] for reason, share in shares.items()}
+
+
+def trade_arrays(trades_df: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Column arrays of a trades table, as consumed by metrics functions.
+
+    Args:
+        trades_df: Trades table
+        columns: Columns to extract (None = all)
+
+    Returns:
+        Dict mapping column name to its NumPy array; float columns come as
+        float64 (float32 is upcast, see the module notes)
+    """
+    columns = list(trades_df.columns) if columns is None else columns
+    arrays = {}
+    for col in columns:
+        if col in trades_df.columns:
+            values = trades_df[col].to_numpy()
+            arrays[col] = values.astype(np.float64, copy=False) if values.dtype.kind == 'f' else values
+    return arrays
+
@@ -0,0 +1,68 @@
+"""Shared fixtures for the test suite (run with `python -m pytest tests`)."""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to path (as the run_* scripts do)
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+@pytest.fixture
+def ticks(rng):
+    """Ten days of labelled ticks (mid, sign, vol) at irregular times."""
+    n = 100_000
+    offsets = np.sort(rng.integers(0, 10 * 86400 * 10**9, n))
+    index = pd.Timestamp('2021-01-01 00:03') + pd.to_timedelta(offsets, unit='ns')
+    return pd.DataFrame({
+        'mid': 100 + np.cumsum(rng.normal(0, 0.01, n)),
+        'sign': rng.choice(np.array([-1, 0, 1], dtype=np.int8), n),
+        'vol': rng.exponential(1.3, n),
+    }, index=index)
+
+
+def make_bars(rng, n=400, tick=0.5):
+    """OHLC bars on a coarse price grid (ties between highs/lows/closes)
+    with OFI_z that is NaN on a few bars."""
+    close = np.round((100 + np.cumsum(rng.normal(0, 1.0, n))) / tick) * tick
+    spread = np.round(rng.uniform(0, 2.0, (2, n)) / tick) * tick
+    ofi_z = rng.normal(size=n)
+    ofi_z[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'open': close,
+        'high': close + spread[0],
+        'low': close - spread[1],
+        'close': close,
+        'OFI_z': ofi_z,
+    }, index=pd.date_range('2022-01-01', periods=n, freq='4h'))
+
+
+def write_tick_partitions(ticks_dir, rng, symbol, days=9, utc_offset_hours=-2):
+    """Ticks every ~10s on a 0.01 grid (many unchanged mids), partitioned
+    by the local date at utc_offset_hours, so with an offset each day's
+    ticks run past UTC midnight."""
+    n = days * 8640
+    offset = pd.Timedelta(hours=-utc_offset_hours)
+    start = pd.Timestamp('2021-01-01') + offset
+    ts = start + pd.to_timedelta(np.sort(rng.choice(days * 86400 * 1000, n, replace=False)), unit='ms')
+    mid = np.round(100 + np.cumsum(rng.normal(0, 0.01, n)), 2)
+    ticks = pd.DataFrame({
+        'ts': ts,
+        'bid': mid - 0.01,
+        'ask': mid + 0.01,
+        'bid_size': rng.exponential(1.0, n),
+        'ask_size': rng.exponential(1.0, n),
+    })
+    local_date = (ticks['ts'] - offset).dt.strftime('%Y-%m-%d')
+    for date, day in ticks.groupby(local_date):
+        day_dir = ticks_dir / f"symbol={symbol}" / f"date={date}"
+        day_dir.mkdir(parents=True)
+        day.to_parquet(day_dir / 'part-0.parquet', index=False)
@@ -0,0 +1,20 @@
+"""Successive-halving rung fractions."""
+
+import pytest
+
+from src.research.adaptive_sweep import DEFAULT_ETA, DEFAULT_MIN_FRACTION, halving_fractions
+
+
+@pytest.mark.parametrize('min_fraction, eta, expected', [
+    (1 / 9, 3, [1 / 9, 1 / 3, 1.0]),
+    (0.111, 3, [0.111, 0.333, 1.0]),  # rounded 1/9 keeps its rungs
+    (0.25, 2, [0.25, 0.5, 1.0]),
+    (0.25, 3, [0.25, 0.75, 1.0]),
+    (1.0, 3, [1.0]),
+])
+def test_halving_fractions(min_fraction, eta, expected):
+    assert halving_fractions(min_fraction, eta) == pytest.approx(expected)
+
+
+def test_default_gives_three_rungs():
+    assert len(halving_fractions(DEFAULT_MIN_FRACTION, DEFAULT_ETA)) == 3
@@ -0,0 +1,100 @@
+"""Bar cache invalidation: only days whose partition or incoming tick state
+changed are rebuilt, and the result matches an uncached build."""
+
+import pandas as pd
+import pytest
+
+from conftest import write_tick_partitions
+from src.data import bar_cache
+from src.data.bar_cache import BarCache, build_bars_cached
+
+SYMBOL = 'TEST'
+BAR_SIZES = ['15min', '1h']
+
+
+@pytest.fixture
+def ticks_dir(tmp_path, rng):
+    ticks_dir = tmp_path / 'ticks'
+    write_tick_partitions(ticks_dir, rng, SYMBOL, days=6, utc_offset_hours=0)
+    return ticks_dir
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Names of the partitions build_bars_cached reads ticks from."""
+    seen = []
+    read_files = bar_cache._read_files
+
+    def spy(symbol, date_dirs):
+        seen.extend(d.name for d in date_dirs)
+        return read_files(symbol, date_dirs)
+
+    monkeypatch.setattr(bar_cache, '_read_files', spy)
+    return seen
+
+
+def partition(ticks_dir, date):
+    return ticks_dir / f"symbol={SYMBOL}" / f"date={date}" / 'part-0.parquet'
+
+
+def assert_matches_uncached(tmp_path, ticks_dir, got, **kwargs):
+    expected = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, BarCache(tmp_path / 'fresh'), **kwargs)
+    for bar_size in BAR_SIZES:
+        pd.testing.assert_frame_equal(got[bar_size], expected[bar_size])
+
+
+def test_unchanged_request_reads_no_ticks(tmp_path, ticks_dir, reads):
+    cache = BarCache(tmp_path / 'cache')
+    first = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+    assert len(reads) == 6
+
+    reads.clear()
+    again = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+    assert reads == []
+    for bar_size in BAR_SIZES:
+        pd.testing.assert_frame_equal(again[bar_size], first[bar_size])
+
+
+def test_modified_partition_rebuilds_only_that_day(tmp_path, ticks_dir, reads):
+    cache = BarCache(tmp_path / 'cache')
+    build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+
+    # Change sizes in the middle of the day; the last tick (and so the
+    # tick state handed to the next day) is unchanged
+    path = partition(ticks_dir, '2021-01-03')
+    day = pd.read_parquet(path)
+    day.loc[100:200, 'bid_size'] *= 3
+    day.to_parquet(path, index=False)
+
+    reads.clear()
+    got = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+    assert reads == ['date=2021-01-03']
+    assert_matches_uncached(tmp_path, ticks_dir, got)
+
+
+def test_changed_tick_state_rebuilds_the_next_day(tmp_path, ticks_dir, reads):
+    cache = BarCache(tmp_path / 'cache')
+    build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+
+    # A new last tick changes the (mid, sign) day 4 starts from
+    path = partition(ticks_dir, '2021-01-03')
+    day = pd.read_parquet(path)
+    last = day.iloc[[-1]].assign(ts=day['ts'].iloc[-1] + pd.Timedelta('1ms'), bid=day['bid'].iloc[-1] + 0.05,
+                                 ask=day['ask'].iloc[-1] + 0.05)
+    pd.concat([day, last]).to_parquet(path, index=False)
+
+    reads.clear()
+    got = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache)
+    assert reads == ['date=2021-01-03', 'date=2021-01-04']
+    assert_matches_uncached(tmp_path, ticks_dir, got)
+
+
+def test_initial_tick_state_is_part_of_the_key(tmp_path, ticks_dir, reads):
+    cache = BarCache(tmp_path / 'cache')
+    build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache, start_date='2021-01-02')
+
+    reads.clear()
+    state = (50.0, -1)
+    got = build_bars_cached(SYMBOL, ticks_dir, BAR_SIZES, cache, start_date='2021-01-02', tick_state=state)
+    assert reads == ['date=2021-01-02']
+    assert_matches_uncached(tmp_path, ticks_dir, got, start_date='2021-01-02', tick_state=state)
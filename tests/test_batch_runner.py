@@ -0,0 +1,161 @@
+"""Stitched batches + merge_batches against a one-pass build of the same ticks."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import write_tick_partitions
+from src.data.bar_cache import BarCache
+from src.data.batch_boundary import BatchBoundary, batch_boundary_path, hold_open_bar, merge_open_bar
+from src.data.batch_runner import batch_file_name, merge_batches, run_batches, run_single_batch
+from src.data.parquet_tick_loader import load_partitioned_parquet_ticks
+from src.factors.ofi import add_mid_price, compute_ofi_bars_multi, label_tick_directions, standardize_ofi
+from src.research.ofi_single_factor import add_future_returns
+
+SYMBOL = 'TEST'
+BAR_SIZES = ['5min', '1h', '4h', '1D']
+WINDOW = 50
+BATCHES = [
+    ('a', '2021-01-01', '2021-01-03'),
+    ('b', '2021-01-04', '2021-01-06'),
+    ('c', '2021-01-07', '2021-01-09'),
+]
+EXACT = ['open', 'high', 'low', 'close']
+
+
+def one_pass(ticks_dir, bar_sizes):
+    """The same bars built from all ticks at once."""
+    ticks = load_partitioned_parquet_ticks(SYMBOL, ticks_dir)
+    ticks = label_tick_directions(add_mid_price(ticks))
+    return {
+        bar_size: add_future_returns(standardize_ofi(bars, window=WINDOW), horizons=[2, 5, 10])
+        for bar_size, bars in compute_ofi_bars_multi(ticks, bar_sizes).items()
+    }
+
+
+def assert_bars_close(got, expected):
+    pd.testing.assert_index_equal(got.index, expected.index)
+    got = got[expected.columns]
+    pd.testing.assert_frame_equal(got[EXACT], expected[EXACT], check_exact=True, check_freq=False)
+    # Volumes of a carried bar are summed from two partial sums
+    pd.testing.assert_frame_equal(got, expected, rtol=1e-12, atol=1e-12, check_freq=False)
+
+
+@pytest.fixture
+def ticks_dir(tmp_path, rng):
+    ticks_dir = tmp_path / 'ticks'
+    write_tick_partitions(ticks_dir, rng, SYMBOL)
+    return ticks_dir
+
+
+def test_stitched_batches_match_one_pass(tmp_path, ticks_dir):
+    results_dir = tmp_path / 'results'
+    results_dir.mkdir()
+    results, _ = run_batches(SYMBOL, BATCHES, BAR_SIZES, ticks_dir, results_dir, window=WINDOW)
+    assert len(results) == len(BATCHES) * len(BAR_SIZES)
+
+    # Each non-final batch holds back its last bar of every size
+    boundary = BatchBoundary.load(batch_boundary_path(results_dir, SYMBOL, 'a'))
+    assert sorted(boundary.open_bars) == sorted(BAR_SIZES)
+
+    expected = one_pass(ticks_dir, BAR_SIZES)
+    for bar_size in BAR_SIZES:
+        files = [batch_file_name(SYMBOL, bar_size, name) for name, _, _ in BATCHES]
+        merged = merge_batches(SYMBOL, bar_size, files, results_dir, window=WINDOW)
+        assert_bars_close(merged, expected[bar_size])
+
+        # The stitched batch CSVs are continuous on their own (only the
+        # future returns at each batch end need the next batch)
+        batches = pd.concat([pd.read_csv(results_dir / f, index_col=0, parse_dates=True) for f in files])
+        fut_ret = [c for c in expected[bar_size] if c.startswith('fut_ret')]
+        assert_bars_close(batches.drop(columns=fut_ret), expected[bar_size].drop(columns=fut_ret))
+
+        saved = pd.read_csv(results_dir / f"{SYMBOL}_{bar_size}_merged_bars_with_ofi.csv", index_col=0, parse_dates=True)
+        assert_bars_close(saved, expected[bar_size])
+
+
+def test_bar_cache_path_matches_one_pass(tmp_path, rng):
+    # Bars of a cached day must not straddle a partition, so partition by UTC date
+    ticks_dir = tmp_path / 'ticks'
+    write_tick_partitions(ticks_dir, rng, SYMBOL, utc_offset_hours=0)
+    results_dir = tmp_path / 'results'
+    results_dir.mkdir()
+    cache = BarCache(tmp_path / 'cache')
+
+    run_batches(SYMBOL, BATCHES, BAR_SIZES, ticks_dir, results_dir, cache=cache, window=WINDOW)
+    expected = one_pass(ticks_dir, BAR_SIZES)
+    for bar_size in BAR_SIZES:
+        files = [batch_file_name(SYMBOL, bar_size, name) for name, _, _ in BATCHES]
+        assert_bars_close(merge_batches(SYMBOL, bar_size, files, results_dir, window=WINDOW), expected[bar_size])
+
+
+def test_merge_recomputes_ofi_z_after_a_restart(tmp_path, ticks_dir):
+    """A batch without the previous boundary (written by older code, a
+    missing .pkl or after a failed batch) restarts OFI_z; the merge must not."""
+    results_dir = tmp_path / 'results'
+    results_dir.mkdir()
+    run_batches(SYMBOL, BATCHES[:1], BAR_SIZES, ticks_dir, results_dir, window=WINDOW)
+    run_batches(SYMBOL, BATCHES[1:], BAR_SIZES, ticks_dir, results_dir, window=WINDOW)
+
+    files = [batch_file_name(SYMBOL, '1h', name) for name, _, _ in BATCHES]
+    batch_b = pd.read_csv(results_dir / files[1], index_col=0, parse_dates=True)
+    assert batch_b['OFI_z'].iloc[:WINDOW - 1].isna().all()
+
+    merged = merge_batches(SYMBOL, '1h', files, results_dir, window=WINDOW)
+    assert merged['OFI_z'].isna().sum() == WINDOW - 1
+    assert merged['OFI_z'].iloc[WINDOW - 1:].notna().all()
+    rolling = merged['OFI_raw'].rolling(WINDOW)
+    np.testing.assert_allclose(merged['OFI_z'], (merged['OFI_raw'] - rolling.mean()) / rolling.std(),
+                               rtol=1e-8, atol=1e-8)
+
+
+def test_failed_batch_resets_and_saves_boundary(tmp_path, ticks_dir):
+    results_dir = tmp_path / 'results'
+    results_dir.mkdir()
+    name, start, end = BATCHES[0]
+    _, boundary = run_single_batch(SYMBOL, start, end, BAR_SIZES, ticks_dir, results_dir, name,
+                                   final=False, window=WINDOW)
+    assert boundary.prev_mid is not None and boundary.open_bars
+
+    # No partitions in range: loading raises
+    results, after = run_single_batch(
+        SYMBOL, '2022-01-01', '2022-01-31', BAR_SIZES, ticks_dir, results_dir, 'missing',
+        boundary=boundary, final=False, window=WINDOW
+    )
+    assert results == []
+    for state in [after, BatchBoundary.load(batch_boundary_path(results_dir, SYMBOL, 'missing'))]:
+        assert state.tick_state == (None, 1)
+        assert state.moments == {} and state.open_bars == {}
+
+
+def test_merge_open_bar_combines_a_shared_bar():
+    index = pd.date_range('2021-01-01', periods=2, freq='4h', tz='UTC')
+    bars = pd.DataFrame({
+        'open': [1.0, 2.0], 'high': [3.0, 4.0], 'low': [0.5, 1.5], 'close': [2.5, 3.5], 'volume': [2.0, 4.0],
+        'OFI_buy_vol': [1.5, 1.0], 'OFI_sell_vol': [0.5, 3.0], 'OFI_tot_vol': [2.0, 4.0], 'OFI_raw': [0.5, -0.5],
+    }, index=index)
+    carried = pd.DataFrame({
+        'open': [0.9], 'high': [2.0], 'low': [0.1], 'close': [1.1], 'volume': [1.0],
+        'OFI_buy_vol': [0.0], 'OFI_sell_vol': [1.0], 'OFI_tot_vol': [1.0], 'OFI_raw': [-1.0],
+    }, index=index[:1])
+
+    first = merge_open_bar(bars, carried).iloc[0]
+    assert (first['open'], first['high'], first['low'], first['close']) == (0.9, 3.0, 0.1, 2.5)
+    assert (first['volume'], first['OFI_buy_vol'], first['OFI_sell_vol']) == (3.0, 1.5, 1.5)
+    assert first['OFI_raw'] == pytest.approx(0.0, abs=1e-8)
+
+    # A carried bar from an earlier timestamp is prepended unchanged
+    shifted = carried.set_axis(index[:1] - pd.Timedelta('4h'))
+    pd.testing.assert_frame_equal(merge_open_bar(bars, shifted), pd.concat([shifted, bars]))
+    assert merge_open_bar(bars, None) is bars
+
+
+def test_hold_open_bar_only_holds_a_bar_past_the_batch_end():
+    index = pd.date_range('2021-01-03 16:00', periods=3, freq='4h', tz='UTC')
+    bars = pd.DataFrame({'close': [1.0, 2.0, 3.0]}, index=index)
+
+    kept, held = hold_open_bar(bars, '4h', '2021-01-03')
+    assert list(kept.index) == list(index[:2]) and list(held.index) == [index[2]]
+
+    kept, held = hold_open_bar(bars.iloc[:2], '4h', '2021-01-03')
+    assert held is None and len(kept) == 2
@@ -0,0 +1,96 @@
+"""Incremental append of new partitions against a full rebuild, and its
+behaviour when the tail rewrite fails."""
+
+import pandas as pd
+import pytest
+
+from conftest import write_tick_partitions
+from src.data import incremental_bars
+from src.data.incremental_bars import append_new_partitions, merged_bars_path
+from src.data.parquet_tick_loader import load_partitioned_parquet_ticks
+from src.factors.ofi import add_mid_price, compute_ofi_bars_multi, label_tick_directions, standardize_ofi
+from src.research.ofi_single_factor import add_future_returns
+
+SYMBOL = 'TEST'
+BAR_SIZES = ['15min', '1h']
+WINDOW = 50
+
+
+def build_merged(ticks_dir, results_dir, end_date=None):
+    """Merged files as merge_batches writes them, from ticks through end_date."""
+    ticks = load_partitioned_parquet_ticks(SYMBOL, ticks_dir, end_date=end_date)
+    ticks = label_tick_directions(add_mid_price(ticks))
+    merged = {}
+    for bar_size, bars in compute_ofi_bars_multi(ticks, BAR_SIZES).items():
+        merged[bar_size] = add_future_returns(standardize_ofi(bars, window=WINDOW), horizons=[2, 5, 10])
+        merged[bar_size].to_csv(merged_bars_path(results_dir, SYMBOL, bar_size))
+    return merged
+
+
+def read_merged(results_dir, bar_size):
+    return pd.read_csv(merged_bars_path(results_dir, SYMBOL, bar_size), index_col=0, parse_dates=True)
+
+
+@pytest.fixture
+def dirs(tmp_path, rng):
+    ticks_dir = tmp_path / 'ticks'
+    results_dir = tmp_path / 'results'
+    results_dir.mkdir()
+    write_tick_partitions(ticks_dir, rng, SYMBOL, utc_offset_hours=0)
+    build_merged(ticks_dir, results_dir, end_date='2021-01-06')
+    return ticks_dir, results_dir
+
+
+def test_append_matches_full_rebuild(tmp_path, dirs):
+    ticks_dir, results_dir = dirs
+    n_before = {b: len(read_merged(results_dir, b)) for b in BAR_SIZES}
+    appended = append_new_partitions(SYMBOL, ticks_dir, results_dir, BAR_SIZES, zscore_window=WINDOW)
+
+    expected = build_merged(ticks_dir, tmp_path)
+    for bar_size in BAR_SIZES:
+        assert appended[bar_size] == len(expected[bar_size]) - n_before[bar_size] > 0
+        pd.testing.assert_frame_equal(read_merged(results_dir, bar_size), expected[bar_size],
+                                      rtol=1e-12, atol=1e-12, check_freq=False)
+
+    assert append_new_partitions(SYMBOL, ticks_dir, results_dir, BAR_SIZES, zscore_window=WINDOW) == \
+        {bar_size: 0 for bar_size in BAR_SIZES}
+
+
+def test_failed_render_leaves_file_untouched(dirs, monkeypatch):
+    ticks_dir, results_dir = dirs
+    before = {b: merged_bars_path(results_dir, SYMBOL, b).read_bytes() for b in BAR_SIZES}
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pd.DataFrame, 'to_csv', fail)
+    with pytest.raises(OSError):
+        append_new_partitions(SYMBOL, ticks_dir, results_dir, BAR_SIZES, zscore_window=WINDOW)
+
+    for bar_size in BAR_SIZES:
+        assert merged_bars_path(results_dir, SYMBOL, bar_size).read_bytes() == before[bar_size]
+
+
+def test_interrupted_rewrite_is_completed_on_the_next_run(tmp_path, dirs, monkeypatch):
+    ticks_dir, results_dir = dirs
+    apply = incremental_bars._apply_pending_rewrite
+
+    def truncate_then_crash(path):
+        # Killed after the truncate, before the rows are written back
+        if incremental_bars._journal_path(path).exists():
+            with open(path, 'r+b') as f:
+                f.truncate(int(incremental_bars._journal_path(path).read_bytes().split(b'\n', 1)[0]))
+            raise KeyboardInterrupt
+        return apply(path)
+
+    monkeypatch.setattr(incremental_bars, '_apply_pending_rewrite', truncate_then_crash)
+    with pytest.raises(KeyboardInterrupt):
+        append_new_partitions(SYMBOL, ticks_dir, results_dir, BAR_SIZES, zscore_window=WINDOW)
+    monkeypatch.undo()
+
+    append_new_partitions(SYMBOL, ticks_dir, results_dir, BAR_SIZES, zscore_window=WINDOW)
+    expected = build_merged(ticks_dir, tmp_path)
+    for bar_size in BAR_SIZES:
+        assert not incremental_bars._journal_path(merged_bars_path(results_dir, SYMBOL, bar_size)).exists()
+        pd.testing.assert_frame_equal(read_merged(results_dir, bar_size), expected[bar_size],
+                                      rtol=1e-12, atol=1e-12, check_freq=False)
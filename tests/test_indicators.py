@@ -0,0 +1,86 @@
+"""Vectorized True Range / ATR / regimes against the original row-wise code."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_bars
+from src.factors.indicators import true_range
+from src.research.ofi_long_short_regime import compute_regime_indicators
+from src.trading.ofi_signals import compute_atr
+
+
+def _bars_with_gaps(rng, n=600):
+    """Bars with missing high, low, close and whole-bar gaps."""
+    bars = make_bars(rng, n=n)
+    for column, share in [('high', 0.02), ('low', 0.02), ('close', 0.02)]:
+        bars.loc[rng.random(n) < share, column] = np.nan
+    bars.iloc[300:305, bars.columns.get_indexer(['high', 'low', 'close'])] = np.nan
+    return bars
+
+
+def _rowwise_true_range(bars):
+    """The per-row Python max the regime module used before vectorizing."""
+    df = bars.copy()
+    df['prev_close'] = df['close'].shift(1)
+    return df[['high', 'low', 'prev_close']].apply(
+        lambda x: max(x['high'] - x['low'],
+                      abs(x['high'] - x['prev_close']),
+                      abs(x['low'] - x['prev_close'])),
+        axis=1
+    )
+
+
+def _concat_true_range(bars):
+    """The pandas row max compute_atr used before vectorizing."""
+    high_low = bars['high'] - bars['low']
+    high_close = np.abs(bars['high'] - bars['close'].shift(1))
+    low_close = np.abs(bars['low'] - bars['close'].shift(1))
+    return pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_true_range_nan_semantics(seed):
+    bars = _bars_with_gaps(np.random.default_rng(seed))
+
+    np.testing.assert_array_equal(true_range(bars, skipna=False), _rowwise_true_range(bars))
+    np.testing.assert_array_equal(true_range(bars), _concat_true_range(bars))
+
+    # Only a missing high/low blanks the bar; the first bar is high - low
+    missing = bars['high'].isna() | bars['low'].isna()
+    assert true_range(bars, skipna=False).isna().equals(missing)
+    np.testing.assert_equal(true_range(bars, skipna=False).iloc[0],
+                            bars['high'].iloc[0] - bars['low'].iloc[0])
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('vol_measure', ['atr', 'true_range_std'])
+def test_regime_indicators_match_rowwise(seed, vol_measure):
+    bars = _bars_with_gaps(np.random.default_rng(seed))
+    got = compute_regime_indicators(bars, trend_ma_period=50, vol_measure=vol_measure)
+
+    tr = _rowwise_true_range(bars).rolling(window=20)
+    expected = tr.mean() if vol_measure == 'atr' else tr.std()
+    np.testing.assert_array_equal(got['vol_measure'], expected)
+    assert got['vol_measure'].isna().any()
+
+    q_low, q_high = expected.quantile(0.3), expected.quantile(0.7)
+    labels = np.where(expected <= q_low, 'low_vol',
+                      np.where(expected >= q_high, 'high_vol', 'medium_vol'))
+    np.testing.assert_array_equal(np.asarray(got['vol_regime'], dtype=object), labels)
+
+    ma = bars['close'].rolling(window=50).mean()
+    np.testing.assert_array_equal(got['ma'], ma)
+    np.testing.assert_array_equal(
+        np.asarray(got['trend_state'], dtype=object),
+        np.where(bars['close'] > ma, 'above_ma', 'below_ma')
+    )
+
+
+@pytest.mark.parametrize('method', ['rolling_mean', 'ema'])
+def test_compute_atr_matches_concat_max(rng, method):
+    bars = _bars_with_gaps(rng)
+    tr = _concat_true_range(bars)
+    expected = tr.rolling(window=20, min_periods=1).mean() if method == 'rolling_mean' \
+        else tr.ewm(span=20, adjust=False).mean()
+    np.testing.assert_array_equal(compute_atr(bars, period=20, method=method)['ATR'], expected)
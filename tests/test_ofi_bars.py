@@ -0,0 +1,30 @@
+"""OFI bar engines agree with the pandas resample path."""
+
+import pandas as pd
+import pytest
+
+from src.factors.ofi import compute_ofi_bars, compute_ofi_bars_multi
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+@pytest.mark.parametrize('bar_size', ['15min', '1h', '1D'])
+def test_numpy_engine_matches_pandas(ticks, bar_size):
+    expected = compute_ofi_bars(ticks, bar_size)
+    result = compute_ofi_bars(ticks, bar_size, engine='numpy')
+
+    # Same bars and OHLC (only resample sets an index freq); volume sums
+    # equal up to rounding, as resample sums are compensated and reduceat
+    # sums are not
+    pd.testing.assert_index_equal(result.index, expected.index)
+    pd.testing.assert_frame_equal(result[PRICE_COLUMNS], expected[PRICE_COLUMNS], check_exact=True, check_freq=False)
+    pd.testing.assert_frame_equal(result, expected[result.columns], rtol=1e-12, atol=1e-12, check_freq=False)
+
+
+def test_multi_timeframe_rollup_matches_direct_bars(ticks):
+    bars = compute_ofi_bars_multi(ticks, ['15min', '1h', '4h', '1D'])
+
+    for bar_size, result in bars.items():
+        expected = compute_ofi_bars(ticks, bar_size)
+        pd.testing.assert_frame_equal(result[PRICE_COLUMNS], expected[PRICE_COLUMNS], check_exact=True)
+        pd.testing.assert_frame_equal(result, expected, rtol=1e-12, atol=1e-12)
@@ -0,0 +1,187 @@
+"""The Phase 5 sweep gives the same rows however it is run."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import make_bars
+from src.config_loader import get_config
+from src.research import ofi_param_sweep
+from src.research.ofi_param_sweep import ParamCombo, load_sweep_bars, run_phase5_param_sweep, sweep_combos_on_bars
+from src.research.parallel_sweep import run_param_sweep_parallel
+from src.research.sweep_store import SweepStore
+from src.utils.cost_utils import CostScenario
+
+SYMBOLS = ['AAA', 'BBB']
+TIMEFRAMES = ['4H', '1D']
+COST_SCENARIOS = [CostScenario('low_cost', 0.00003), CostScenario('high_cost', 0.0007)]
+COMBOS = [
+    ParamCombo(q_high, q_low, hmax, tp_R)
+    for q_high, q_low in [(0.8, 0.2), (0.85, 0.15), (0.75, 0.25)]
+    for hmax in [5, 30]
+    for tp_R in [None, 1.5]
+]
+
+
+def sweep_config(bars_dir):
+    return {
+        'ofi_trade_path': {
+            'entry_mode': 'trend',
+            'atr_period': 10,
+            'atr_method': 'rolling_mean',
+            'fixed_position_size': 1.0,
+            'engine': 'numpy',
+            'quantile_window': None,
+        },
+        'ofi_param_sweep': {
+            'batched': True,
+            'paths': {'bars_with_ofi_pattern': str(bars_dir / '{symbol}_{tf}_bars.csv')},
+        },
+    }
+
+
+@pytest.fixture
+def config(tmp_path):
+    for k, symbol in enumerate(SYMBOLS):
+        for j, timeframe in enumerate(TIMEFRAMES):
+            bars = make_bars(np.random.default_rng(10 * k + j), n=500)
+            bars.to_csv(tmp_path / f'{symbol}_{timeframe}_bars.csv')
+    return sweep_config(tmp_path)
+
+
+def serial_rows(config, symbol, timeframe, combos):
+    df = load_sweep_bars(symbol, timeframe, config)
+    return sweep_combos_on_bars(symbol, timeframe, df, combos, COST_SCENARIOS, config, progress=False)
+
+
+@pytest.mark.parametrize('combos_per_task', [1, 5, None])
+def test_parallel_matches_serial_order(config, combos_per_task):
+    # Pairs with fewer combos finish first; one pair has no bar file
+    combos_by_pair = {
+        ('AAA', '4H'): COMBOS,
+        ('AAA', '1D'): COMBOS[:3],
+        ('BBB', '4H'): COMBOS[::-1],
+        ('BBB', '1D'): [],
+        ('CCC', '4H'): COMBOS,
+    }
+    checkpointed = []
+    results = {
+        (symbol, timeframe): rows
+        for symbol, timeframe, rows in run_param_sweep_parallel(
+            combos_by_pair, COST_SCENARIOS, config, n_workers=2, combos_per_task=combos_per_task,
+            on_rows=lambda symbol, timeframe, rows: checkpointed.extend(rows)
+        )
+    }
+
+    assert set(results) == set(combos_by_pair)
+    assert results[('BBB', '1D')] == [] and results[('CCC', '4H')] == []
+    for (symbol, timeframe), combos in combos_by_pair.items():
+        if not results[(symbol, timeframe)]:
+            continue
+        rows = results[(symbol, timeframe)]
+        assert all(row['n_trades'] > 0 for row in rows)
+        assert [row['param_combo_id'] for row in rows] == [combo.to_id() for combo in combos]
+        pd.testing.assert_frame_equal(pd.DataFrame(rows), pd.DataFrame(serial_rows(config, symbol, timeframe, combos)))
+
+    assert len(checkpointed) == sum(len(rows) for rows in results.values())
+
+
+# --- Checkpoint store: resume and invalidation through run_phase5_param_sweep
+
+def write_phase5_config(tmp_path, n_workers=1, resume=True, high_cost=0.0007, name='settings.yaml'):
+    import yaml
+
+    config = get_config()
+    config['ofi_trade_path'].update(sweep_config(tmp_path)['ofi_trade_path'])
+    config['ofi_param_sweep'].update({
+        'symbols': SYMBOLS,
+        'timeframes': TIMEFRAMES,
+        'ofi_quantile_sets': [[0.8, 0.2], [0.85, 0.15], [0.75, 0.25]],
+        'hmax_candidates': [5, 30],
+        'tp_R_levels': [None, 1.5],
+        'search': {'mode': 'grid'},
+        'cost_scenarios': [
+            {'name': 'low_cost', 'per_side_rate': 0.00003},
+            {'name': 'high_cost', 'per_side_rate': high_cost},
+        ],
+        'batched': True,
+        'n_workers': n_workers,
+        'combos_per_task': 2,
+        'resume': resume,
+        'paths': {
+            'bars_with_ofi_pattern': str(tmp_path / '{symbol}_{tf}_bars.csv'),
+            'sweep_results_dir': str(tmp_path / ('out' if resume else 'out_fresh')),
+            'checkpoint_db': str(tmp_path / 'checkpoint.sqlite'),
+        },
+    })
+    path = tmp_path / name
+    path.write_text(yaml.safe_dump(config))
+    return path
+
+
+def read_results(tmp_path, out='out'):
+    return pd.read_csv(tmp_path / out / 'ofi_param_sweep_all_configs.csv')
+
+
+@pytest.fixture
+def computed(monkeypatch):
+    """(symbol, timeframe, n_combos) of every serial sweep_combos_on_bars call."""
+    calls = []
+    sweep = ofi_param_sweep.sweep_combos_on_bars
+
+    def spy(symbol, timeframe, df, combos, *args, **kwargs):
+        calls.append((symbol, timeframe, len(combos)))
+        return sweep(symbol, timeframe, df, combos, *args, **kwargs)
+
+    monkeypatch.setattr(ofi_param_sweep, 'sweep_combos_on_bars', spy)
+    return calls
+
+
+def fresh_results(tmp_path, **kwargs):
+    """The same sweep without the checkpoint store."""
+    run_phase5_param_sweep(write_phase5_config(tmp_path, resume=False, name='fresh.yaml', **kwargs))
+    return read_results(tmp_path, 'out_fresh')
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_killed_run_resumes_to_the_same_csv(tmp_path, config, computed, monkeypatch, n_workers):
+    put = SweepStore.put
+    stored = []
+
+    def put_then_die(self, symbol, timeframe, context, rows):
+        put(self, symbol, timeframe, context, rows)
+        stored.extend(rows)
+        if len(stored) >= 17:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(SweepStore, 'put', put_then_die)
+    with pytest.raises(KeyboardInterrupt):
+        run_phase5_param_sweep(write_phase5_config(tmp_path))
+    monkeypatch.setattr(SweepStore, 'put', put)
+
+    computed.clear()
+    run_phase5_param_sweep(write_phase5_config(tmp_path, n_workers=n_workers))
+    if n_workers == 1:
+        # 12 combos per pair: the first pair is restored, the second resumes
+        assert computed == [('AAA', '1D', 7), ('BBB', '4H', 12), ('BBB', '1D', 12)]
+
+    pd.testing.assert_frame_equal(read_results(tmp_path), fresh_results(tmp_path))
+
+
+def test_changed_costs_or_bars_invalidate_stored_rows(tmp_path, config, computed):
+    run_phase5_param_sweep(write_phase5_config(tmp_path))
+    computed.clear()
+    run_phase5_param_sweep(write_phase5_config(tmp_path))
+    assert computed == []
+
+    # Other cost scenarios: every pair is recomputed
+    run_phase5_param_sweep(write_phase5_config(tmp_path, high_cost=0.001))
+    assert computed == [(symbol, timeframe, 12) for symbol in SYMBOLS for timeframe in TIMEFRAMES]
+    pd.testing.assert_frame_equal(read_results(tmp_path), fresh_results(tmp_path, high_cost=0.001))
+
+    # A rebuilt bar file: only its pair is recomputed
+    computed.clear()
+    make_bars(np.random.default_rng(99), n=500).to_csv(tmp_path / 'BBB_4H_bars.csv')
+    run_phase5_param_sweep(write_phase5_config(tmp_path, high_cost=0.001))
+    assert computed == [('BBB', '4H', 12)]
+    pd.testing.assert_frame_equal(read_results(tmp_path), fresh_results(tmp_path, high_cost=0.001))
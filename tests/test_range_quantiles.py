@@ -0,0 +1,91 @@
+"""Rolling and whole-sample quantiles against pandas and np.percentile."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.trading.range_quantiles import rolling_quantiles, sample_quantiles
+
+LEVELS = [0.0, 0.05, 0.3, 0.5, 0.7, 0.95, 1.0]
+
+
+def _series(rng, n, nan_share=0.1):
+    """Values on a coarse grid (many ties) with NaN gaps and a NaN run."""
+    values = np.round(rng.normal(0, 1, n), 1)
+    values[rng.random(n) < nan_share] = np.nan
+    if n > 40:
+        values[20:35] = np.nan
+    return values
+
+
+@pytest.mark.parametrize('window', [1, 2, 3, 10, 50])
+@pytest.mark.parametrize('min_periods', [None, 0, 1, 'half'])
+def test_matches_pandas_rolling_quantile(rng, window, min_periods):
+    if min_periods == 'half':
+        min_periods = max(window // 2, 1)
+    values = _series(rng, 600)
+    got = rolling_quantiles(values, window, LEVELS, min_periods=min_periods)
+
+    rolling = pd.Series(values).rolling(window, min_periods=min_periods)
+    for q in LEVELS:
+        np.testing.assert_allclose(got[q], rolling.quantile(q), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('n', [0, 1, 4])
+def test_series_shorter_than_window(rng, n):
+    values = _series(rng, n, nan_share=0.3)
+    for min_periods in [None, 1, 3]:
+        got = rolling_quantiles(values, 5, LEVELS, min_periods=min_periods)
+        rolling = pd.Series(values, dtype=np.float64).rolling(5, min_periods=min_periods)
+        for q in LEVELS:
+            assert len(got[q]) == n
+            np.testing.assert_allclose(got[q], rolling.quantile(q), rtol=1e-12, atol=1e-12)
+
+
+def test_each_window_matches_np_percentile_exactly(rng):
+    values = _series(rng, 300)
+    window = 25
+    got = rolling_quantiles(values, window, LEVELS, min_periods=1)
+
+    for t in range(len(values)):
+        sample = values[max(t - window + 1, 0):t + 1]
+        sample = sample[~np.isnan(sample)]
+        for q in LEVELS:
+            expected = np.percentile(sample, q * 100) if len(sample) else np.nan
+            np.testing.assert_array_equal(got[q][t], expected)
+
+
+def test_neighbours_separated_by_the_rest_of_the_chunk():
+    # Each chunk's first half fills the gap between the two middle values
+    # of the windows in its second half (small and large values alternate)
+    window = 64
+    middle = np.linspace(-1.0, 1.0, window)
+    outer = np.where(np.arange(window) % 2 == 0, -10.0, 10.0) + np.arange(window) * 1e-3
+    values = np.tile(np.concatenate([middle, outer]), 4)
+    got = rolling_quantiles(values, window, LEVELS)
+
+    for t in range(window - 1, len(values)):
+        sample = values[t - window + 1:t + 1]
+        for q in LEVELS:
+            np.testing.assert_array_equal(got[q][t], np.percentile(sample, q * 100))
+
+
+def test_all_nan_input_gives_all_nan(rng):
+    got = rolling_quantiles(np.full(30, np.nan), 5, LEVELS, min_periods=0)
+    for q in LEVELS:
+        assert np.isnan(got[q]).all()
+
+
+@pytest.mark.parametrize('window, min_periods', [(3, 5), (1, 2), (0, None), (5, -1)])
+def test_rejects_invalid_window(window, min_periods):
+    with pytest.raises(ValueError):
+        rolling_quantiles(np.arange(10.0), window, [0.5], min_periods=min_periods)
+
+
+def test_sample_quantiles_match_series_quantile(rng):
+    values = _series(rng, 1000)
+    got = sample_quantiles(values, LEVELS)
+    for q in LEVELS:
+        assert got[q] == pd.Series(values).quantile(q)
+
+    assert all(np.isnan(v) for v in sample_quantiles(np.full(5, np.nan), LEVELS).values())
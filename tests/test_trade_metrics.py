@@ -0,0 +1,79 @@
+"""Trade-metrics kernels equal the pandas reductions they replace."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.trade_metrics import (
+    EXIT_REASONS, column_stats, exit_reason_shares, group_trades, grouped_column_stats, trade_arrays
+)
+
+QUANTILES = (0.25, 0.75, 0.9)
+
+# pandas warns on the reference statistics of empty groups
+pytestmark = pytest.mark.filterwarnings('ignore:Mean of empty slice:RuntimeWarning')
+
+
+def _values(rng, n, dtype):
+    values = rng.normal(0.1, 1.5, n)
+    values[rng.random(n) < 0.1] = np.nan
+    values[rng.random(n) < 0.05] = 0.0
+    return values.astype(dtype)
+
+
+def _assert_matches_pandas(stats, series):
+    series = series.astype(np.float64)
+    assert stats.count == series.count()
+    for name in ['mean', 'std', 'median', 'min', 'max']:
+        np.testing.assert_array_equal(getattr(stats, name), getattr(series, name)(), err_msg=name)
+    for q in QUANTILES:
+        np.testing.assert_array_equal(stats.quantiles[q], series.quantile(q))
+    np.testing.assert_array_equal(stats.mean_pos, series[series > 0].mean())
+    assert stats.n_nonpos == (series <= 0).sum()
+
+
+@pytest.mark.parametrize('n', [0, 1, 2, 7, 1000, 20_000])
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_column_stats_match_pandas_in_float64(rng, n, dtype):
+    values = _values(rng, n, dtype)
+    _assert_matches_pandas(column_stats(values, QUANTILES), pd.Series(values))
+
+
+def test_trade_arrays_upcast_float32():
+    trades = pd.DataFrame({'final_r': np.ones(3, dtype=np.float32), 'exit_reason': ['stop'] * 3})
+    arrays = trade_arrays(trades)
+    assert arrays['final_r'].dtype == np.float64
+    assert arrays['exit_reason'].dtype == object
+
+
+def test_grouped_stats_match_per_group_pandas(rng):
+    n = 5000
+    trades = pd.DataFrame({
+        'config_id': rng.choice(['a', 'b', 'c', 'd'], n),
+        'final_r': _values(rng, n, np.float64),
+    })
+    trades.loc[trades['config_id'] == 'd', 'final_r'] = np.nan
+
+    groups = group_trades(trades, 'config_id')
+    grouped = grouped_column_stats(trades['final_r'], groups, QUANTILES)
+
+    for g, config_id in enumerate(groups.keys['config_id']):
+        subset = trades.loc[trades['config_id'] == config_id, 'final_r']
+        stats = column_stats(subset.to_numpy(), QUANTILES)
+        assert grouped.n_rows[g] == len(subset)
+        for name in ['count', 'mean', 'std', 'median', 'min', 'max', 'mean_pos', 'mean_nonpos']:
+            np.testing.assert_array_equal(getattr(grouped, name)[g], getattr(stats, name))
+        _assert_matches_pandas(stats, subset)
+
+
+@pytest.mark.parametrize('n', [0, 1, 500])
+def test_exit_reason_shares_match_value_counts(rng, n):
+    reasons = rng.choice(['stop', 'tp_hit', 'hmax', 'other'], n)
+    shares = exit_reason_shares(reasons)
+
+    expected = pd.Series(reasons, dtype=object).value_counts(normalize=True)
+    for reason in EXIT_REASONS:
+        if n == 0:
+            assert np.isnan(shares[reason])
+        else:
+            assert shares[reason] == pytest.approx(expected.get(reason, 0.0), rel=1e-15)
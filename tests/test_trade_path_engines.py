@@ -0,0 +1,60 @@
+"""The trade-path engines and the batched simulator return the same trades."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.trading.batched_simulator import simulate_ofi_trade_paths_batched
+from src.trading.feature_cache import FeatureCache
+from src.trading.ofi_signals import prepare_trading_data
+from src.trading.trade_path_simulator import (
+    TradePathConfig, simulate_ofi_trade_paths_for_df, simulate_trade_paths
+)
+
+from conftest import make_bars
+
+SEEDS = range(6)
+TP_LEVELS = [None, 0.5, 1.5]
+HMAX = [1, 2, 5, 30]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('tp_R', TP_LEVELS)
+@pytest.mark.parametrize('hmax_bars', HMAX)
+@pytest.mark.parametrize('engine', ['numpy', 'jump'])
+def test_engine_matches_python(seed, tp_R, hmax_bars, engine):
+    bars = prepare_trading_data(make_bars(np.random.default_rng(seed)), atr_period=5)
+
+    expected = simulate_trade_paths(bars, hmax_bars=hmax_bars, tp_R=tp_R, engine='python')
+    result = simulate_trade_paths(bars, hmax_bars=hmax_bars, tp_R=tp_R, engine=engine)
+
+    assert len(expected) > 0
+    pd.testing.assert_frame_equal(result[expected.columns], expected, check_exact=True, check_dtype=False)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_batched_matches_per_config(seed):
+    bars = make_bars(np.random.default_rng(seed))
+    configs = {
+        f'c{i}': TradePathConfig(
+            entry_q_high=q_high, entry_q_low=q_low, atr_period=atr_period,
+            hmax_bars=hmax_bars, tp_R=tp_R, quantile_window=window, quantile_min_periods=50,
+            engine='numpy'
+        )
+        for i, (q_high, q_low, atr_period, hmax_bars, tp_R, window) in enumerate([
+            (0.8, 0.2, 5, 1, None, None),
+            (0.8, 0.2, 5, 30, 1.5, None),
+            (0.85, 0.15, 5, 5, 0.5, None),
+            (0.8, 0.25, 10, 2, None, None),
+            (0.8, 0.2, 10, 30, None, 100),
+            (0.9, 0.1, 5, 5, 1.5, 100),
+        ])
+    }
+
+    batched = simulate_ofi_trade_paths_batched('X', '4H', bars, configs, feature_cache=FeatureCache())
+
+    for config_id, cfg in configs.items():
+        expected = simulate_ofi_trade_paths_for_df('X', '4H', bars, cfg, feature_cache=FeatureCache())
+        result = batched[batched['config_id'] == config_id].reset_index(drop=True)
+        assert len(expected) > 0
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_exact=True, check_dtype=False)